@@ -1 +1,6 @@
 """Lazy Tasks - Personal AI Executive Assistant."""
+
+import time
+
+# Reference point for import and time-to-ready reporting (app.core.warmup)
+IMPORT_STARTED = time.perf_counter()
@@ -1,6 +1,7 @@
 """Dependency injection for API routes."""
 
 from collections.abc import AsyncGenerator
+from functools import lru_cache
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,10 +11,6 @@ from app.services.llm_service import LLMService
 from app.services.prompt_manager import PromptManager
 from app.services.telegram_service import TelegramService
 
-# Module-level singletons for stateless services
-_prompt_manager = PromptManager()
-_llm_service = LLMService()
-
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency to get database session.
@@ -53,19 +50,21 @@ def get_telegram_service() -> TelegramService:
     return TelegramService()
 
 
+@lru_cache
 def get_prompt_manager() -> PromptManager:
-    """Get PromptManager singleton.
+    """Get PromptManager singleton (built on first use or during warmup).
 
     Returns:
         PromptManager instance.
     """
-    return _prompt_manager
+    return PromptManager()
 
 
+@lru_cache
 def get_llm_service() -> LLMService:
-    """Get LLMService singleton.
+    """Get LLMService singleton (built on first use or during warmup).
 
     Returns:
         LLMService instance.
     """
-    return _llm_service
+    return LLMService()
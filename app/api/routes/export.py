@@ -0,0 +1,116 @@
+"""Streaming data export endpoints."""
+
+import hmac
+from collections.abc import AsyncIterator, Callable
+from datetime import UTC, datetime, timedelta
+
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.services.export_service import (
+    MEDIA_TYPES,
+    ExportFormat,
+    ExportService,
+    export_filename,
+    gzip_chunks,
+)
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+
+def _authorize(authorization: str | None) -> None:
+    """Check the export bearer token.
+
+    Raises:
+        HTTPException: 404 if exports are disabled, 403 on a wrong token.
+    """
+    token = get_settings().export_token
+    if not token:
+        raise HTTPException(status_code=404, detail="Export is disabled")
+    if not hmac.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=403, detail="Invalid export token")
+
+
+def _streaming_export(
+    name: str,
+    fmt: ExportFormat,
+    compress: bool,
+    export: Callable[[ExportService], AsyncIterator[bytes]],
+) -> StreamingResponse:
+    """Build a download response that streams ``export`` chunk by chunk.
+
+    The session is opened inside the body generator, so it lives exactly as
+    long as the stream rather than the request's dependencies.
+    """
+    batch_size = get_settings().export_batch_size
+
+    async def body() -> AsyncIterator[bytes]:
+        async with AsyncSessionLocal() as session:
+            chunks = export(ExportService(session, batch_size))
+            if compress:
+                chunks = gzip_chunks(chunks)
+            async for chunk in chunks:
+                yield chunk
+
+    filename = export_filename(name, fmt, compress)
+    return StreamingResponse(
+        body(),
+        media_type="application/gzip" if compress else MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/tasks")
+async def export_tasks(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+    chat_id: int | None = None,
+    authorization: str | None = Header(None),
+) -> StreamingResponse:
+    """Stream tasks as CSV or NDJSON.
+
+    Args:
+        fmt: ``csv`` or ``ndjson``.
+        compress: Gzip the stream.
+        chat_id: Only this owner's tasks (default: all owners).
+        authorization: ``Bearer <EXPORT_TOKEN>``.
+
+    Returns:
+        Streaming file download.
+    """
+    _authorize(authorization)
+    return _streaming_export(
+        "tasks", fmt, compress, lambda service: service.tasks(fmt, chat_id)
+    )
+
+
+@router.get("/chat_logs")
+async def export_chat_logs(
+    fmt: ExportFormat = Query("csv", alias="format"),
+    compress: bool = Query(False, alias="gzip"),
+    chat_id: int | None = None,
+    days: int | None = Query(None, ge=1),
+    authorization: str | None = Header(None),
+) -> StreamingResponse:
+    """Stream chat history as CSV or NDJSON.
+
+    Args:
+        fmt: ``csv`` or ``ndjson``.
+        compress: Gzip the stream.
+        chat_id: Only this Telegram chat (default: all chats).
+        days: Only the last ``days`` days (default: everything not archived).
+        authorization: ``Bearer <EXPORT_TOKEN>``.
+
+    Returns:
+        Streaming file download.
+    """
+    _authorize(authorization)
+    since = datetime.now(UTC) - timedelta(days=days) if days else None
+    return _streaming_export(
+        "chat_logs",
+        fmt,
+        compress,
+        lambda service: service.chat_logs(fmt, chat_id, since),
+    )
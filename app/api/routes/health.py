@@ -1,6 +1,10 @@
 """Health check endpoints."""
 
-from fastapi import APIRouter
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from app.core.warmup import readiness
 
 router = APIRouter(tags=["Health"])
 
@@ -15,6 +19,21 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@router.get("/ready")
+async def ready_check(response: Response) -> dict[str, Any]:
+    """Readiness endpoint: 200 only after startup warmup has completed.
+
+    Warmup covers the DB pool, prompt compilation and preconnects to the
+    Telegram and LLM hosts; per-step timings are included.
+
+    Returns:
+        Readiness status with import/warmup timings.
+    """
+    if not readiness.is_ready:
+        response.status_code = 503
+    return readiness.to_dict()
+
+
 @router.get("/")
 async def root() -> dict[str, str]:
     """Root endpoint.
@@ -0,0 +1,18 @@
+"""Prometheus metrics endpoint."""
+
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_latest
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def metrics() -> Response:
+    """Expose Prometheus metrics.
+
+    Returns:
+        Metrics in the Prometheus text exposition format.
+    """
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
@@ -3,30 +3,57 @@
 import html
 import logging
 import re
+import tempfile
+import time
 from dataclasses import dataclass
-from typing import Any
+from datetime import UTC, datetime, timedelta
+from typing import IO, Any
+from zoneinfo import ZoneInfo
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.deps import get_llm_service, get_prompt_manager
+from app.core import metrics
 from app.core.config import get_settings
 from app.core.database import get_db
+from app.core.sql_instrumentation import track_queries
+from app.core.tracing import get_tracer, span
 from app.models.task import Task
+from app.services.calendar_service import CalendarService, work_windows
 from app.services.chat_service import ChatService
+from app.services.deadline_parser import deadline_window
+from app.services.export_service import (
+    ExportFormat,
+    ExportService,
+    export_filename,
+    gzip_chunks,
+)
 from app.services.intent_router import IntentRouter
-from app.services.llm_service import LLMService
-from app.services.prompt_manager import PromptManager
-from app.services.task_service import TaskService
+from app.services.retrieval_service import get_retrieval_service
+from app.services.task_matcher import get_task_matcher, parse_choice
+from app.services.task_ranker import get_task_ranker
+from app.services.task_service import ProjectStats, TaskService
 from app.services.telegram_service import TelegramService
-from app.api.deps import get_llm_service, get_prompt_manager
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/webhook", tags=["Telegram"])
-settings = get_settings()
 
 # Max Telegram message length
 _TG_MAX_LEN = 4096
 
+# Subtasks listed under /task <id> (the rollup counts cover all of them)
+_SUBTREE_MAX_LINES = 30
+
+# /free: slot length and how many slots to list
+_FREE_SLOT = timedelta(hours=1)
+_FREE_SLOTS_SHOWN = 5
+_WEEKDAY_LABEL = ("T2", "T3", "T4", "T5", "T6", "T7", "CN")
+
+# /export: kept in memory up to this size, then spooled to disk
+_EXPORT_SPOOL_BYTES = 1024 * 1024
+_TG_MAX_DOCUMENT_BYTES = 50 * 1024 * 1024  # Bot API upload limit
+
 # Priority emoji mapping (1=highest)
 _PRIORITY_EMOJI: dict[int, str] = {
     1: "🔴",
@@ -52,10 +79,13 @@ class CommandResult:
     Attributes:
         text: Response text.
         parse_mode: Telegram parse mode (HTML, etc.) or None for plain text.
+        document: ``(filename, file)`` to send as a document, with ``text``
+            as its caption.
     """
 
     text: str
     parse_mode: str | None = None
+    document: tuple[str, IO[bytes]] | None = None
 
 
 # ---------------------------------------------------------------------------
@@ -131,10 +161,20 @@ def _handle_static_command(text: str) -> CommandResult | None:
                 "📌 <b>Commands</b>\n\n"
                 "<b>Task Dashboard</b>\n"
                 "/tasks — Tất cả active tasks (doing + todo)\n"
+                "/next — 3 task nên làm tiếp theo\n"
+                "/today — Tasks đến hạn hôm nay (+ quá hạn)\n"
+                "/overdue — Tasks quá hạn\n"
+                "/free — Khoảng trống 1h trong lịch tuần này\n"
                 "/todo — Chỉ tasks chưa làm\n"
                 "/doing — Chỉ tasks đang làm\n"
                 "/done — Tasks hoàn thành gần đây\n"
-                "/task &lt;id&gt; — Chi tiết 1 task\n\n"
+                "/task &lt;id&gt; — Chi tiết 1 task\n"
+                "/search &lt;từ khóa&gt; — Tìm task theo nội dung\n"
+                "/tag &lt;tag&gt; [tag...] — Active tasks có đủ các tag\n"
+                "/tags — Các tag đang dùng\n"
+                "/projects — Tiến độ các project\n"
+                "/project &lt;id|tên&gt; — Chi tiết 1 project\n"
+                "/export [chat] [json] [gz] — Tải file tasks (hoặc lịch sử chat)\n\n"
                 "<b>General</b>\n"
                 "/start — Welcome message\n"
                 "/help — Xem hướng dẫn này\n\n"
@@ -238,13 +278,17 @@ async def _cmd_task_detail(
             parse_mode="HTML",
         )
 
-    task = await task_service.get_task_by_id(int(task_id_str))
-    if task is None:
+    # Task, project and whole subtree in one query
+    tree = await task_service.get_subtree(
+        int(task_id_str), limit=_SUBTREE_MAX_LINES + 2, with_project=True
+    )
+    if not tree:
         return CommandResult(
             text=f"❌ Không tìm thấy task <code>#{_escape(task_id_str)}</code>",
             parse_mode="HTML",
         )
 
+    task = tree[0][0]
     status_label = _STATUS_LABEL.get(task.status, task.status)
     p_emoji = _PRIORITY_EMOJI.get(task.priority, "⚪")
     lines: list[str] = [
@@ -264,16 +308,331 @@ async def _cmd_task_detail(
         lines.append(f"<b>Complexity:</b> {task.complexity}")
     if task.project:
         lines.append(f"<b>Project:</b> {_escape(task.project.name)}")
+    if task.subtask_total:
+        percent = task.subtask_done * 100 // task.subtask_total
+        lines.append(
+            f"<b>Subtasks:</b> {task.subtask_done}/{task.subtask_total} xong "
+            f"({percent}%)"
+        )
+        for subtask, depth in tree[1 : _SUBTREE_MAX_LINES + 1]:
+            icon = _STATUS_LABEL.get(subtask.status, subtask.status).split()[0]
+            indent = "   " * depth
+            line = f"{indent}{icon} #{subtask.id} {_escape(subtask.content)}"
+            if subtask.subtask_total:
+                line += f" ({subtask.subtask_done}/{subtask.subtask_total})"
+            lines.append(line)
+        if len(tree) > _SUBTREE_MAX_LINES + 1:
+            lines.append("   …")
 
     lines.append(f"\n<i>Created: {task.created_at.strftime('%d/%m/%Y %H:%M')}</i>")
     if task.updated_at and task.updated_at != task.created_at:
         lines.append(f"<i>Updated: {task.updated_at.strftime('%d/%m/%Y %H:%M')}</i>")
 
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_search(
+    task_service: TaskService, arg: str,
+) -> CommandResult:
+    """Handle /search <text> — full-text search over task content."""
+    if not arg:
+        return CommandResult(
+            text=(
+                "⚠️ Dùng: /search &lt;từ khóa&gt;\n"
+                "Ví dụ: <code>/search hop khach hang</code>"
+            ),
+            parse_mode="HTML",
+        )
+
+    tasks = await task_service.search(arg)
+    if not tasks:
+        return CommandResult(
+            text=f"🔎 Không tìm thấy task nào khớp <i>{_escape(arg)}</i>",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = [f"🔎 <b>{len(tasks)} task khớp</b> <i>{_escape(arg)}</i>"]
+    for t in tasks:
+        head, sep, meta = _format_task_line(t).partition("\n")
+        status = _STATUS_LABEL.get(t.status, t.status)
+        lines.append(f"{head} <i>({status})</i>{sep}{meta}")
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_tag(task_service: TaskService, arg: str) -> CommandResult:
+    """Handle /tag <tag> [tag...] — active tasks carrying all given tags."""
+    tags = arg.replace(",", " ").split()
+    if not tags:
+        return CommandResult(
+            text=(
+                "⚠️ Dùng: /tag &lt;tag&gt; [tag...]\n"
+                "Ví dụ: <code>/tag backend review</code> · /tags để xem các tag"
+            ),
+            parse_mode="HTML",
+        )
+
+    tasks = await task_service.list_tasks_by_tags(tags)
+    label = " ".join(f"#{_escape(t.lstrip('#').lower())}" for t in tags)
+    if not tasks:
+        return CommandResult(
+            text=f"🏷 {label}\n\nKhông có active task nào.",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = [f"🏷 {label} ({len(tasks)})"]
+    for t in tasks:
+        lines.append(_format_task_line(t))
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_tags(task_service: TaskService) -> CommandResult:
+    """Handle /tags — tags in use with active/total task counts."""
+    counts = await task_service.get_tag_counts()
+    if not counts:
+        return CommandResult(
+            text="🏷 <b>Tags</b>\n\nChưa có tag nào. Thêm #tag khi tạo task.",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = ["🏷 <b>Tags</b> (active / tổng)"]
+    for c in counts:
+        lines.append(f"#{_escape(c.tag)} — {c.active_count} / {c.task_count}")
+    lines.append("\n/tag &lt;tag&gt; để xem tasks")
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_next(task_service: TaskService) -> CommandResult:
+    """Handle /next — the best tasks to work on now (TaskRanker)."""
+    ranked = await get_task_ranker(task_service.owner_chat_id).top(task_service, k=3)
+    if not ranked:
+        return CommandResult(
+            text="🎯 <b>Next</b>\n\nKhông có active task nào 🎉",
+            parse_mode="HTML",
+        )
+
+    now = datetime.now(UTC)
+    lines: list[str] = ["🎯 <b>Nên làm tiếp theo</b>"]
+    for i, t in enumerate(ranked, 1):
+        p_emoji = _PRIORITY_EMOJI.get(t.priority, "⚪")
+        lines.append(f"{i}. {p_emoji} <b>#{t.id}</b> {_escape(t.content)}")
+        hints: list[str] = []
+        if t.status == "in_progress":
+            hints.append("🔥 đang làm")
+        if t.deadline:
+            overdue = " (quá hạn)" if t.deadline < now else ""
+            hints.append(f"⏰ {t.deadline.strftime('%d/%m %H:%M')}{overdue}")
+        if t.complexity:
+            hints.append(t.complexity)
+        if hints:
+            lines.append(f"   {' · '.join(hints)}")
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_today(task_service: TaskService) -> CommandResult:
+    """Handle /today — overdue tasks plus tasks due today (user's timezone)."""
+    today_start, today_end = deadline_window("today")
+    assert today_start is not None  # only "overdue" is open-ended
+    overdue = await task_service.get_overdue_tasks(before=today_start)
+    due = await task_service.get_tasks_due(today_start, today_end)
+    if not overdue and not due:
+        return CommandResult(
+            text="📅 <b>Hôm nay</b>\n\nKhông có task nào đến hạn hôm nay 🎉",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = [f"📅 <b>Hôm nay</b> ({len(due)} đến hạn)"]
+    for t in due:
+        lines.append(_format_task_line(t))
+    if overdue:
+        lines.append(f"\n⚠️ <b>Quá hạn</b> ({len(overdue)})")
+        for t in overdue:
+            lines.append(_format_task_line(t))
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_overdue(task_service: TaskService) -> CommandResult:
+    """Handle /overdue — active tasks past their deadline, oldest first."""
+    _, now = deadline_window("overdue")
+    tasks = await task_service.get_overdue_tasks(before=now)
+    if not tasks:
+        return CommandResult(
+            text="⚠️ <b>Quá hạn</b>\n\nKhông có task nào quá hạn 👍",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = [f"⚠️ <b>Quá hạn</b> ({len(tasks)})"]
+    for t in tasks:
+        lines.append(_format_task_line(t))
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_free(calendar_service: CalendarService) -> CommandResult:
+    """Handle /free — free 1-hour slots in working hours for the rest of the week."""
+    settings = get_settings()
+    tz = ZoneInfo(settings.timezone)
+    now = datetime.now(tz)
+    # Start on the next half hour rather than at an odd minute
+    start = now.replace(second=0, microsecond=0) + timedelta(minutes=-now.minute % 30)
+    _, end_of_week = deadline_window("this_week", now)
+    windows = work_windows(
+        start,
+        end_of_week,
+        tz,
+        settings.calendar_work_start_hour,
+        settings.calendar_work_end_hour,
+    )
+    slots = await calendar_service.find_free_slots(
+        windows, _FREE_SLOT, limit=_FREE_SLOTS_SHOWN
+    )
+    if not slots:
+        return CommandResult(
+            text="🗓 <b>Lịch trống</b>\n\nKhông còn khoảng trống 1h nào trong tuần này",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = ["🗓 <b>Lịch trống tuần này</b> (≥ 1h, giờ làm việc)"]
+    for slot in slots:
+        start_local, end_local = slot.start.astimezone(tz), slot.end.astimezone(tz)
+        hours, rest = divmod(int(slot.duration.total_seconds()) // 60, 60)
+        length = f"{hours}h{rest:02d}" if rest else f"{hours}h"
+        lines.append(
+            f"• {_WEEKDAY_LABEL[start_local.weekday()]} "
+            f"{start_local.strftime('%d/%m %H:%M')}–{end_local.strftime('%H:%M')} "
+            f"({length})"
+        )
+
     return CommandResult(text="\n".join(lines), parse_mode="HTML")
 
 
+def _format_project_progress(stats: ProjectStats) -> str:
+    """Format a project's aggregates as one HTML line (progress + overdue)."""
+    line = f"{stats.done}/{stats.total} xong"
+    if stats.total:
+        line += f" ({stats.done * 100 // stats.total}%)"
+    line += f" · {stats.in_progress} doing · {stats.todo} todo"
+    if stats.overdue:
+        line += f" · ⚠️ {stats.overdue} quá hạn"
+    return line
+
+
+async def _cmd_projects(task_service: TaskService) -> CommandResult:
+    """Handle /projects — projects with task progress and overdue counts."""
+    projects = await task_service.get_project_stats()
+    if not projects:
+        return CommandResult(
+            text="📁 <b>Projects</b>\n\nChưa có project nào.",
+            parse_mode="HTML",
+        )
+
+    lines: list[str] = [f"📁 <b>Projects</b> ({len(projects)})"]
+    for p in projects:
+        lines.append(f"\n<b>#{p.project.id} {_escape(p.project.name)}</b>")
+        lines.append(f"   {_format_project_progress(p)}")
+        if p.next_deadline:
+            next_deadline = p.next_deadline.strftime("%d/%m %H:%M")
+            lines.append(f"   ⏰ Deadline gần nhất: {next_deadline}")
+    lines.append("\n/project &lt;id|tên&gt; để xem chi tiết")
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_project(task_service: TaskService, arg: str) -> CommandResult:
+    """Handle /project <id|name> — one project's aggregates and open tasks."""
+    if not arg:
+        return CommandResult(
+            text=(
+                "⚠️ Dùng: /project &lt;id|tên&gt;\n"
+                "Ví dụ: <code>/project 1</code> · /projects để xem danh sách"
+            ),
+            parse_mode="HTML",
+        )
+
+    project_id = arg.lstrip("#")
+    if project_id.isdigit():
+        found = await task_service.get_project_stats(project_id=int(project_id))
+    else:
+        found = await task_service.get_project_stats(
+            name=arg, include_archived=True, limit=1
+        )
+    if not found:
+        return CommandResult(
+            text=f"❌ Không tìm thấy project <code>{_escape(arg)}</code>",
+            parse_mode="HTML",
+        )
+
+    stats = found[0]
+    project = stats.project
+    lines: list[str] = [
+        f"📁 <b>Project #{project.id}: {_escape(project.name)}</b>",
+        "",
+        f"<b>Status:</b> {_escape(project.status)}",
+        f"<b>Tiến độ:</b> {_format_project_progress(stats)}",
+    ]
+    if stats.cancelled:
+        lines.append(f"<b>Đã hủy:</b> {stats.cancelled}")
+    if stats.next_deadline:
+        next_deadline = stats.next_deadline.strftime("%d/%m/%Y %H:%M")
+        lines.append(f"<b>Deadline gần nhất:</b> {next_deadline}")
+    if project.description:
+        lines.append(f"<b>Mô tả:</b> {_escape(project.description)}")
+
+    if stats.active:
+        tasks = await task_service.list_project_tasks(project.id)
+        lines.append(f"\n<b>Active tasks</b> ({stats.active})")
+        for t in tasks:
+            lines.append(_format_task_line(t))
+
+    return CommandResult(text=_truncate_message("\n".join(lines)), parse_mode="HTML")
+
+
+async def _cmd_export(
+    export_service: ExportService, chat_id: int, arg: str,
+) -> CommandResult:
+    """Handle /export [chat] [json] [gz] — tasks or chat history as a file.
+
+    The stream is spooled to a temporary file (memory up to
+    ``_EXPORT_SPOOL_BYTES``) and uploaded from there.
+    """
+    words = arg.lower().split()
+    fmt: ExportFormat = "ndjson" if "json" in words or "ndjson" in words else "csv"
+    compress = "gz" in words or "gzip" in words
+    if "chat" in words:
+        name, label = "chat_logs", "Lịch sử chat"
+        chunks = export_service.chat_logs(fmt, telegram_chat_id=chat_id)
+    else:
+        name, label = "tasks", "Tasks"
+        chunks = export_service.tasks(fmt, owner_chat_id=chat_id)
+    if compress:
+        chunks = gzip_chunks(chunks)
+
+    file = tempfile.SpooledTemporaryFile(max_size=_EXPORT_SPOOL_BYTES)
+    async for chunk in chunks:
+        file.write(chunk)
+    if file.tell() > _TG_MAX_DOCUMENT_BYTES:
+        file.close()
+        hint = "" if compress else " Thử <code>/export ... gz</code>."
+        return CommandResult(
+            text=f"⚠️ File export lớn hơn 50 MB, Telegram không gửi được.{hint}",
+            parse_mode="HTML",
+        )
+    file.seek(0)
+    return CommandResult(
+        text=f"📦 {label} ({fmt.upper()})",
+        document=(export_filename(name, fmt, compress), file),
+    )
+
+
 async def _handle_data_command(
-    text: str, task_service: TaskService,
+    text: str,
+    task_service: TaskService,
+    calendar_service: CalendarService,
+    export_service: ExportService,
 ) -> CommandResult | None:
     """Handle data commands that need DB but no LLM.
 
@@ -294,12 +653,48 @@ async def _handle_data_command(
     if cmd == "/done":
         return await _cmd_done(task_service)
 
+    if cmd == "/tags":
+        return await _cmd_tags(task_service)
+
+    if cmd == "/today":
+        return await _cmd_today(task_service)
+
+    if cmd == "/overdue":
+        return await _cmd_overdue(task_service)
+
+    if cmd == "/next":
+        return await _cmd_next(task_service)
+
+    if cmd == "/free":
+        return await _cmd_free(calendar_service)
+
+    if cmd == "/projects":
+        return await _cmd_projects(task_service)
+
     # /task <id> — allow "/task 123" or "/task #123"
     match = re.match(r"^/task(?:\s+(.*))?$", text.strip(), re.IGNORECASE)
     if match:
         arg = (match.group(1) or "").strip()
         return await _cmd_task_detail(task_service, arg)
 
+    match = re.match(r"^/tag(?:\s+(.*))?$", text.strip(), re.IGNORECASE | re.DOTALL)
+    if match:
+        return await _cmd_tag(task_service, (match.group(1) or "").strip())
+
+    match = re.match(r"^/project(?:\s+(.*))?$", text.strip(), re.IGNORECASE)
+    if match:
+        return await _cmd_project(task_service, (match.group(1) or "").strip())
+
+    match = re.match(r"^/search(?:\s+(.*))?$", text.strip(), re.IGNORECASE | re.DOTALL)
+    if match:
+        return await _cmd_search(task_service, (match.group(1) or "").strip())
+
+    match = re.match(r"^/export(?:\s+(.*))?$", text.strip(), re.IGNORECASE)
+    if match:
+        return await _cmd_export(
+            export_service, task_service.owner_chat_id, match.group(1) or ""
+        )
+
     return None
 
 
@@ -326,6 +721,7 @@ async def telegram_webhook(
     Raises:
         HTTPException: If secret token is invalid.
     """
+    settings = get_settings()
     if settings.telegram_webhook_secret:
         if x_telegram_bot_api_secret_token != settings.telegram_webhook_secret:
             logger.warning("Invalid webhook secret token received")
@@ -335,8 +731,23 @@ async def telegram_webhook(
     logger.info(f"Received Telegram update: {update.get('update_id')}")
 
     message = update.get("message")
-    if message:
-        await process_message(message, db)
+    callback_query = update.get("callback_query")
+    if message or callback_query:
+        update_id = update.get("update_id")
+        started = time.perf_counter()
+        with (
+            get_tracer().start_trace("telegram_webhook", update_id=update_id) as root,
+            track_queries(f"update {update_id}") as query_stats,
+        ):
+            if message:
+                tier = await process_message(message, db)
+            elif callback_query:
+                tier = await process_callback_query(callback_query, db)
+            if root is not None:
+                root.attributes["tier"] = tier
+                root.attributes["db.statements"] = query_stats.count
+        metrics.WEBHOOK_BY_TIER[tier].observe(time.perf_counter() - started)
+        metrics.DB_STATEMENTS_BY_TIER[tier].observe(query_stats.count)
 
     return {"status": "ok"}
 
@@ -344,7 +755,7 @@ async def telegram_webhook(
 async def process_message(
     message: dict[str, Any],
     db: AsyncSession,
-) -> None:
+) -> str:
     """Process an incoming Telegram message.
 
     3-tier routing:
@@ -355,6 +766,9 @@ async def process_message(
     Args:
         message: Telegram message object.
         db: Database session.
+
+    Returns:
+        Tier that handled the message: static, data, llm or ignored.
     """
     chat_id = message.get("chat", {}).get("id")
     text = message.get("text", "")
@@ -362,9 +776,10 @@ async def process_message(
 
     if not chat_id or not text:
         logger.debug("Skipping message without chat_id or text")
-        return
+        return "ignored"
 
     telegram_service = TelegramService()
+    started = time.perf_counter()
 
     # --- Tier 1: Static commands (no DB, no LLM) ---
     static_result = _handle_static_command(text)
@@ -377,28 +792,42 @@ async def process_message(
             )
         except Exception as e:
             logger.error(f"Failed to send Telegram message: {e}")
-        return
+        metrics.command_histogram(text).observe(time.perf_counter() - started)
+        return "static"
 
     # --- Tier 2: Data commands (DB query, no LLM, no chat_logs save) ---
-    task_service = TaskService(db)
-    data_result = await _handle_data_command(text, task_service)
+    task_service = TaskService(db, owner_chat_id=chat_id)
+    data_result = await _handle_data_command(
+        text,
+        task_service,
+        CalendarService(db),
+        ExportService(db, get_settings().export_batch_size),
+    )
     if data_result:
         try:
-            await telegram_service.send_message(
-                chat_id=chat_id,
-                text=data_result.text,
-                parse_mode=data_result.parse_mode,
-            )
+            if data_result.document:
+                filename, document = data_result.document
+                with document:
+                    await telegram_service.send_document(
+                        chat_id, filename, document, caption=data_result.text
+                    )
+            else:
+                await telegram_service.send_message(
+                    chat_id=chat_id,
+                    text=data_result.text,
+                    parse_mode=data_result.parse_mode,
+                )
         except Exception as e:
             logger.error(f"Failed to send Telegram message: {e}")
-        return
+        metrics.command_histogram(text).observe(time.perf_counter() - started)
+        return "data"
 
     # --- Tier 3: Normal messages (save to DB, route through LLM) ---
     session_id = f"telegram_{chat_id}"
     chat_service = ChatService(db)
 
     # Save user message
-    await chat_service.save_message(
+    user_log = await chat_service.save_message(
         session_id=session_id,
         role="user",
         content=text,
@@ -412,6 +841,7 @@ async def process_message(
     )
 
     # Route through IntentRouter
+    reply_markup: dict[str, Any] | None = None
     try:
         llm_service = get_llm_service()
         prompt_manager = get_prompt_manager()
@@ -419,12 +849,19 @@ async def process_message(
             llm=llm_service,
             prompt_manager=prompt_manager,
             task_service=task_service,
+            retrieval=(
+                get_retrieval_service() if get_settings().retrieval_enabled else None
+            ),
         )
 
         history = await chat_service.get_conversation_history(
             session_id, limit=10
         )
-        response_text = await intent_router.handle(text, history)
+        with span("IntentRouter.handle"):
+            response_text = await intent_router.handle(text, history)
+        # Flushed with the assistant message below; reflection reads it
+        user_log.intent = intent_router.last_intent
+        reply_markup = intent_router.reply_markup
     except Exception as e:
         logger.exception("IntentRouter failed")
         response_text = (
@@ -445,6 +882,72 @@ async def process_message(
         await telegram_service.send_message(
             chat_id=chat_id,
             text=response_text,
+            reply_markup=reply_markup,
+        )
+    except Exception as e:
+        logger.error(f"Failed to send Telegram message: {e}")
+
+    return "llm"
+
+
+async def process_callback_query(
+    callback_query: dict[str, Any],
+    db: AsyncSession,
+) -> str:
+    """Process an inline button press (task candidates offered by IntentRouter).
+
+    Applies the status carried by the button to the chosen task, or shows
+    the task, without going through the LLM.
+
+    Args:
+        callback_query: Telegram callback_query object.
+        db: Database session.
+
+    Returns:
+        Tier that handled the update: data or ignored.
+    """
+    chat_id = (callback_query.get("message") or {}).get("chat", {}).get("id")
+    choice = parse_choice(callback_query.get("data") or "")
+    telegram_service = TelegramService()
+
+    if not chat_id or choice is None:
+        logger.debug("Skipping callback_query without chat or known data")
+        try:
+            await telegram_service.answer_callback_query(callback_query["id"])
+        except Exception as e:
+            logger.error(f"Failed to answer callback query: {e}")
+        return "ignored"
+
+    task_id, status = choice
+    task_service = TaskService(db, owner_chat_id=chat_id)
+    if status is None:
+        result = await _cmd_task_detail(task_service, str(task_id))
+        notice = None
+    else:
+        task = await task_service.update_task(task_id, status=status)
+        if task is None:
+            notice = f"Task #{task_id} không còn tồn tại"
+            result = CommandResult(text=f"❌ {notice}")
+        else:
+            get_task_matcher(chat_id).invalidate()
+            get_task_ranker(chat_id).observe_on_commit(db, task)
+            label = _STATUS_LABEL.get(status, status)
+            notice = f"#{task_id} → {label}"
+            result = CommandResult(
+                text=(
+                    f"Đã cập nhật <b>#{task.id}</b> {_escape(task.content)}\n"
+                    f"→ {label}"
+                ),
+                parse_mode="HTML",
+            )
+
+    try:
+        await telegram_service.answer_callback_query(callback_query["id"], notice)
+        await telegram_service.send_message(
+            chat_id=chat_id,
+            text=result.text,
+            parse_mode=result.parse_mode,
         )
     except Exception as e:
         logger.error(f"Failed to send Telegram message: {e}")
+    return "data"
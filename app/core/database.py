@@ -2,38 +2,55 @@
 
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any
 
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeBase, Session
 
 from app.core.config import get_settings
 
-settings = get_settings()
 
-# Create async engine
-engine = create_async_engine(
-    settings.postgres_url,
-    echo=settings.is_development,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-)
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Get the process-wide async engine, created from settings on first use."""
+    settings = get_settings()
+    return create_async_engine(
+        settings.postgres_url,
+        echo=settings.is_development,
+        pool_pre_ping=True,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+
+
+class _EngineBoundSession(Session):
+    """Sync session resolving its bind at first use, not at import."""
+
+    def get_bind(self, *args: Any, **kwargs: Any) -> Engine:
+        """Bind every statement to ``get_engine()``."""
+        return get_engine().sync_engine
 
-# Session factory
+
+# Session factory (no engine is created until a session runs a statement)
 AsyncSessionLocal = async_sessionmaker(
-    engine,
     class_=AsyncSession,
+    sync_session_class=_EngineBoundSession,
     expire_on_commit=False,
     autocommit=False,
     autoflush=False,
 )
 
-# Base class for ORM models
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """Base class for ORM models."""
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
@@ -61,3 +78,25 @@ async def get_db_context() -> AsyncGenerator[AsyncSession, None]:
             raise
         finally:
             await session.close()
+
+
+@asynccontextmanager
+async def advisory_lock(key: int) -> AsyncGenerator[bool, None]:
+    """Try to hold a session-level Postgres advisory lock for the block.
+
+    Used by background jobs so only one app worker runs them at a time.
+
+    Args:
+        key: Lock key, unique per job.
+
+    Yields:
+        True if the lock was acquired, False if another session holds it.
+    """
+    async with get_engine().connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = bool(await conn.scalar(select(func.pg_try_advisory_lock(key))))
+        try:
+            yield locked
+        finally:
+            if locked:
+                await conn.scalar(select(func.pg_advisory_unlock(key)))
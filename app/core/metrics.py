@@ -0,0 +1,255 @@
+"""Prometheus metrics for the webhook pipeline and its dependencies.
+
+Label children are resolved once at import time into plain dicts keyed by
+label value, so hot-path code only does a dict lookup and an ``observe()``
+instead of building a label dict per call. Unknown label values fall back to
+a shared ``other`` child to keep cardinality bounded.
+"""
+
+import functools
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, ParamSpec, TypeVar
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# Latency buckets (seconds): DB/Telegram are ms-scale, LLM calls are seconds
+_FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+TIERS = ("static", "data", "llm", "ignored")
+COMMANDS = (
+    "/start",
+    "/help",
+    "/tasks",
+    "/next",
+    "/today",
+    "/overdue",
+    "/free",
+    "/todo",
+    "/doing",
+    "/done",
+    "/task",
+    "/search",
+    "/tag",
+    "/tags",
+    "/projects",
+    "/project",
+    "/export",
+    "other",
+)
+INTENTS = ("create_task", "query", "update_task", "review", "chat", "other")
+LLM_CALL_TYPES = ("chat", "chat_json")
+TELEGRAM_METHODS = (
+    "sendMessage",
+    "sendDocument",
+    "answerCallbackQuery",
+    "setWebhook",
+    "deleteWebhook",
+    "getWebhookInfo",
+)
+EMBEDDING_SOURCES = ("chat_log", "task", "document")
+RETRIEVERS = ("vector", "lexical", "hybrid")
+
+# ---------------------------------------------------------------------------
+# Metric families
+# ---------------------------------------------------------------------------
+
+WEBHOOK_LATENCY = Histogram(
+    "lazy_tasks_webhook_latency_seconds",
+    "End-to-end webhook handling time by routing tier.",
+    ["tier"],
+    buckets=_SLOW_BUCKETS,
+)
+COMMAND_LATENCY = Histogram(
+    "lazy_tasks_command_latency_seconds",
+    "Tier 1/2 command handling time (including the Telegram reply).",
+    ["command"],
+    buckets=_FAST_BUCKETS,
+)
+INTENT_TOTAL = Counter(
+    "lazy_tasks_intent_total",
+    "Tier 3 messages by classified intent.",
+    ["intent"],
+)
+INTENT_LATENCY = Histogram(
+    "lazy_tasks_intent_latency_seconds",
+    "IntentRouter handling time (classification to response) by intent.",
+    ["intent"],
+    buckets=_SLOW_BUCKETS,
+)
+LLM_LATENCY = Histogram(
+    "lazy_tasks_llm_latency_seconds",
+    "LLMService call latency by call type.",
+    ["call_type"],
+    buckets=_SLOW_BUCKETS,
+)
+LLM_ERRORS = Counter(
+    "lazy_tasks_llm_errors_total",
+    "Failed LLMService calls by call type.",
+    ["call_type"],
+)
+LLM_TOKENS = Counter(
+    "lazy_tasks_llm_tokens_total",
+    "Tokens consumed by LLMService calls.",
+    ["call_type", "kind"],
+)
+DB_QUERY_LATENCY = Histogram(
+    "lazy_tasks_db_query_latency_seconds",
+    "Service-level DB query latency by query name.",
+    ["query"],
+    buckets=_FAST_BUCKETS,
+)
+DB_QUERY_ERRORS = Counter(
+    "lazy_tasks_db_query_errors_total",
+    "Failed service-level DB queries by query name.",
+    ["query"],
+)
+DB_STATEMENTS_PER_UPDATE = Histogram(
+    "lazy_tasks_db_statements_per_update",
+    "SQL statements executed per webhook update by routing tier.",
+    ["tier"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55),
+)
+TELEGRAM_LATENCY = Histogram(
+    "lazy_tasks_telegram_latency_seconds",
+    "Telegram Bot API call latency by method.",
+    ["method"],
+    buckets=_FAST_BUCKETS,
+)
+TELEGRAM_ERRORS = Counter(
+    "lazy_tasks_telegram_errors_total",
+    "Failed Telegram Bot API calls by method.",
+    ["method"],
+)
+REMINDER_LATENESS = Histogram(
+    "lazy_tasks_reminder_lateness_seconds",
+    "Delay between a reminder's remind_at and its delivery.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+REMINDERS_SENT = Counter(
+    "lazy_tasks_reminders_sent_total",
+    "Reminders delivered.",
+)
+REMINDER_ERRORS = Counter(
+    "lazy_tasks_reminder_errors_total",
+    "Reminder deliveries that failed and will be retried.",
+)
+EMBEDDING_ROWS = Counter(
+    "lazy_tasks_embedding_rows_total",
+    "Rows ingested into the vector store by source.",
+    ["source"],
+)
+EMBEDDING_CACHE = Counter(
+    "lazy_tasks_embedding_cache_total",
+    "Embedding cache lookups by result (hit: content already embedded).",
+    ["result"],
+)
+RETRIEVAL_LATENCY = Histogram(
+    "lazy_tasks_retrieval_latency_seconds",
+    "Contextual retrieval time by retriever (hybrid: both plus fusion).",
+    ["retriever"],
+    buckets=_FAST_BUCKETS,
+)
+RETRIEVAL_CACHE = Counter(
+    "lazy_tasks_retrieval_cache_total",
+    "Retrieval query cache lookups by result.",
+    ["result"],
+)
+
+# ---------------------------------------------------------------------------
+# Preallocated label children
+# ---------------------------------------------------------------------------
+
+WEBHOOK_BY_TIER = {t: WEBHOOK_LATENCY.labels(tier=t) for t in TIERS}
+DB_STATEMENTS_BY_TIER = {t: DB_STATEMENTS_PER_UPDATE.labels(tier=t) for t in TIERS}
+COMMAND_BY_NAME = {c: COMMAND_LATENCY.labels(command=c) for c in COMMANDS}
+INTENT_COUNT_BY_NAME = {i: INTENT_TOTAL.labels(intent=i) for i in INTENTS}
+INTENT_LATENCY_BY_NAME = {i: INTENT_LATENCY.labels(intent=i) for i in INTENTS}
+LLM_LATENCY_BY_TYPE = {c: LLM_LATENCY.labels(call_type=c) for c in LLM_CALL_TYPES}
+LLM_ERRORS_BY_TYPE = {c: LLM_ERRORS.labels(call_type=c) for c in LLM_CALL_TYPES}
+LLM_PROMPT_TOKENS_BY_TYPE = {
+    c: LLM_TOKENS.labels(call_type=c, kind="prompt") for c in LLM_CALL_TYPES
+}
+LLM_COMPLETION_TOKENS_BY_TYPE = {
+    c: LLM_TOKENS.labels(call_type=c, kind="completion") for c in LLM_CALL_TYPES
+}
+TELEGRAM_LATENCY_BY_METHOD = {
+    m: TELEGRAM_LATENCY.labels(method=m) for m in TELEGRAM_METHODS
+}
+TELEGRAM_ERRORS_BY_METHOD = {
+    m: TELEGRAM_ERRORS.labels(method=m) for m in TELEGRAM_METHODS
+}
+EMBEDDING_ROWS_BY_SOURCE = {
+    s: EMBEDDING_ROWS.labels(source=s) for s in EMBEDDING_SOURCES
+}
+EMBEDDING_CACHE_HITS = EMBEDDING_CACHE.labels(result="hit")
+EMBEDDING_CACHE_MISSES = EMBEDDING_CACHE.labels(result="miss")
+RETRIEVAL_LATENCY_BY_RETRIEVER = {
+    r: RETRIEVAL_LATENCY.labels(retriever=r) for r in RETRIEVERS
+}
+RETRIEVAL_CACHE_HITS = RETRIEVAL_CACHE.labels(result="hit")
+RETRIEVAL_CACHE_MISSES = RETRIEVAL_CACHE.labels(result="miss")
+
+
+def command_histogram(text: str) -> Any:
+    """Return the preallocated command histogram child for a message.
+
+    Args:
+        text: Raw message text (e.g. ``/task 1000001``).
+
+    Returns:
+        Histogram child for the command, or the ``other`` child.
+    """
+    cmd = text.split(maxsplit=1)[0].lower() if text else ""
+    return COMMAND_BY_NAME.get(cmd, COMMAND_BY_NAME["other"])
+
+
+def intent_label(intent: str) -> str:
+    """Map a classified intent onto the bounded label set."""
+    return intent if intent in INTENT_COUNT_BY_NAME else "other"
+
+
+def observe_query(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Decorate an async service method to record its latency and errors.
+
+    The label children are resolved once when the decorator is applied.
+
+    Args:
+        name: Query label, e.g. ``TaskService.get_task_by_id``.
+
+    Returns:
+        Decorator for async callables.
+    """
+    latency = DB_QUERY_LATENCY.labels(query=name)
+    errors = DB_QUERY_ERRORS.labels(query=name)
+
+    def decorator(fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception:
+                errors.inc()
+                raise
+            finally:
+                latency.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorator
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Render all registered metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (payload, content type).
+    """
+    return generate_latest(), CONTENT_TYPE_LATEST
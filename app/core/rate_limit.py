@@ -0,0 +1,43 @@
+"""Async token-bucket rate limiter."""
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Token bucket: ``rate`` tokens per second, bursts up to ``capacity``.
+
+    Waiters are served in arrival order; ``acquire`` sleeps until enough
+    tokens have accumulated instead of failing.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        """Initialize the bucket (starts full).
+
+        Args:
+            rate: Refill rate in tokens per second.
+            capacity: Maximum burst size (defaults to ``rate``).
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until ``tokens`` are available and take them.
+
+        Args:
+            tokens: Number of tokens to take (<= capacity).
+        """
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
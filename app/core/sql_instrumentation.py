@@ -0,0 +1,174 @@
+"""SQLAlchemy instrumentation: slow-query log, per-request stats, N+1 detection.
+
+Hooks engine cursor events to time every statement. Statements slower than
+``sql_slow_query_ms`` are logged with their parameters and the app code that
+issued them. Inside ``track_queries()`` (one per webhook update) statements
+are counted and grouped by shape; a shape repeated ``sql_n_plus_one_threshold``
+times is reported as a likely N+1.
+
+``set_raise_on_lazy(True)`` (or ``SQL_RAISE_ON_LAZY=true``) adds
+``raiseload("*")`` to every ORM SELECT so any relationship that is not loaded
+explicitly raises instead of issuing an implicit lazy load.
+"""
+
+import logging
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session, raiseload
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = str(Path(__file__).resolve().parent.parent)
+_MAX_PARAMS_LEN = 500
+
+
+@dataclass(slots=True)
+class QueryStats:
+    """Statements executed within one ``track_queries()`` block.
+
+    Attributes:
+        count: Number of statements.
+        total_ms: Total statement time in milliseconds.
+        shapes: Statement text -> execution count.
+        n_plus_one: Shapes that crossed the repeat threshold, with caller.
+    """
+
+    count: int = 0
+    total_ms: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    n_plus_one: dict[str, str] = field(default_factory=dict)
+
+
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+_raise_on_lazy = False
+
+
+def _find_caller() -> str:
+    """Locate the innermost app frame that issued the current statement.
+
+    SQLAlchemy's asyncio layer runs statements in a child greenlet, so the
+    search continues into parent greenlets' frames.
+    """
+    frame: FrameType | None = sys._getframe(2)
+    gr = getcurrent()
+    while True:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename.startswith(_APP_DIR) and filename != __file__:
+                rel = Path(filename).relative_to(Path(_APP_DIR).parent)
+                return f"{rel}:{frame.f_lineno} in {frame.f_code.co_name}"
+            frame = frame.f_back
+        gr = gr.parent
+        if gr is None:
+            return "<unknown>"
+        frame = gr.gr_frame
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, _: bool
+) -> None:
+    context._query_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, _: bool
+) -> None:
+    started = getattr(context, "_query_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    settings = get_settings()
+
+    if elapsed_ms >= settings.sql_slow_query_ms:
+        logger.warning(
+            "Slow query (%.1f ms) from %s: %s | params=%s",
+            elapsed_ms,
+            _find_caller(),
+            " ".join(statement.split()),
+            repr(parameters)[:_MAX_PARAMS_LEN],
+        )
+
+    stats = _query_stats.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.total_ms += elapsed_ms
+    stats.shapes[statement] += 1
+    if stats.shapes[statement] == settings.sql_n_plus_one_threshold:
+        stats.n_plus_one[statement] = _find_caller()
+
+
+def _apply_raise_on_lazy(state: ORMExecuteState) -> None:
+    if (
+        _raise_on_lazy
+        and state.is_select
+        and not state.is_column_load
+        and not state.is_relationship_load
+    ):
+        state.statement = state.statement.options(raiseload("*"))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach timing listeners to an engine and the ORM session hook.
+
+    Args:
+        engine: Sync engine (``AsyncEngine.sync_engine``). Idempotent.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(Session, "do_orm_execute", _apply_raise_on_lazy):
+        event.listen(Session, "do_orm_execute", _apply_raise_on_lazy)
+    set_raise_on_lazy(get_settings().sql_raise_on_lazy)
+
+
+def set_raise_on_lazy(enabled: bool) -> None:
+    """Make unloaded relationships raise instead of lazy loading.
+
+    Intended for tests and local debugging.
+
+    Args:
+        enabled: Whether to apply ``raiseload("*")`` to ORM SELECTs.
+    """
+    global _raise_on_lazy
+    _raise_on_lazy = enabled
+
+
+@contextmanager
+def track_queries(label: str) -> Iterator[QueryStats]:
+    """Count statements executed in this context and report N+1 patterns.
+
+    Args:
+        label: Name used in log messages (e.g. ``update 123``).
+
+    Yields:
+        QueryStats filled in as statements run.
+    """
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+        for statement, caller in stats.n_plus_one.items():
+            logger.warning(
+                "Possible N+1 in %s: statement ran %d times (first flagged at %s): %s",
+                label,
+                stats.shapes[statement],
+                caller,
+                " ".join(statement.split())[:_MAX_PARAMS_LEN],
+            )
@@ -0,0 +1,420 @@
+"""Lightweight request-scoped span tracing.
+
+A trace is started per webhook update and propagated through services via a
+``ContextVar``; child spans are no-ops when no sampled trace is active, so
+unsampled requests pay only a context lookup. Finished traces are handed to a
+pluggable exporter that writes on a background thread, off the event loop.
+
+Exporters:
+    - ``JsonlExporter``: one JSON object per span appended to a local file.
+    - ``OtlpHttpExporter``: OTLP/HTTP JSON ``/v1/traces`` payloads, for an
+      OpenTelemetry collector (or any stand-in that accepts the format).
+"""
+
+import abc
+import functools
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, ParamSpec, TypeVar
+
+import httpx
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_SERVICE_NAME = "lazy-tasks"
+_MAX_STATEMENT_LEN = 300
+
+
+@dataclass(slots=True)
+class Span:
+    """A timed operation within a trace.
+
+    Attributes:
+        trace_id: 32-hex-char trace identifier.
+        span_id: 16-hex-char span identifier.
+        parent_id: Parent span ID, or None for the root span.
+        name: Operation name (e.g. ``IntentRouter.classify``).
+        start_ns: Wall-clock start (epoch nanoseconds).
+        end_ns: Wall-clock end, 0 while running.
+        attributes: Extra key/value data.
+        error: Exception type name if the operation failed.
+    """
+
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start_ns: int
+    end_ns: int = 0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration in milliseconds."""
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize for the JSONL exporter."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+@dataclass(slots=True)
+class _Trace:
+    """Spans collected for one root operation before export."""
+
+    spans: list[Span] = field(default_factory=list)
+    sampled: bool = True
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_current_trace: ContextVar[_Trace | None] = ContextVar("current_trace", default=None)
+
+
+def _new_id(bits: int) -> str:
+    """Random hex identifier of ``bits`` bits."""
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+# ---------------------------------------------------------------------------
+# Exporters
+# ---------------------------------------------------------------------------
+
+
+class SpanExporter(abc.ABC):
+    """Base exporter: queues finished traces and exports them on a thread."""
+
+    def __init__(self) -> None:
+        """Start the background export thread."""
+        self._queue: queue.SimpleQueue[list[Span] | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"{type(self).__name__}-worker",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def submit(self, spans: list[Span]) -> None:
+        """Queue a finished trace for export (non-blocking)."""
+        self._queue.put(spans)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued traces and stop the worker thread."""
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                break
+            try:
+                self.export(spans)
+            except Exception:
+                logger.exception("Span export failed")
+
+    @abc.abstractmethod
+    def export(self, spans: list[Span]) -> None:
+        """Export one trace's spans. Runs on the worker thread."""
+
+
+class JsonlExporter(SpanExporter):
+    """Append spans as JSON lines to a local file."""
+
+    def __init__(self, path: str | Path) -> None:
+        """Initialize exporter.
+
+        Args:
+            path: Output file; parent directories are created if needed.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__()
+
+    def export(self, spans: list[Span]) -> None:
+        """Append spans to the JSONL file."""
+        lines = "".join(
+            json.dumps(s.to_dict(), ensure_ascii=False, default=str) + "\n"
+            for s in spans
+        )
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class OtlpHttpExporter(SpanExporter):
+    """Send spans to an OTLP/HTTP collector using the JSON encoding."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0) -> None:
+        """Initialize exporter.
+
+        Args:
+            endpoint: Collector base URL (``/v1/traces`` is appended).
+            timeout: Request timeout in seconds.
+        """
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self._client = httpx.Client(timeout=timeout)
+        super().__init__()
+
+    def export(self, spans: list[Span]) -> None:
+        """POST spans as an OTLP ``ExportTraceServiceRequest``."""
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": _SERVICE_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [self._to_otlp(s) for s in spans],
+                        }
+                    ],
+                }
+            ]
+        }
+        self._client.post(self.url, json=payload).raise_for_status()
+
+    @staticmethod
+    def _to_otlp(span: Span) -> dict[str, Any]:
+        otlp: dict[str, Any] = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [
+                {"key": k, "value": {"stringValue": str(v)}}
+                for k, v in span.attributes.items()
+            ],
+            "status": {"code": 2, "message": span.error} if span.error else {},
+        }
+        if span.parent_id:
+            otlp["parentSpanId"] = span.parent_id
+        return otlp
+
+
+# ---------------------------------------------------------------------------
+# Tracer
+# ---------------------------------------------------------------------------
+
+
+class Tracer:
+    """Creates spans and hands finished traces to an exporter.
+
+    Args:
+        exporter: Destination for finished traces (None disables tracing).
+        sample_rate: Fraction of traces to record (head sampling).
+        slow_threshold_ms: If > 0, every trace is recorded and traces slower
+            than this are exported even when not sampled (tail sampling).
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter | None,
+        sample_rate: float = 0.1,
+        slow_threshold_ms: float = 0.0,
+    ) -> None:
+        """Initialize tracer."""
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+
+    @contextmanager
+    def start_trace(self, name: str, **attributes: Any) -> Iterator[Span | None]:
+        """Start a root span for a new trace (e.g. one webhook update).
+
+        Yields:
+            The root span, or None if the trace is not recorded.
+        """
+        if self.exporter is None:
+            yield None
+            return
+
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_threshold_ms <= 0:
+            yield None
+            return
+
+        trace = _Trace(sampled=sampled)
+        root = Span(
+            trace_id=_new_id(128),
+            span_id=_new_id(64),
+            parent_id=None,
+            name=name,
+            start_ns=time.time_ns(),
+            attributes=attributes,
+        )
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            yield root
+        except BaseException as e:
+            root.error = type(e).__name__
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            _current_span.reset(span_token)
+            _current_trace.reset(trace_token)
+            trace.spans.append(root)
+            if trace.sampled or root.duration_ms >= self.slow_threshold_ms:
+                self.exporter.submit(trace.spans)
+
+    def shutdown(self) -> None:
+        """Flush and stop the exporter."""
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Open a child span of the current span; no-op outside a recorded trace.
+
+    Args:
+        name: Operation name.
+        **attributes: Extra span attributes.
+
+    Yields:
+        The span, or None when not tracing.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(
+        trace_id=parent.trace_id,
+        span_id=_new_id(64),
+        parent_id=parent.span_id,
+        name=name,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(child)
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    """Decorate an async function to run inside a child span.
+
+    Args:
+        name: Span name, e.g. ``TaskService.get_task_by_id``.
+
+    Returns:
+        Decorator for async callables.
+    """
+
+    def decorator(fn: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(fn)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if _current_span.get() is None:
+                return await fn(*args, **kwargs)
+            with span(name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# SQL statement spans
+# ---------------------------------------------------------------------------
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, _: bool
+) -> None:
+    parent = _current_span.get()
+    if parent is None:
+        return
+    context._trace_span = Span(
+        trace_id=parent.trace_id,
+        span_id=_new_id(64),
+        parent_id=parent.span_id,
+        name="sql",
+        start_ns=time.time_ns(),
+        attributes={"db.statement": statement[:_MAX_STATEMENT_LEN]},
+    )
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, _: bool
+) -> None:
+    sql_span: Span | None = getattr(context, "_trace_span", None)
+    if sql_span is None:
+        return
+    sql_span.end_ns = time.time_ns()
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(sql_span)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record a span per SQL statement executed inside a trace.
+
+    Args:
+        engine: Sync engine (``AsyncEngine.sync_engine``). Idempotent.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@lru_cache
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer configured from settings."""
+    settings = get_settings()
+    exporter: SpanExporter | None = None
+    if settings.trace_exporter == "jsonl":
+        exporter = JsonlExporter(settings.trace_file)
+    elif settings.trace_exporter == "otlp":
+        exporter = OtlpHttpExporter(settings.trace_otlp_endpoint)
+    return Tracer(
+        exporter,
+        sample_rate=settings.trace_sample_rate,
+        slow_threshold_ms=settings.trace_slow_threshold_ms,
+    )
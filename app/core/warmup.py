@@ -0,0 +1,130 @@
+"""Startup warmup and readiness tracking.
+
+Warmup steps run concurrently during the lifespan startup; ``/ready`` reports
+ready only once they have finished, while ``/health`` stays a cheap liveness
+check. Failures of optional steps (e.g. preconnects) are recorded and
+surface as ``degraded``; a failed required step keeps the process unready.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app import IMPORT_STARTED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Readiness:
+    """Process readiness state exposed by ``/ready``.
+
+    Attributes:
+        ready: True once warmup has finished.
+        import_ms: Time spent importing the application modules.
+        warmup_ms: Wall time of the warmup phase.
+        time_to_ready_ms: Import start to warmup end.
+        steps: Per-step duration in milliseconds.
+        errors: Per-step error message for failed steps.
+        required: Steps that must succeed for the process to be ready.
+    """
+
+    ready: bool = False
+    import_ms: float = 0.0
+    warmup_ms: float = 0.0
+    time_to_ready_ms: float = 0.0
+    steps: dict[str, float] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    required: set[str] = field(default_factory=set)
+
+    @property
+    def is_ready(self) -> bool:
+        """Warmup finished and every required step succeeded."""
+        return self.ready and not (self.required & self.errors.keys())
+
+    def to_dict(self) -> dict[str, Any]:
+        """Serialize for the ``/ready`` endpoint."""
+        if not self.ready:
+            status = "starting"
+        elif not self.is_ready:
+            status = "failed"
+        elif self.errors:
+            status = "degraded"
+        else:
+            status = "ready"
+        return {
+            "status": status,
+            "import_ms": round(self.import_ms, 1),
+            "warmup_ms": round(self.warmup_ms, 1),
+            "time_to_ready_ms": round(self.time_to_ready_ms, 1),
+            "steps": {k: round(v, 1) for k, v in self.steps.items()},
+            "errors": self.errors,
+        }
+
+
+readiness = Readiness()
+
+
+def mark_imported() -> None:
+    """Record the end of the import phase."""
+    readiness.import_ms = (time.perf_counter() - IMPORT_STARTED) * 1000
+
+
+async def prefill_pool(engine: AsyncEngine, connections: int) -> None:
+    """Open ``connections`` pooled DB connections concurrently.
+
+    Args:
+        engine: Async engine whose pool should be warmed.
+        connections: Number of connections to open (<= pool size).
+    """
+
+    async def _touch() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_touch() for _ in range(connections)))
+
+
+async def run_warmup(
+    steps: Mapping[str, Callable[[], Awaitable[Any]]],
+    required: set[str],
+) -> Readiness:
+    """Run warmup steps concurrently and mark warmup finished.
+
+    Args:
+        steps: Step name -> zero-arg coroutine function.
+        required: Step names whose failure keeps the process unready.
+
+    Returns:
+        The updated readiness state.
+    """
+    started = time.perf_counter()
+    readiness.required = required
+
+    async def _run(name: str, step: Callable[[], Awaitable[Any]]) -> None:
+        step_started = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            readiness.errors[name] = f"{type(e).__name__}: {e}"
+            logger.warning(f"Warmup step '{name}' failed: {e}")
+        finally:
+            readiness.steps[name] = (time.perf_counter() - step_started) * 1000
+
+    await asyncio.gather(*(_run(name, step) for name, step in steps.items()))
+
+    now = time.perf_counter()
+    readiness.warmup_ms = (now - started) * 1000
+    readiness.time_to_ready_ms = (now - IMPORT_STARTED) * 1000
+    readiness.ready = True
+    logger.info(
+        f"Ready in {readiness.time_to_ready_ms:.0f} ms "
+        f"(import {readiness.import_ms:.0f} ms, warmup {readiness.warmup_ms:.0f} ms)"
+    )
+    return readiness
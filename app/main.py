@@ -1,5 +1,6 @@
 """Lazy Tasks - Personal AI Executive Assistant main application."""
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
@@ -7,9 +8,18 @@ from typing import AsyncGenerator
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import health, telegram
+from app.api.deps import get_llm_service, get_prompt_manager
+from app.api.routes import export, health, metrics, telegram
+from app.core import sql_instrumentation, warmup
 from app.core.config import get_settings
-from app.core.database import Base, engine
+from app.core.database import AsyncSessionLocal, Base, get_engine
+from app.core.tracing import get_tracer, instrument_engine
+from app.services.retrieval_service import get_retrieval_service
+from app.services.task_service import TaskService
+from app.services.telegram_service import TelegramService, close_http_client
+from app.workers.chat_retention import ensure_chat_partitions
+from app.workers.reminders import ReminderScheduler
+from app.workers.scheduler import create_scheduler
 
 # Configure logging
 logging.basicConfig(
@@ -18,34 +28,111 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-settings = get_settings()
+
+async def _warm_database() -> None:
+    """Ensure tables (if enabled), chat_logs partitions; prefill the pool."""
+    settings = get_settings()
+    create_tables = settings.db_create_tables
+    if create_tables is None:
+        create_tables = settings.is_development
+    if create_tables:
+        # Import all models so Base.metadata knows about them
+        from app import models  # noqa: F401
+
+        async with get_engine().begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        logger.info("Database tables ensured")
+    if settings.telegram_owner_chat_id:
+        # Rows from before per-chat ownership belong to the deployment owner
+        async with AsyncSessionLocal() as session, session.begin():
+            await TaskService(session, settings.telegram_owner_chat_id).claim_unowned()
+    try:
+        await ensure_chat_partitions()
+    except Exception as e:
+        # e.g. a chat_logs created before partitioning: apply scripts/init.sql
+        logger.warning(f"chat_logs partitions not ensured: {e}")
+    await warmup.prefill_pool(get_engine(), settings.db_pool_size)
+
+
+async def _warm_prompts() -> None:
+    """Load and compile all prompts off the event loop."""
+    await asyncio.to_thread(get_prompt_manager().preload)
+
+
+async def _warm_llm() -> None:
+    """Build the LLM clients off the event loop and preconnect to the host."""
+    llm = await asyncio.to_thread(get_llm_service)
+    await llm.preconnect()
+
+
+async def _warm_retrieval() -> None:
+    """Create the vector collection and load/create the lexical index."""
+    await get_retrieval_service().warm()
+
+
+async def _warm_telegram() -> None:
+    """Preconnect to the Telegram Bot API host."""
+    await TelegramService().preconnect()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    """Application lifespan handler for startup and shutdown events."""
+    """Application lifespan handler for startup and shutdown events.
+
+    Warmup runs in the background so the server starts accepting requests
+    (and answering ``/health``) immediately; ``/ready`` flips once it is done.
+    """
     # Startup
+    settings = get_settings()
     logger.info("Starting Lazy Tasks application...")
     logger.info(f"Environment: {settings.app_env}")
 
-    # Import all models so Base.metadata knows about them
-    import app.models.chat  # noqa: F401
-    import app.models.task  # noqa: F401
+    engine = get_engine()
+    instrument_engine(engine.sync_engine)
+    sql_instrumentation.instrument_engine(engine.sync_engine)
+
+    warmup_steps = {
+        "database": _warm_database,
+        "prompts": _warm_prompts,
+        "llm": _warm_llm,
+        "telegram": _warm_telegram,
+    }
+    if settings.retrieval_enabled:
+        warmup_steps["retrieval"] = _warm_retrieval
+    warmup_task = asyncio.create_task(
+        warmup.run_warmup(warmup_steps, required={"database", "prompts"})
+    )
+
+    prompt_watcher = None
+    if settings.prompt_reload_interval_s > 0:
+        prompt_watcher = asyncio.create_task(
+            get_prompt_manager().watch(settings.prompt_reload_interval_s)
+        )
 
-    # Create tables if they don't exist
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables ensured")
+    reminder_scheduler = None
+    if settings.reminders_enabled and settings.telegram_owner_chat_id:
+        reminder_scheduler = ReminderScheduler(settings.telegram_owner_chat_id)
+        reminder_scheduler.start()
 
-    # TODO: Initialize services here
-    # - Qdrant collection
-    # - Elasticsearch index
-    # - APScheduler for background tasks
+    scheduler = create_scheduler()
+    scheduler.start()
 
     yield
 
     # Shutdown
     logger.info("Shutting down Lazy Tasks application...")
+    warmup_task.cancel()
+    if prompt_watcher is not None:
+        prompt_watcher.cancel()
+    if reminder_scheduler is not None:
+        await reminder_scheduler.stop()
+    scheduler.shutdown(wait=False)
+    if get_llm_service.cache_info().currsize:
+        await get_llm_service().aclose()
+    if get_retrieval_service.cache_info().currsize:
+        await get_retrieval_service().close()
+    await close_http_client()
+    get_tracer().shutdown()
 
 
 # Create FastAPI application
@@ -59,15 +146,19 @@ app = FastAPI(
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"] if settings.is_development else [],
+    allow_origins=["*"] if get_settings().is_development else [],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+warmup.mark_imported()
+
 # Include routers
 app.include_router(health.router)
+app.include_router(metrics.router)
 app.include_router(telegram.router)
+app.include_router(export.router)
 
 
 if __name__ == "__main__":
@@ -77,5 +168,5 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=settings.is_development,
+        reload=get_settings().is_development,
     )
@@ -1,6 +1,20 @@
 """SQLAlchemy ORM models."""
 
-from app.models.chat import ChatLog
-from app.models.task import Project, Reminder, Task
+from app.models.calendar import CalendarEvent
+from app.models.chat import ChatDailyRollup, ChatLog
+from app.models.document import Document, EmbeddingCache
+from app.models.task import Project, Reminder, TagCount, Task
+from app.models.user_state import UserState
 
-__all__ = ["ChatLog", "Project", "Reminder", "Task"]
+__all__ = [
+    "CalendarEvent",
+    "ChatDailyRollup",
+    "ChatLog",
+    "Document",
+    "EmbeddingCache",
+    "Project",
+    "Reminder",
+    "TagCount",
+    "Task",
+    "UserState",
+]
@@ -0,0 +1,73 @@
+"""Calendar event model."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Computed, DateTime, Index, String, Text
+from sqlalchemy.dialects.postgresql import TSTZRANGE, Range
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+# Generated ``calendar_events.during`` (see scripts/init.sql): events without
+# a positive duration become a single instant, so they still overlap
+DURING_EXPRESSION = (
+    "CASE WHEN end_time > start_time THEN tstzrange(start_time, end_time) "
+    "ELSE tstzrange(start_time, start_time, '[]') END"
+)
+
+
+class CalendarEvent(Base):
+    """Meeting or appointment, entered manually or imported from a calendar."""
+
+    __tablename__ = "calendar_events"
+    # Declared here too so create_all (development) builds them: imports
+    # upsert ON CONFLICT (source, external_id), overlap queries use ``during``
+    __table_args__ = (
+        Index("idx_calendar_events_external", "source", "external_id", unique=True),
+        Index("idx_calendar_events_during", "during", postgresql_using="gist"),
+    )
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+    title: Mapped[str] = mapped_column(
+        String(255),
+        nullable=False,
+    )
+    start_time: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+    )
+    end_time: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    location: Mapped[str | None] = mapped_column(
+        Text,
+        nullable=True,
+    )
+    source: Mapped[str] = mapped_column(
+        String(50),
+        default="manual",
+        nullable=False,
+    )  # manual, ics, google_calendar, ...
+    external_id: Mapped[str | None] = mapped_column(
+        String(255),
+        nullable=True,
+    )  # UID in the source calendar; unique per source (import upserts)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False,
+    )
+    during: Mapped[Range[datetime] | None] = mapped_column(
+        TSTZRANGE,
+        Computed(DURING_EXPRESSION, persisted=True),
+        deferred=True,
+    )  # Only used in WHERE (GiST index); never loaded with the row
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<CalendarEvent(id={self.id}, title={self.title})>"
@@ -1,9 +1,9 @@
 """Chat log model for conversation persistence."""
 
-from datetime import datetime
+from datetime import date, datetime
 from typing import Any
 
-from sqlalchemy import BigInteger, DateTime, Float, String, Text
+from sqlalchemy import BigInteger, Date, DateTime, Float, Integer, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -11,9 +11,14 @@ from app.core.database import Base
 
 
 class ChatLog(Base):
-    """Chat log entry for RAG and reflection analysis."""
+    """Chat log entry for RAG and reflection analysis.
+
+    Range-partitioned by month on ``created_at`` (see scripts/init.sql and
+    ``app.services.chat_partitions``); the primary key includes it.
+    """
 
     __tablename__ = "chat_logs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (created_at)"}
 
     id: Mapped[int] = mapped_column(
         BigInteger,
@@ -53,10 +58,76 @@ class ChatLog(Base):
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
+        primary_key=True,
         default=datetime.utcnow,
         nullable=False,
-    )
+    )  # Partition key
 
     def __repr__(self) -> str:
         """String representation."""
         return f"<ChatLog(id={self.id}, role={self.role}, session={self.session_id})>"
+
+
+class ChatDailyRollup(Base):
+    """Per-session, per-day chat aggregates maintained by the reflection worker."""
+
+    __tablename__ = "chat_daily_rollups"
+
+    session_id: Mapped[str] = mapped_column(
+        String(100),
+        primary_key=True,
+    )
+    day: Mapped[date] = mapped_column(
+        Date,
+        primary_key=True,
+    )  # in the user's timezone
+    telegram_chat_id: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+    user_messages: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    assistant_messages: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    sentiment_sum: Mapped[float] = mapped_column(
+        Float,
+        default=0.0,
+        nullable=False,
+    )
+    sentiment_min: Mapped[float | None] = mapped_column(
+        Float,
+        nullable=True,
+    )
+    intent_counts: Mapped[dict[str, int]] = mapped_column(
+        JSONB,
+        default=dict,
+        nullable=False,
+    )
+    late_night_messages: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )  # user messages sent 23:00-05:00 (burnout signal)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    @property
+    def sentiment_avg(self) -> float | None:
+        """Mean sentiment of the day's user messages."""
+        if not self.user_messages:
+            return None
+        return self.sentiment_sum / self.user_messages
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<ChatDailyRollup(session={self.session_id}, day={self.day})>"
@@ -0,0 +1,81 @@
+"""Document and embedding cache models for RAG."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, LargeBinary, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class Document(Base):
+    """Document ingested for retrieval (notes, uploaded files)."""
+
+    __tablename__ = "documents"
+
+    id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=True,
+    )
+    title: Mapped[str | None] = mapped_column(
+        String(255),
+        nullable=True,
+    )
+    content: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+    )
+    source: Mapped[str | None] = mapped_column(
+        String(100),
+        nullable=True,
+    )  # telegram, file_upload, note
+    file_path: Mapped[str | None] = mapped_column(
+        String(500),
+        nullable=True,
+    )
+    embedding_id: Mapped[str | None] = mapped_column(
+        String(100),
+        nullable=True,
+    )  # vector store point ID of the first chunk
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<Document(id={self.id}, title={self.title})>"
+
+
+class EmbeddingCache(Base):
+    """Embedding vectors keyed by model and content hash.
+
+    Identical text is embedded once per model, however many rows carry it
+    and however often those rows are re-ingested.
+    """
+
+    __tablename__ = "embedding_cache"
+
+    model: Mapped[str] = mapped_column(
+        String(100),
+        primary_key=True,
+    )
+    content_hash: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+    )  # sha256 hex of the embedded text
+    vector: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        nullable=False,
+    )  # float32 little-endian
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<EmbeddingCache(model={self.model}, hash={self.content_hash[:12]})>"
@@ -2,12 +2,25 @@
 
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Integer,
+    String,
+    Text,
+    event,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, TSVECTOR
+from sqlalchemy.orm import Mapped, WriteOnlyMapped, mapped_column, relationship
 
 from app.core.database import Base
 
+# Text search configuration of ``tasks.search_vector`` (see scripts/init.sql)
+SEARCH_CONFIG = "vietnamese_unaccent"
+
 
 class Project(Base):
     """Project for grouping tasks."""
@@ -19,6 +32,11 @@ class Project(Base):
         primary_key=True,
         autoincrement=True,
     )
+    owner_chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+    )  # Owning Telegram chat; 0: unclaimed (created before ownership)
     name: Mapped[str] = mapped_column(
         String(255),
         nullable=False,
@@ -38,11 +56,12 @@ class Project(Base):
         nullable=False,
     )
 
-    # Relationships
-    tasks: Mapped[list["Task"]] = relationship(
+    # Relationships (write-only: loading a project never loads its tasks;
+    # aggregate them in SQL, see TaskService.get_project_stats)
+    tasks: WriteOnlyMapped["Task"] = relationship(
         "Task",
         back_populates="project",
-        lazy="selectin",
+        lazy="write_only",
     )
 
     def __repr__(self) -> str:
@@ -60,6 +79,11 @@ class Task(Base):
         primary_key=True,
         autoincrement=True,
     )
+    owner_chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+    )  # Owning Telegram chat; 0: unclaimed (created before ownership)
     content: Mapped[str] = mapped_column(
         Text,
         nullable=False,
@@ -96,6 +120,16 @@ class Task(Base):
         ForeignKey("tasks.id"),
         nullable=True,
     )
+    subtask_total: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )  # Descendants not cancelled; maintained by triggers (scripts/init.sql)
+    subtask_done: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )  # Descendants done; maintained by triggers
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=datetime.utcnow,
@@ -107,6 +141,11 @@ class Task(Base):
         onupdate=datetime.utcnow,
         nullable=False,
     )
+    search_vector: Mapped[str | None] = mapped_column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, content)", persisted=True),
+        deferred=True,
+    )  # Only used in WHERE/ORDER BY; never loaded with the row
 
     # Relationships
     project: Mapped[Project | None] = relationship(
@@ -133,6 +172,173 @@ class Task(Base):
         return f"<Task(id={self.id}, status={self.status})>"
 
 
+# create_all (development) needs the configuration before the generated column
+# (one statement per DDL: asyncpg prepares each statement)
+for _statement in (
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = '{SEARCH_CONFIG}')
+        THEN
+            CREATE TEXT SEARCH CONFIGURATION {SEARCH_CONFIG} (COPY = simple);
+            ALTER TEXT SEARCH CONFIGURATION {SEARCH_CONFIG}
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+        END IF;
+    END
+    $$
+    """,
+    # Trigram matching of task references (TaskService.match_active)
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION fold_text(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+    """,
+):
+    event.listen(
+        Task.__table__,
+        "before_create",
+        DDL(_statement).execute_if(dialect="postgresql"),  # type: ignore[no-untyped-call]
+    )
+
+# Triggers maintaining tag_counts and the subtask rollups, as in
+# scripts/init.sql; without them /tags stays empty and rollups never change
+for _statement in (
+    """
+    CREATE OR REPLACE FUNCTION maintain_tag_counts() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.tags IS NOT NULL THEN
+            UPDATE tag_counts
+            SET task_count = task_count - 1,
+                active_count = active_count
+                    - (OLD.status IN ('todo', 'in_progress'))::int
+            WHERE owner_chat_id = OLD.owner_chat_id
+              AND tag IN (SELECT DISTINCT unnest(OLD.tags));
+            DELETE FROM tag_counts
+            WHERE owner_chat_id = OLD.owner_chat_id
+              AND tag = ANY(OLD.tags) AND task_count <= 0;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.tags IS NOT NULL THEN
+            INSERT INTO tag_counts AS c (owner_chat_id, tag, task_count, active_count)
+            SELECT DISTINCT NEW.owner_chat_id, t, 1,
+                   (NEW.status IN ('todo', 'in_progress'))::int
+            FROM unnest(NEW.tags) AS t
+            ON CONFLICT (owner_chat_id, tag) DO UPDATE
+            SET task_count = c.task_count + 1,
+                active_count = c.active_count + EXCLUDED.active_count;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tag_counts_insert_delete
+        AFTER INSERT OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION maintain_tag_counts()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER tag_counts_update
+        AFTER UPDATE OF tags, status, owner_chat_id ON tasks
+        FOR EACH ROW
+        WHEN (OLD.tags IS DISTINCT FROM NEW.tags
+              OR OLD.status IS DISTINCT FROM NEW.status
+              OR OLD.owner_chat_id IS DISTINCT FROM NEW.owner_chat_id)
+        EXECUTE FUNCTION maintain_tag_counts()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION bump_subtask_rollups(
+        start_id BIGINT, d_total INTEGER, d_done INTEGER
+    ) RETURNS void AS $$
+        WITH RECURSIVE ancestors AS (
+            SELECT id, parent_task_id, 1 AS depth FROM tasks WHERE id = start_id
+            UNION ALL
+            SELECT t.id, t.parent_task_id, a.depth + 1
+            FROM tasks t JOIN ancestors a ON t.id = a.parent_task_id
+            WHERE a.depth < 100
+        )
+        UPDATE tasks
+        SET subtask_total = subtask_total + d_total,
+            subtask_done = subtask_done + d_done
+        WHERE id IN (SELECT id FROM ancestors)
+          AND (d_total <> 0 OR d_done <> 0);
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE OR REPLACE FUNCTION maintain_subtask_rollups() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.parent_task_id IS NOT NULL THEN
+            PERFORM bump_subtask_rollups(
+                OLD.parent_task_id,
+                -((OLD.status <> 'cancelled')::int + OLD.subtask_total),
+                -((OLD.status = 'done')::int + OLD.subtask_done)
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.parent_task_id IS NOT NULL THEN
+            PERFORM bump_subtask_rollups(
+                NEW.parent_task_id,
+                (NEW.status <> 'cancelled')::int + NEW.subtask_total,
+                (NEW.status = 'done')::int + NEW.subtask_done
+            );
+        END IF;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER subtask_rollups_insert_delete
+        AFTER INSERT OR DELETE ON tasks
+        FOR EACH ROW EXECUTE FUNCTION maintain_subtask_rollups()
+    """,
+    """
+    CREATE OR REPLACE TRIGGER subtask_rollups_update
+        AFTER UPDATE OF status, parent_task_id ON tasks
+        FOR EACH ROW
+        WHEN (OLD.status IS DISTINCT FROM NEW.status
+              OR OLD.parent_task_id IS DISTINCT FROM NEW.parent_task_id)
+        EXECUTE FUNCTION maintain_subtask_rollups()
+    """,
+):
+    event.listen(
+        Task.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),  # type: ignore[no-untyped-call]
+    )
+
+
+class TagCount(Base):
+    """Number of tasks per owner and tag.
+
+    Maintained by triggers on ``tasks`` (see scripts/init.sql), so it is
+    read-only for the application.
+    """
+
+    __tablename__ = "tag_counts"
+
+    owner_chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+    )
+    tag: Mapped[str] = mapped_column(
+        Text,
+        primary_key=True,
+    )
+    task_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )
+    active_count: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        nullable=False,
+    )  # todo + in_progress
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<TagCount(tag={self.tag}, active={self.active_count})>"
+
+
 class Reminder(Base):
     """Reminder linked to a task."""
 
@@ -143,6 +349,11 @@ class Reminder(Base):
         primary_key=True,
         autoincrement=True,
     )
+    owner_chat_id: Mapped[int] = mapped_column(
+        BigInteger,
+        default=0,
+        nullable=False,
+    )  # Chat the reminder is sent to; 0: unclaimed
     task_id: Mapped[int] = mapped_column(
         BigInteger,
         ForeignKey("tasks.id", ondelete="CASCADE"),
@@ -175,3 +386,34 @@ class Reminder(Base):
     def __repr__(self) -> str:
         """String representation."""
         return f"<Reminder(id={self.id}, remind_at={self.remind_at})>"
+
+
+# NOTIFY trigger of the reminder scheduler (app/workers/reminders.py), as in
+# scripts/init.sql; without it new reminders wait for the periodic refill
+for _statement in (
+    """
+    CREATE OR REPLACE FUNCTION notify_reminders_changed() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            PERFORM pg_notify('reminders_changed',
+                json_build_object('op', TG_OP, 'id', OLD.id)::text);
+            RETURN OLD;
+        END IF;
+        PERFORM pg_notify('reminders_changed',
+            json_build_object('op', TG_OP, 'id', NEW.id, 'remind_at', NEW.remind_at,
+                              'is_sent', NEW.is_sent)::text);
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE OR REPLACE TRIGGER reminders_changed
+        AFTER INSERT OR UPDATE OR DELETE ON reminders
+        FOR EACH ROW EXECUTE FUNCTION notify_reminders_changed()
+    """,
+):
+    event.listen(
+        Reminder.__table__,
+        "after_create",
+        DDL(_statement).execute_if(dialect="postgresql"),  # type: ignore[no-untyped-call]
+    )
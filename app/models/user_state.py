@@ -0,0 +1,40 @@
+"""User state model (key-value store)."""
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, Float, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class UserState(Base):
+    """Inferred user state and job watermarks, keyed by name."""
+
+    __tablename__ = "user_state"
+
+    key: Mapped[str] = mapped_column(
+        String(100),
+        primary_key=True,
+    )  # current_focus, status, energy_level, briefing_sent:<chat_id>, ...
+    value: Mapped[Any] = mapped_column(
+        JSONB,
+        nullable=False,
+    )
+    confidence: Mapped[float] = mapped_column(
+        Float,
+        default=1.0,
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        """String representation."""
+        return f"<UserState(key={self.key})>"
@@ -0,0 +1,250 @@
+"""Calendar service: events, overlaps and free slots.
+
+Overlap queries run on the generated ``calendar_events.during`` range and
+its GiST index (scripts/init.sql). Free slots are computed in the database
+as multirange arithmetic (PostgreSQL 14+): the working-hour ranges of the
+window minus ``range_agg`` of the events overlapping it, so finding a free
+hour this week is one indexed query however busy the calendar is.
+"""
+
+import hashlib
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import DateTime, delete, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, TSTZMULTIRANGE, TSTZRANGE, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
+
+from app.core.metrics import observe_query
+from app.core.tracing import traced
+from app.models.calendar import CalendarEvent
+from app.services.ics_parser import IcsEvent
+
+logger = logging.getLogger(__name__)
+
+# Column limits of calendar_events
+_TITLE_MAX = 255
+_EXTERNAL_ID_MAX = 255
+
+
+@dataclass(slots=True)
+class FreeSlot:
+    """A gap between events within working hours."""
+
+    start: datetime
+    end: datetime
+
+    @property
+    def duration(self) -> timedelta:
+        """Length of the gap."""
+        return self.end - self.start
+
+
+def external_id(event: IcsEvent) -> str:
+    """Stable key of an imported event within its source.
+
+    The UID, qualified by RECURRENCE-ID for overridden occurrences (they
+    share the series UID); events without a UID fall back to start + title.
+    Keys longer than the column are hashed.
+    """
+    key = event.uid or f"{event.start.isoformat()}|{event.title}"
+    if event.recurrence_id:
+        key = f"{key}#{event.recurrence_id}"
+    if len(key) > _EXTERNAL_ID_MAX:
+        key = hashlib.sha1(key.encode()).hexdigest()
+    return key
+
+
+def work_windows(
+    start: datetime,
+    end: datetime,
+    tz: ZoneInfo,
+    start_hour: int,
+    end_hour: int,
+    weekdays_only: bool = True,
+) -> list[tuple[datetime, datetime]]:
+    """Working-hour ranges of each day in ``[start, end)``, clipped to it.
+
+    Args:
+        start: Window start (timezone-aware).
+        end: Window end (timezone-aware).
+        tz: Zone whose wall-clock hours count as working hours.
+        start_hour: Start of the working day (local hour).
+        end_hour: End of the working day (local hour).
+        weekdays_only: Skip Saturdays and Sundays.
+
+    Returns:
+        Non-empty ``(start, end)`` ranges in order.
+    """
+    windows: list[tuple[datetime, datetime]] = []
+    day: date = start.astimezone(tz).date()
+    last: date = end.astimezone(tz).date()
+    while day <= last:
+        if not weekdays_only or day.weekday() < 5:
+            opens = datetime.combine(day, dt_time(start_hour), tzinfo=tz)
+            closes = datetime.combine(day, dt_time(end_hour), tzinfo=tz)
+            opens, closes = max(opens, start), min(closes, end)
+            if opens < closes:
+                windows.append((opens, closes))
+        day += timedelta(days=1)
+    return windows
+
+
+class CalendarService:
+    """Service for calendar events.
+
+    Args:
+        db: Async database session (per-request).
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Initialize calendar service with database session.
+
+        Args:
+            db: Async database session.
+        """
+        self.db = db
+
+    @traced("CalendarService.get_events")
+    @observe_query("CalendarService.get_events")
+    async def get_events(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: int = 50,
+    ) -> list[CalendarEvent]:
+        """Get events overlapping ``[start, end)``.
+
+        Also answers "what conflicts with this slot?". A GiST index scan on
+        ``during``.
+
+        Args:
+            start: Window start.
+            end: Window end.
+            limit: Maximum number of events to return.
+
+        Returns:
+            Overlapping events, earliest first.
+        """
+        stmt = (
+            select(CalendarEvent)
+            .where(CalendarEvent.during.overlaps(func.tstzrange(start, end)))
+            .order_by(CalendarEvent.start_time.asc(), CalendarEvent.id.asc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("CalendarService.find_free_slots")
+    @observe_query("CalendarService.find_free_slots")
+    async def find_free_slots(
+        self,
+        windows: list[tuple[datetime, datetime]],
+        duration: timedelta,
+        limit: int = 5,
+    ) -> list[FreeSlot]:
+        """Find gaps of at least ``duration`` between events.
+
+        One query: ``range_agg`` of the windows minus ``range_agg`` of the
+        events overlapping them (GiST scan), unnested into gaps.
+
+        Args:
+            windows: Ranges to search, e.g. from ``work_windows``.
+            duration: Minimum gap length.
+            limit: Maximum number of slots to return.
+
+        Returns:
+            Free slots, earliest first (whole gaps, not cut to ``duration``).
+        """
+        if not windows:
+            return []
+        timestamps = ARRAY(DateTime(timezone=True))
+        bounds = func.unnest(
+            literal([s for s, _ in windows], timestamps),
+            literal([e for _, e in windows], timestamps),
+        ).table_valued("s", "e")
+        open_ranges = (
+            select(func.range_agg(func.tstzrange(bounds.c.s, bounds.c.e)))
+            .select_from(bounds)
+            .scalar_subquery()
+        )
+        span = func.tstzrange(windows[0][0], windows[-1][1])
+        busy = (
+            select(func.range_agg(CalendarEvent.during, type_=TSTZMULTIRANGE))
+            .where(CalendarEvent.during.overlaps(span))
+            .scalar_subquery()
+        )
+        free = open_ranges.op("-", return_type=TSTZMULTIRANGE)(
+            func.coalesce(busy, literal_column("'{}'::tstzmultirange"))
+        )
+        slot = func.unnest(free, type_=TSTZRANGE).column_valued("slot")
+        stmt = (
+            select(func.lower(slot), func.upper(slot))
+            .where(func.upper(slot) - func.lower(slot) >= duration)
+            .order_by(func.lower(slot))
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return [FreeSlot(start, end) for start, end in result.tuples()]
+
+    @traced("CalendarService.upsert_events")
+    @observe_query("CalendarService.upsert_events")
+    async def upsert_events(self, events: Iterable[IcsEvent], source: str) -> int:
+        """Insert or update imported events with one statement.
+
+        Keyed on ``(source, external_id)``; within the batch the last
+        occurrence of a key wins. Cancelled events are deleted instead.
+
+        Args:
+            events: Parsed events (one batch).
+            source: Calendar source, e.g. ``"ics"``.
+
+        Returns:
+            Number of events written (inserted, updated or deleted).
+        """
+        rows: dict[str, dict[str, Any]] = {}
+        cancelled: set[str] = set()
+        for event in events:
+            key = external_id(event)
+            if event.cancelled:
+                rows.pop(key, None)
+                cancelled.add(key)
+                continue
+            cancelled.discard(key)
+            rows[key] = {
+                "title": event.title[:_TITLE_MAX],
+                "start_time": event.start,
+                "end_time": event.end,
+                "location": event.location,
+                "source": source,
+                "external_id": key,
+            }
+
+        if cancelled:
+            await self.db.execute(
+                delete(CalendarEvent).where(
+                    tuple_(CalendarEvent.source, CalendarEvent.external_id).in_(
+                        [(source, key) for key in cancelled]
+                    )
+                )
+            )
+        if rows:
+            stmt = insert(CalendarEvent).values(list(rows.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[CalendarEvent.source, CalendarEvent.external_id],
+                set_={
+                    "title": stmt.excluded.title,
+                    "start_time": stmt.excluded.start_time,
+                    "end_time": stmt.excluded.end_time,
+                    "location": stmt.excluded.location,
+                },
+            )
+            await self.db.execute(stmt)
+        return len(rows) + len(cancelled)
@@ -0,0 +1,205 @@
+"""Monthly partitions of ``chat_logs``.
+
+``chat_logs`` is range-partitioned on ``created_at`` by UTC month (see
+scripts/init.sql), one partition per month named ``chat_logs_yYYYYmMM``.
+This service creates partitions ahead of the writes that will need them,
+streams a partition's rows for archival and detaches it. Queries that bound
+``created_at`` (history, timeframes) only scan the partitions that can
+match.
+"""
+
+import logging
+import re
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import observe_query
+from app.core.tracing import traced
+from app.models.chat import ChatLog
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME = re.compile(r"^chat_logs_y(\d{4})m(\d{2})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of the UTC month containing ``moment``."""
+    moment = moment.astimezone(UTC)
+    return datetime(moment.year, moment.month, 1, tzinfo=UTC)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """Shift a month start by ``months`` (may be negative)."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=UTC)
+
+
+@dataclass(frozen=True, slots=True)
+class ChatPartition:
+    """One month of ``chat_logs``: ``[start, end)`` in UTC."""
+
+    start: datetime
+
+    @property
+    def end(self) -> datetime:
+        """Exclusive upper bound (start of the next month)."""
+        return add_months(self.start, 1)
+
+    @property
+    def name(self) -> str:
+        """Table name, e.g. ``chat_logs_y2026m10``."""
+        return f"chat_logs_y{self.start.year:04d}m{self.start.month:02d}"
+
+    @classmethod
+    def from_name(cls, name: str) -> "ChatPartition | None":
+        """Parse a partition table name; None for names not ours."""
+        match = _PARTITION_NAME.match(name)
+        if match is None:
+            return None
+        return cls(datetime(int(match[1]), int(match[2]), 1, tzinfo=UTC))
+
+
+def archive_record(row: Any) -> dict[str, Any]:
+    """JSON-ready dict of one ``chat_logs`` row (column names as in SQL)."""
+    record = dict(row)
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+class ChatPartitionService:
+    """Create, export and detach ``chat_logs`` partitions.
+
+    Args:
+        db: Async database session.
+    """
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Initialize partition service with database session.
+
+        Args:
+            db: Async database session.
+        """
+        self.db = db
+
+    @traced("ChatPartitionService.list_partitions")
+    @observe_query("ChatPartitionService.list_partitions")
+    async def list_partitions(self) -> list[ChatPartition]:
+        """Get the attached monthly partitions, oldest first."""
+        result = await self.db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'chat_logs'::regclass"
+            )
+        )
+        names: list[str] = list(result.scalars())
+        partitions = [ChatPartition.from_name(name) for name in names]
+        return sorted((p for p in partitions if p is not None), key=lambda p: p.start)
+
+    @traced("ChatPartitionService.ensure_partitions")
+    @observe_query("ChatPartitionService.ensure_partitions")
+    async def ensure_partitions(
+        self,
+        months_ahead: int,
+        now: datetime | None = None,
+    ) -> list[ChatPartition]:
+        """Create the current month's partition and ``months_ahead`` more.
+
+        Args:
+            months_ahead: Future months to create beyond the current one.
+            now: Reference time (defaults to now).
+
+        Returns:
+            Partitions created (empty if all existed).
+        """
+        current = month_start(now or datetime.now(UTC))
+        existing = {p.start for p in await self.list_partitions()}
+        created: list[ChatPartition] = []
+        for offset in range(months_ahead + 1):
+            partition = ChatPartition(add_months(current, offset))
+            if partition.start in existing:
+                continue
+            # DDL takes no bind parameters; bounds are our own ISO timestamps
+            await self.db.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {partition.name} "
+                    f"PARTITION OF chat_logs FOR VALUES "
+                    f"FROM ('{partition.start.isoformat()}') "
+                    f"TO ('{partition.end.isoformat()}')"
+                )
+            )
+            created.append(partition)
+        if created:
+            logger.info(
+                f"Created chat_logs partitions: {', '.join(p.name for p in created)}"
+            )
+        return created
+
+    async def stream_rows(
+        self,
+        partition: ChatPartition,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream a partition's rows in id order, ``batch_size`` at a time.
+
+        Server-side cursor; only one batch is held in memory.
+
+        Args:
+            partition: Partition to read.
+            batch_size: Rows per yielded batch.
+
+        Yields:
+            Batches of ``archive_record`` dicts.
+        """
+        table = ChatLog.__table__
+        stmt = (
+            select(table)
+            .where(
+                table.c.created_at >= partition.start,
+                table.c.created_at < partition.end,
+            )
+            .order_by(table.c.id)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await self.db.stream(stmt)
+        async for rows in result.mappings().partitions():
+            yield [archive_record(row) for row in rows]
+
+    @traced("ChatPartitionService.detach")
+    @observe_query("ChatPartitionService.detach")
+    async def detach(
+        self,
+        partition: ChatPartition,
+        expected_rows: int,
+        drop: bool = True,
+    ) -> None:
+        """Detach an archived partition, and drop it unless ``drop`` is False.
+
+        Call inside a transaction: the row count is checked after the
+        detach (which locks out writers), and a mismatch raises so the
+        transaction rolls back with the partition still attached.
+
+        Args:
+            partition: Partition to detach.
+            expected_rows: Rows written to its archive.
+            drop: Drop the detached table (the archive is the copy).
+
+        Raises:
+            RuntimeError: If the partition's row count differs from
+                ``expected_rows`` (rows arrived after the export).
+        """
+        await self.db.execute(
+            text(f"ALTER TABLE chat_logs DETACH PARTITION {partition.name}")
+        )
+        rows = await self.db.scalar(text(f"SELECT count(*) FROM {partition.name}"))
+        if rows != expected_rows:
+            raise RuntimeError(
+                f"{partition.name} has {rows} rows, archive has {expected_rows}"
+            )
+        if drop:
+            await self.db.execute(text(f"DROP TABLE {partition.name}"))
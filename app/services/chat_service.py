@@ -1,14 +1,26 @@
-"""Chat service for managing conversation logs."""
+"""Chat service for managing conversation logs.
 
-from datetime import datetime
+``chat_logs`` is partitioned by month on ``created_at``; every read here
+bounds ``created_at`` so it only touches recent partitions.
+"""
+
+from datetime import UTC, datetime, timedelta
 from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import get_settings
+from app.core.metrics import observe_query
+from app.core.tracing import traced
 from app.models.chat import ChatLog
 
 
+def _history_start() -> datetime:
+    """Oldest message time history queries look at."""
+    return datetime.now(UTC) - timedelta(days=get_settings().chat_history_days)
+
+
 class ChatService:
     """Service for managing chat logs and conversation history."""
 
@@ -20,6 +32,8 @@ class ChatService:
         """
         self.db = db
 
+    @traced("ChatService.save_message")
+    @observe_query("ChatService.save_message")
     async def save_message(
         self,
         session_id: str,
@@ -58,6 +72,8 @@ class ChatService:
         await self.db.refresh(chat_log)
         return chat_log
 
+    @traced("ChatService.get_conversation_history")
+    @observe_query("ChatService.get_conversation_history")
     async def get_conversation_history(
         self,
         session_id: str,
@@ -65,6 +81,8 @@ class ChatService:
     ) -> list[ChatLog]:
         """Get conversation history for a session.
 
+        Only messages from the last ``chat_history_days`` are considered.
+
         Args:
             session_id: Unique session identifier.
             limit: Maximum number of messages to return.
@@ -74,7 +92,10 @@ class ChatService:
         """
         stmt = (
             select(ChatLog)
-            .where(ChatLog.session_id == session_id)
+            .where(
+                ChatLog.session_id == session_id,
+                ChatLog.created_at >= _history_start(),
+            )
             .order_by(ChatLog.created_at.desc())
             .limit(limit)
         )
@@ -82,6 +103,8 @@ class ChatService:
         messages = list(result.scalars().all())
         return list(reversed(messages))
 
+    @traced("ChatService.get_recent_messages_by_chat_id")
+    @observe_query("ChatService.get_recent_messages_by_chat_id")
     async def get_recent_messages_by_chat_id(
         self,
         telegram_chat_id: int,
@@ -89,6 +112,8 @@ class ChatService:
     ) -> list[ChatLog]:
         """Get recent messages for a Telegram chat.
 
+        Only messages from the last ``chat_history_days`` are considered.
+
         Args:
             telegram_chat_id: Telegram chat ID.
             limit: Maximum number of messages to return.
@@ -98,7 +123,10 @@ class ChatService:
         """
         stmt = (
             select(ChatLog)
-            .where(ChatLog.telegram_chat_id == telegram_chat_id)
+            .where(
+                ChatLog.telegram_chat_id == telegram_chat_id,
+                ChatLog.created_at >= _history_start(),
+            )
             .order_by(ChatLog.created_at.desc())
             .limit(limit)
         )
@@ -106,6 +134,8 @@ class ChatService:
         messages = list(result.scalars().all())
         return list(reversed(messages))
 
+    @traced("ChatService.get_messages_in_timeframe")
+    @observe_query("ChatService.get_messages_in_timeframe")
     async def get_messages_in_timeframe(
         self,
         start_time: datetime,
@@ -131,3 +161,25 @@ class ChatService:
         stmt = stmt.order_by(ChatLog.created_at.asc())
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
+
+    @traced("ChatService.get_active_chat_ids")
+    @observe_query("ChatService.get_active_chat_ids")
+    async def get_active_chat_ids(self, since: datetime) -> list[int]:
+        """Get Telegram chats that sent or received messages since a time.
+
+        Args:
+            since: Start of the activity window.
+
+        Returns:
+            Distinct Telegram chat IDs.
+        """
+        stmt = (
+            select(ChatLog.telegram_chat_id)
+            .where(
+                ChatLog.telegram_chat_id.is_not(None),
+                ChatLog.created_at >= since,
+            )
+            .distinct()
+        )
+        result = await self.db.execute(stmt)
+        return [chat_id for chat_id in result.scalars() if chat_id is not None]
@@ -0,0 +1,483 @@
+"""Deterministic deadline and priority extraction (Vietnamese and English).
+
+Turns the deadline phrases users type ("thứ 6", "cuối tuần", "mai 3h
+chiều", "2 tiếng nữa", "15/3", "next friday 5pm") into a timezone-aware
+datetime without an LLM round trip. Text is folded first (``fold``), so
+diacritics are optional.
+
+Conventions for underspecified phrases:
+
+- a date without a time means ``DEFAULT_HOUR`` (end of the working day),
+  or 23:59 when that has already passed today;
+- a time without a date means today, or tomorrow once it has passed;
+- a bare hour from 1 to 6 without a morning/afternoon word is in the
+  afternoon ("3h" -> 15:00); "tối"/"chiều"/"pm" shift to the afternoon;
+  "12h đêm" is midnight at the end of the day;
+- a weekday that has passed this week (or today, past its time) means the
+  next one; "thứ 6 tuần sau" / "next friday" mean the one in next week;
+- "cuối tuần" is Saturday, "tuần sau" Monday, "tháng sau" the 1st.
+
+``deadline_window`` gives the bounds of the named windows that task
+queries ask about (today, tomorrow, this week, overdue).
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from zoneinfo import ZoneInfo
+
+from app.core.config import get_settings
+from app.services.lexical_index import fold
+
+DEFAULT_HOUR = 17
+_END_OF_DAY = dt_time(23, 59)
+
+_NUMBER_WORDS = {
+    "mot": 1,
+    "hai": 2,
+    "ba": 3,
+    "bon": 4,
+    "nam": 5,
+    "sau": 6,
+    "bay": 7,
+    "tam": 8,
+    "chin": 9,
+    "muoi": 10,
+    "a": 1,
+    "an": 1,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+}
+_UNITS = {
+    "phut": "minutes",
+    "p": "minutes",
+    "min": "minutes",
+    "mins": "minutes",
+    "minute": "minutes",
+    "minutes": "minutes",
+    "tieng": "hours",
+    "gio": "hours",
+    "h": "hours",
+    "hr": "hours",
+    "hrs": "hours",
+    "hour": "hours",
+    "hours": "hours",
+    "ngay": "days",
+    "hom": "days",
+    "day": "days",
+    "days": "days",
+    "tuan": "weeks",
+    "week": "weeks",
+    "weeks": "weeks",
+    "thang": "months",
+    "month": "months",
+    "months": "months",
+}
+_NUMBER = r"\d+|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True))
+_UNIT = "|".join(sorted(_UNITS, key=len, reverse=True))
+# "2 tiếng nữa", "trong 3 ngày", "sau 1 tuần", "in 2 hours", "3 days later"
+_OFFSET = re.compile(
+    r"(?<!thu )"  # "thứ 2 tuần tới" is a weekday
+    rf"\b(?:(?P<pre>trong|sau|in)\s+)?(?P<n>{_NUMBER})\s*(?P<unit>{_UNIT})\b"
+    r"(?!\s*(?:sang|trua|chieu|dem|am|pm)\b)"  # "sau 3h chiều" is a clock time
+    r"(?:\s+(?P<post>nua|toi|from now|later))?"
+)
+_HALF_HOUR = re.compile(r"\b(?:nua tieng|half an hour)(?:\s+nua)?\b")
+
+_WEEKDAY_WORDS = {
+    "hai": 0,
+    "ba": 1,
+    "tu": 2,
+    "nam": 3,
+    "sau": 4,
+    "bay": 5,
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "fri": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+_WEEKDAY = re.compile(
+    r"\b(?P<next_en>next\s+|this\s+)?"
+    r"(?:thu\s*(?P<num>[2-7])|t(?P<short>[2-7])|thu\s+(?P<vn>hai|ba|tu|nam|sau|bay)"
+    r"|(?P<sun>chu\s*nhat|cn)"
+    r"|(?P<en>monday|tuesday|wednesday|thursday|friday|fri|saturday|sunday))\b"
+    r"(?:\s+(?P<next_vn>tuan\s+(?:sau|toi)|tuan\s+nay))?"
+)
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_NUMERIC_DATE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})(?:[/.-](\d{4}|\d{2}))?\b")
+_SPELLED_DATE = re.compile(
+    r"\b(?:ngay|mung)\s+(\d{1,2})\s+thang\s+(\d{1,2})(?:\s+nam\s+(\d{4}))?\b"
+)
+_DAY_OF_MONTH = re.compile(r"\b(?:ngay|mung)\s+(\d{1,2})\b")
+# Day words, checked in order: more specific phrases first
+_DAY_WORDS: tuple[tuple[re.Pattern[str], str], ...] = (
+    (re.compile(r"\b(?:ngay\s+kia|ngay\s+mot|day after tomorrow)\b"), "+2"),
+    (re.compile(r"\bmot\b(?!\s*gio\b)"), "+2"),  # "một giờ" is 1 o'clock
+    (re.compile(r"\b(?:ngay\s+)?mai\b|\btomorrow\b"), "+1"),
+    (re.compile(r"\beod\b|\bend of (?:the )?day\b"), "eod"),
+    (
+        re.compile(r"\beow\b|\bend of (?:the )?week\b|(?<!cuoi )\btuan\s+nay\b"),
+        "eow",
+    ),
+    (
+        re.compile(
+            r"\bcuoi\s+tuan(?:\s+(?P<rel>nay|sau|toi))?\b"
+            r"|\b(?P<en>this\s+|next\s+)?weekend\b"
+        ),
+        "weekend",
+    ),
+    (re.compile(r"\b(?:dau\s+)?tuan\s+(?:sau|toi)\b|\bnext week\b"), "next_week"),
+    (
+        re.compile(
+            r"\bcuoi\s+thang(?:\s+(?P<rel>nay|sau|toi))?\b"
+            r"|\bend of (?:the )?(?P<en>next )?month\b"
+        ),
+        "month_end",
+    ),
+    (re.compile(r"\b(?:dau\s+)?thang\s+(?:sau|toi)\b|\bnext month\b"), "next_month"),
+    (re.compile(r"\bcuoi\s+nam\b|\bend of (?:the )?year\b"), "year_end"),
+    (re.compile(r"\b(?:hom\s+)?nay\b|\btoday\b"), "+0"),
+)
+# Spelled-out hours need "giờ" after them ("sáu giờ chiều", "mười một giờ");
+# a bare "bây giờ" ("now") folds like "bảy giờ" and is no time
+_SPELLED_HOUR = (
+    r"(?!bay\s*gio\b(?!\s*(?:\d|ruoi|sang|trua|chieu|toi|dem)))"
+    r"(?:muoi\s+(?:mot|hai)|mot|hai|ba|bon|nam|sau|bay|tam|chin|muoi)(?=\s*gio\b)"
+)
+# "3h", "15h30", "9 giờ sáng", "3h rưỡi chiều", "15:30", "3pm", "3:30 pm",
+# and a bare hour after "lúc"/"at" ("lúc 9", "at 9"); "2 hộp" is no time
+_CLOCK = re.compile(
+    rf"\b(?P<at>(?:luc|at)\s+)?(?P<hour>\d{{1,2}}|{_SPELLED_HOUR})"
+    r"(?:\s*(?:(?:h|g|gio)(?![a-z])|:)\s*(?P<minute>\d{2})?(?:\s*(?:p|phut)\b)?"
+    r"(?P<half>\s*ruoi)?"
+    r"|(?=\s*(?:am|pm)\b)"
+    r"|(?(at)\b(?!\s*[/.-]\d)|(?!)))"
+    r"(?:\s*(?P<period>sang|trua|chieu|toi|dem|am|pm)\b)?"
+)
+_PERIOD_HOURS = {
+    "sang": 9,
+    "trua": 12,
+    "chieu": 15,
+    "toi": 20,
+    "dem": 22,
+    "morning": 9,
+    "noon": 12,
+    "afternoon": 15,
+    "evening": 19,
+    "tonight": 20,
+}
+_PERIOD = re.compile(r"\b(" + "|".join(_PERIOD_HOURS) + r")\b")
+_PM_PERIODS = {"chieu", "toi", "dem", "pm", "afternoon", "evening", "tonight"}
+
+# Priority keywords on folded text, checked in order (negations first)
+_PRIORITY_RULES: tuple[tuple[re.Pattern[str], int], ...] = (
+    (re.compile(r"\bp([1-5])\b"), 0),  # explicit: the digit is the priority
+    (
+        re.compile(
+            r"\bkhong\s+(?:gap|quan trong)|\bkhi\s+(?:ranh|co thoi gian)"
+            r"|\buu tien thap\b|\blow priority\b|\bnot urgent\b|\bwhenever\b"
+        ),
+        4,
+    ),
+    (re.compile(r"\bsomeday\b|\bneu ranh\b|\bmaybe\b"), 5),
+    (
+        re.compile(
+            r"\bgap\b|\bkhan\b|\burgent\b|\basap\b|\bcritical\b|\bngay lap tuc\b"
+            r"|\bhoa toc\b"
+        ),
+        1,
+    ),
+    (re.compile(r"\bquan trong\b|\bimportant\b|\buu tien cao\b|\bhigh priority\b"), 2),
+)
+DEFAULT_PRIORITY = 3
+
+
+def _number(token: str) -> int:
+    return int(token) if token.isdigit() else _NUMBER_WORDS[token]
+
+
+def _blank(text: str, match: re.Match[str]) -> str:
+    """Remove a matched span so later patterns do not re-read it."""
+    start, end = match.span()
+    return text[:start] + " " * (end - start) + text[end:]
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    last = (date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)).day
+    return date(year, month, min(day.day, last))
+
+
+def _month_end(day: date) -> date:
+    return _add_months(day.replace(day=1), 1) - timedelta(days=1)
+
+
+def _valid_date(year: int, month: int, day: int) -> date | None:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _parse_date(text: str, today: date) -> tuple[date | None, bool, str]:
+    """Find the date part.
+
+    Returns:
+        ``(date, rolls_weekly, remaining_text)``; ``rolls_weekly`` marks a
+        bare weekday that moves to next week once its time has passed.
+    """
+    if match := _ISO_DATE.search(text):
+        year, month, day = (int(g) for g in match.groups())
+        return _valid_date(year, month, day), False, _blank(text, match)
+
+    for pattern in (_SPELLED_DATE, _NUMERIC_DATE):
+        if match := pattern.search(text):
+            day, month = int(match.group(1)), int(match.group(2))
+            year_text = match.group(3)
+            if year_text:
+                year = int(year_text) + (2000 if len(year_text) == 2 else 0)
+                return _valid_date(year, month, day), False, _blank(text, match)
+            found = _valid_date(today.year, month, day)
+            if found is not None and found < today:
+                found = _valid_date(today.year + 1, month, day)
+            return found, False, _blank(text, match)
+
+    if match := _WEEKDAY.search(text):
+        if match.group("num") or match.group("short"):
+            weekday = int(match.group("num") or match.group("short")) - 2
+        elif match.group("sun"):
+            weekday = 6
+        else:
+            weekday = _WEEKDAY_WORDS[match.group("vn") or match.group("en")]
+        next_week = (match.group("next_en") or "").strip() == "next" or (
+            match.group("next_vn") or ""
+        ).endswith(("sau", "toi"))
+        if next_week:
+            monday = today - timedelta(days=today.weekday()) + timedelta(weeks=1)
+            return monday + timedelta(days=weekday), False, _blank(text, match)
+        ahead = (weekday - today.weekday()) % 7
+        return today + timedelta(days=ahead), True, _blank(text, match)
+
+    for pattern, kind in _DAY_WORDS:
+        match = pattern.search(text)
+        if match is None:
+            continue
+        rest = _blank(text, match)
+        groups = match.groupdict()
+        later = groups.get("rel") in ("sau", "toi") or (
+            (groups.get("en") or "").strip() == "next"
+        )
+        if kind.startswith("+"):
+            return today + timedelta(days=int(kind[1:])), False, rest
+        if kind == "eod":
+            return today, False, rest
+        if kind == "eow":
+            return today + timedelta(days=(4 - today.weekday()) % 7), False, rest
+        if kind == "weekend":
+            saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+            if later or today.weekday() == 6:
+                saturday += timedelta(weeks=1)
+            return saturday, False, rest
+        if kind == "next_week":
+            return today + timedelta(days=7 - today.weekday()), False, rest
+        if kind == "month_end":
+            return _month_end(_add_months(today, 1) if later else today), False, rest
+        if kind == "next_month":
+            return _add_months(today.replace(day=1), 1), False, rest
+        if kind == "year_end":
+            return date(today.year, 12, 31), False, rest
+
+    if match := _DAY_OF_MONTH.search(text):
+        found = _valid_date(today.year, today.month, int(match.group(1)))
+        if found is not None and found < today:
+            following = _add_months(today.replace(day=1), 1)
+            found = _valid_date(following.year, following.month, int(match.group(1)))
+        return found, False, _blank(text, match)
+
+    return None, False, text
+
+
+def _parse_time(text: str) -> tuple[dt_time | None, bool]:
+    """Find the time of day (clock time, else a period word such as "chiều").
+
+    Returns:
+        ``(time, next_day)``; ``next_day`` marks midnight at the end of the
+        date ("12h đêm" is 00:00 of the following day).
+    """
+    if match := _CLOCK.search(text):
+        hour = sum(_number(word) for word in match.group("hour").split())
+        minute = 30 if match.group("half") else int(match.group("minute") or 0)
+        rest = _blank(text, match)
+        period = match.group("period")
+        if period is None and (found := _PERIOD.search(rest)):
+            period = found.group(1)
+        if hour > 23 or minute > 59:
+            return None, False
+        if period == "dem" and hour == 12:
+            return dt_time(0, minute), True
+        if period in _PM_PERIODS and hour < 12:
+            hour += 12
+        elif period == "trua" and hour <= 5:
+            hour += 12
+        elif period in ("sang", "am", "morning") and hour == 12:
+            hour = 0
+        elif period is None and 1 <= hour <= 6:
+            hour += 12  # "3h" in a deadline means the afternoon
+        return dt_time(hour, minute), False
+
+    if match := _PERIOD.search(text):
+        return dt_time(_PERIOD_HOURS[match.group(1)], 0), False
+    return None, False
+
+
+def parse_deadline(text: str, now: datetime | None = None) -> datetime | None:
+    """Parse a deadline phrase into a datetime in the user's timezone.
+
+    Args:
+        text: Deadline phrase ("thứ 6", "mai 3h chiều", "in 2 hours").
+        now: Reference time (timezone-aware); defaults to the current time
+            in the ``timezone`` setting.
+
+    Returns:
+        Timezone-aware deadline, or None if the text names no date or time.
+    """
+    if now is None:
+        now = datetime.now(ZoneInfo(get_settings().timezone))
+    folded = " ".join(fold(text).split())
+    if not folded:
+        return None
+
+    if match := _HALF_HOUR.search(folded):
+        return now + timedelta(minutes=30)
+    today = now.date()
+    date_part: date | None = None
+    rolls_weekly = False
+    for match in _OFFSET.finditer(folded):
+        amount, unit = _number(match.group("n")), _UNITS[match.group("unit")]
+        post = match.group("post")
+        if unit in ("minutes", "hours") and post == "toi":
+            post = None  # "10h tối" is 22:00, not "10 hours later"
+        if not (match.group("pre") or post):
+            continue  # "3h chiều" is a time of day, not "3 hours"
+        if unit in ("minutes", "hours"):
+            return now + timedelta(**{unit: amount})
+        if unit == "months":
+            date_part = _add_months(today, amount)
+        else:
+            date_part = today + timedelta(**{unit: amount})
+        folded = _blank(folded, match)
+        break
+
+    if date_part is None:
+        date_part, rolls_weekly, folded = _parse_date(folded, today)
+    time_part, next_day = _parse_time(folded)
+
+    if date_part is None:
+        if time_part is None:
+            return None
+        deadline = datetime.combine(today, time_part, tzinfo=now.tzinfo)
+        deadline += timedelta(days=next_day)
+        return deadline if deadline > now else deadline + timedelta(days=1)
+
+    deadline = datetime.combine(
+        date_part, time_part or dt_time(DEFAULT_HOUR), tzinfo=now.tzinfo
+    ) + timedelta(days=next_day)
+    if deadline <= now and rolls_weekly:
+        deadline += timedelta(weeks=1)
+    elif deadline <= now and time_part is None and date_part == today:
+        deadline = datetime.combine(today, _END_OF_DAY, tzinfo=now.tzinfo)
+    return deadline
+
+
+def infer_priority(
+    text: str,
+    deadline: datetime | None = None,
+    now: datetime | None = None,
+) -> int:
+    """Infer a task priority (1 = highest) from wording and deadline.
+
+    Explicit "P1".."P5" wins, then urgency words ("gấp", "không gấp",
+    "quan trọng", "asap"); otherwise a deadline within a day means P2.
+
+    Args:
+        text: Everything the user said about the task.
+        deadline: Parsed deadline, if any.
+        now: Reference time (timezone-aware); defaults to now.
+
+    Returns:
+        Priority from 1 to 5 (``DEFAULT_PRIORITY`` when nothing applies).
+    """
+    folded = fold(text)
+    for pattern, priority in _PRIORITY_RULES:
+        if match := pattern.search(folded):
+            return int(match.group(1)) if priority == 0 else priority
+    if deadline is not None:
+        now = now or datetime.now(deadline.tzinfo)
+        if deadline - now <= timedelta(days=1):
+            return 2
+    return DEFAULT_PRIORITY
+
+
+# Named deadline windows for task queries ("hôm nay có task gì?")
+DEADLINE_WINDOWS = ("overdue", "today", "tomorrow", "this_week")
+_WINDOW_WORDS: tuple[tuple[re.Pattern[str], str], ...] = (
+    (re.compile(r"\bqua han\b|\btre han\b|\boverdue\b|\blate\b"), "overdue"),
+    (re.compile(r"\b(?:ngay\s+)?mai\b|\btomorrow\b"), "tomorrow"),
+    (re.compile(r"\btuan\s+nay\b|\bthis week\b|\btrong tuan\b"), "this_week"),
+    (re.compile(r"\bhom\s+nay\b|\btoday\b"), "today"),
+)
+
+
+def detect_window(text: str) -> str | None:
+    """Map a query phrase onto a named deadline window.
+
+    Args:
+        text: Query or deadline phrase ("hôm nay", "tuần này", "quá hạn").
+
+    Returns:
+        One of ``DEADLINE_WINDOWS``, or None if the text names none.
+    """
+    folded = fold(text)
+    for pattern, window in _WINDOW_WORDS:
+        if pattern.search(folded):
+            return window
+    return None
+
+
+def deadline_window(
+    window: str,
+    now: datetime | None = None,
+) -> tuple[datetime | None, datetime]:
+    """Bounds of a named deadline window in the user's timezone.
+
+    Args:
+        window: One of ``DEADLINE_WINDOWS``.
+        now: Reference time (timezone-aware); defaults to the current time
+            in the ``timezone`` setting.
+
+    Returns:
+        ``(start, end)`` with ``start <= deadline < end``; ``start`` is None
+        for ``overdue`` (everything before now).
+
+    Raises:
+        ValueError: If the window name is unknown.
+    """
+    if now is None:
+        now = datetime.now(ZoneInfo(get_settings().timezone))
+    start_of_day = datetime.combine(now.date(), dt_time(0), tzinfo=now.tzinfo)
+    if window == "overdue":
+        return None, now
+    if window == "today":
+        return start_of_day, start_of_day + timedelta(days=1)
+    if window == "tomorrow":
+        return start_of_day + timedelta(days=1), start_of_day + timedelta(days=2)
+    if window == "this_week":
+        days_left = 7 - now.weekday()  # through Sunday
+        return start_of_day, start_of_day + timedelta(days=days_left)
+    raise ValueError(f"Unknown deadline window: {window}")
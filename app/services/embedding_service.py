@@ -0,0 +1,218 @@
+"""Text embedders for retrieval: OpenAI API and an offline hashing embedder."""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+import uuid
+from collections.abc import Iterator
+from functools import lru_cache
+from typing import Protocol
+
+import numpy as np
+import numpy.typing as npt
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_POINT_NAMESPACE = uuid.UUID("5b8f3c1e-2f4a-4d8e-9a51-7c0e6b2d4a10")
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of the exact text that gets embedded."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(source: str, source_id: int, chunk: int = 0) -> str:
+    """Deterministic vector/lexical index id for a row (or document chunk)."""
+    return str(uuid.uuid5(_POINT_NAMESPACE, f"{source}:{source_id}:{chunk}"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate without a tokenizer download.
+
+    Vietnamese with diacritics averages fewer than 3 UTF-8 bytes per token
+    with OpenAI's tokenizers, so this errs on the high side.
+    """
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+def batch_by_tokens(
+    texts: list[str],
+    max_tokens: int,
+    max_items: int,
+) -> Iterator[list[int]]:
+    """Group text indices into batches bounded by tokens and item count.
+
+    Args:
+        texts: Texts to batch (order preserved).
+        max_tokens: Token budget per batch; a longer text gets its own batch.
+        max_items: Maximum texts per batch.
+
+    Yields:
+        Lists of indices into ``texts``.
+    """
+    batch: list[int] = []
+    tokens = 0
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text)
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_items):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(i)
+        tokens += cost
+    if batch:
+        yield batch
+
+
+def chunk_text(text: str, max_tokens: int) -> list[str]:
+    """Split long text into chunks of roughly ``max_tokens`` on paragraph breaks.
+
+    Args:
+        text: Text to split.
+        max_tokens: Target chunk size (estimated tokens).
+
+    Returns:
+        Non-empty chunks in order.
+    """
+    max_chars = max_tokens * 3
+    chunks: list[str] = []
+    current: list[str] = []
+    size = 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        # Hard-split paragraphs that alone exceed the budget
+        pieces = [
+            paragraph[i : i + max_chars] for i in range(0, len(paragraph), max_chars)
+        ]
+        for piece in pieces:
+            cost = estimate_tokens(piece)
+            if current and size + cost > max_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += cost
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors."""
+
+    model: str
+    dim: int
+
+    async def embed(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Embed texts; returns an array of shape (len(texts), dim)."""
+        ...
+
+
+class HashingEmbedder:
+    """Offline embedder: signed feature hashing of words, bigrams and trigrams.
+
+    Needs no model download or network, so ingestion and retrieval work in
+    tests and air-gapped setups. Captures lexical overlap only.
+    """
+
+    def __init__(self, dim: int) -> None:
+        """Initialize the embedder.
+
+        Args:
+            dim: Output dimension.
+        """
+        self.dim = dim
+        self.model = f"hashing-v1-{dim}"
+
+    def _features(self, text: str) -> Iterator[str]:
+        words = _WORD.findall(text.lower())
+        yield from words
+        for a, b in zip(words, words[1:], strict=False):
+            yield f"{a} {b}"
+        for word in words:
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                yield padded[i : i + 3]
+
+    def embed_sync(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Embed texts (CPU-bound, no I/O)."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1.0 if value & 1 else -1.0
+                vectors[row, (value >> 1) % self.dim] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+    async def embed(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Embed texts off the event loop."""
+        return await asyncio.to_thread(self.embed_sync, texts)
+
+
+class OpenAIEmbedder:
+    """Embedder backed by the OpenAI embeddings API."""
+
+    def __init__(self, model: str, dim: int) -> None:
+        """Initialize the API client.
+
+        Args:
+            model: Embedding model name (e.g. text-embedding-3-small).
+            dim: Requested output dimension.
+        """
+        from openai import AsyncOpenAI
+
+        settings = get_settings()
+        self.model = model
+        self.dim = dim
+        self._client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+        )
+
+    async def embed(self, texts: list[str]) -> npt.NDArray[np.float32]:
+        """Embed texts in one API request (up to 3 attempts)."""
+        started = time.perf_counter()
+        # A retry loop rather than @retry: the decorated method would no
+        # longer match the Embedder protocol for the type checker
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_exponential(multiplier=1, min=1, max=10),
+            reraise=True,
+        ):
+            with attempt:
+                response = await self._client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    dimensions=self.dim,
+                )
+        logger.debug(
+            f"Embedded {len(texts)} texts "
+            f"({response.usage.total_tokens} tokens) in "
+            f"{(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+        vectors = np.array([d.embedding for d in response.data], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+@lru_cache
+def get_embedder() -> Embedder:
+    """Get the configured embedder singleton.
+
+    Returns:
+        OpenAIEmbedder or HashingEmbedder, per ``EMBEDDING_PROVIDER``.
+    """
+    settings = get_settings()
+    if settings.embedding_provider == "hashing":
+        return HashingEmbedder(settings.embedding_dim)
+    return OpenAIEmbedder(settings.embedding_model, settings.embedding_dim)
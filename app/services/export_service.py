@@ -0,0 +1,187 @@
+"""Streaming exports of tasks and chat history (CSV or NDJSON).
+
+Rows are read through a server-side cursor (``AsyncSession.stream`` with
+``yield_per``) as plain column rows, never ORM objects, and encoded one
+batch at a time, optionally through an incremental gzip compressor. Memory
+therefore stays at one batch however large the table is; the HTTP routes
+(``app/api/routes/export.py``) pass the chunks straight to a
+``StreamingResponse`` and ``/export`` spools them to a temporary file.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import AsyncIterator, Mapping, Sequence
+from datetime import UTC, date, datetime
+from typing import Any, Literal
+
+from sqlalchemy import Executable, RowMapping, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.chat import ChatLog
+from app.models.task import Task
+
+ExportFormat = Literal["csv", "ndjson"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+TASK_COLUMNS = (
+    Task.id,
+    Task.content,
+    Task.status,
+    Task.priority,
+    Task.complexity,
+    Task.deadline,
+    Task.tags,
+    Task.project_id,
+    Task.parent_task_id,
+    Task.created_at,
+    Task.updated_at,
+)
+CHAT_LOG_COLUMNS = (
+    ChatLog.id,
+    ChatLog.session_id,
+    ChatLog.telegram_chat_id,
+    ChatLog.role,
+    ChatLog.content,
+    ChatLog.intent,
+    ChatLog.sentiment,
+    ChatLog.extra_metadata.label("metadata"),
+    ChatLog.created_at,
+)
+
+
+def _json_value(value: Any) -> Any:
+    """``json.dumps`` fallback for dates."""
+    if isinstance(value, date | datetime):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _csv_value(value: Any) -> Any:
+    """One CSV cell: ISO dates, JSON for lists/objects, empty for NULL."""
+    if value is None:
+        return ""
+    if isinstance(value, date | datetime):
+        return value.isoformat()
+    if isinstance(value, list | dict):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+async def encode(
+    batches: AsyncIterator[Sequence[Mapping[Any, Any]]],
+    fmt: ExportFormat,
+    columns: list[str],
+) -> AsyncIterator[bytes]:
+    """Encode row batches as CSV (with a header) or NDJSON, a chunk per batch.
+
+    Args:
+        batches: Row mappings, one list per cursor batch.
+        fmt: ``csv`` or ``ndjson``.
+        columns: Column names (CSV header and order).
+
+    Yields:
+        UTF-8 encoded chunks.
+    """
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+        async for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows([_csv_value(row[c]) for c in columns] for row in rows)
+            yield buffer.getvalue().encode()
+    else:
+        async for rows in batches:
+            yield "".join(
+                json.dumps(dict(row), ensure_ascii=False, default=_json_value) + "\n"
+                for row in rows
+            ).encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream incrementally into one gzip member."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip header and trailer
+    async for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
+
+class ExportService:
+    """Stream tasks and chat logs out of the database.
+
+    Args:
+        db: Async database session; kept open until the stream is consumed.
+    """
+
+    def __init__(self, db: AsyncSession, batch_size: int = 1000) -> None:
+        """Initialize export service with database session.
+
+        Args:
+            db: Async database session.
+            batch_size: Rows fetched from the cursor per round trip.
+        """
+        self.db = db
+        self.batch_size = batch_size
+
+    async def _stream(self, stmt: Executable) -> AsyncIterator[Sequence[RowMapping]]:
+        """Run ``stmt`` through a server-side cursor, a batch at a time."""
+        result = await self.db.stream(stmt.execution_options(yield_per=self.batch_size))
+        async for rows in result.mappings().partitions():
+            yield rows
+
+    def tasks(
+        self,
+        fmt: ExportFormat,
+        owner_chat_id: int | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Export tasks in id order.
+
+        Args:
+            fmt: ``csv`` or ``ndjson``.
+            owner_chat_id: Only this owner's tasks (None: all owners).
+
+        Returns:
+            Encoded chunks (an async iterator; the query runs on iteration).
+        """
+        stmt = select(*TASK_COLUMNS).order_by(Task.id)
+        if owner_chat_id is not None:
+            stmt = stmt.where(Task.owner_chat_id == owner_chat_id)
+        return encode(self._stream(stmt), fmt, [c.key for c in TASK_COLUMNS])
+
+    def chat_logs(
+        self,
+        fmt: ExportFormat,
+        telegram_chat_id: int | None = None,
+        since: datetime | None = None,
+    ) -> AsyncIterator[bytes]:
+        """Export chat logs in time order.
+
+        Args:
+            fmt: ``csv`` or ``ndjson``.
+            telegram_chat_id: Only this chat's messages (None: all chats).
+            since: Only messages from this time on; prunes older partitions.
+
+        Returns:
+            Encoded chunks (an async iterator; the query runs on iteration).
+        """
+        stmt = select(*CHAT_LOG_COLUMNS).order_by(ChatLog.created_at, ChatLog.id)
+        if telegram_chat_id is not None:
+            stmt = stmt.where(ChatLog.telegram_chat_id == telegram_chat_id)
+        if since is not None:
+            stmt = stmt.where(ChatLog.created_at >= since)
+        return encode(self._stream(stmt), fmt, [c.key for c in CHAT_LOG_COLUMNS])
+
+
+def export_filename(name: str, fmt: ExportFormat, compressed: bool = False) -> str:
+    """Download file name, e.g. ``tasks-20261019.csv.gz``."""
+    filename = f"{name}-{datetime.now(UTC):%Y%m%d}.{fmt}"
+    return f"{filename}.gz" if compressed else filename
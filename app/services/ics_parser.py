@@ -0,0 +1,172 @@
+"""Streaming iCalendar (RFC 5545) event parser.
+
+Reads an ``.ics`` file line by line and yields one ``IcsEvent`` per
+``VEVENT`` as soon as its ``END:VEVENT`` is seen, so memory stays flat
+however large the export is. Only what ``calendar_events`` stores is
+parsed: UID, SUMMARY, LOCATION, DTSTART, DTEND/DURATION, STATUS and
+RECURRENCE-ID.
+
+Supported time forms: UTC (``...Z``), ``TZID=`` with an IANA zone, floating
+local time (read in ``default_tz``) and all-day ``VALUE=DATE``. Recurring
+events (``RRULE``) are imported as their first occurrence only; cancelled
+events (``STATUS:CANCELLED``) are reported with ``cancelled=True``.
+"""
+
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from datetime import time as dt_time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# An event without DTEND/DURATION lasts this long (all-day: one day)
+DEFAULT_DURATION = timedelta(hours=1)
+_DURATION = re.compile(
+    r"^(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$"
+)
+_ESCAPES = {"\\n": "\n", "\\N": "\n", "\\,": ",", "\\;": ";", "\\\\": "\\"}
+_ESCAPE = re.compile(r"\\[nN,;\\]")
+
+
+@dataclass(slots=True)
+class IcsEvent:
+    """One VEVENT, normalized to timezone-aware start/end."""
+
+    uid: str | None
+    title: str
+    start: datetime
+    end: datetime
+    location: str | None = None
+    all_day: bool = False
+    cancelled: bool = False
+    recurrence_id: str | None = None  # set on overridden occurrences
+
+
+def unfold(lines: Iterable[str]) -> Iterator[str]:
+    """Join folded content lines (continuations start with a space or tab)."""
+    current: str | None = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _unescape(value: str) -> str:
+    return _ESCAPE.sub(lambda m: _ESCAPES[m.group(0)], value)
+
+
+def _split(line: str) -> tuple[str, dict[str, str], str]:
+    """Split ``NAME;PARAM=x:value`` into name, params and value."""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    parsed = {}
+    for param in params:
+        key, _, val = param.partition("=")
+        parsed[key.upper()] = val.strip('"')
+    return name.upper(), parsed, value
+
+
+def _parse_time(
+    value: str,
+    params: dict[str, str],
+    default_tz: ZoneInfo,
+) -> tuple[datetime, bool]:
+    """Parse a DATE or DATE-TIME value; returns ``(moment, all_day)``."""
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        day = date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+        return datetime.combine(day, dt_time.min, tzinfo=default_tz), True
+    moment = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return moment.replace(tzinfo=UTC), False
+    tz = default_tz
+    if "TZID" in params:
+        try:
+            tz = ZoneInfo(params["TZID"])
+        except (ZoneInfoNotFoundError, ValueError):
+            tz = default_tz  # Windows zone names etc.: fall back
+    return moment.replace(tzinfo=tz), False
+
+
+def _parse_duration(value: str) -> timedelta | None:
+    match = _DURATION.match(value.strip())
+    if match is None:
+        return None
+    parts = {k: int(v) for k, v in match.groupdict().items() if v and k != "sign"}
+    delta = timedelta(**parts)
+    return -delta if match.group("sign") == "-" else delta
+
+
+def parse_ics(lines: Iterable[str], default_tz: ZoneInfo) -> Iterator[IcsEvent]:
+    """Yield the events of an iCalendar stream.
+
+    Malformed events (no DTSTART, unparseable times) are skipped.
+
+    Args:
+        lines: Lines of the ``.ics`` file (e.g. an open text file).
+        default_tz: Zone for floating times and all-day events.
+
+    Yields:
+        Events in file order.
+    """
+    props: dict[str, tuple[str, dict[str, str]]] | None = None
+    depth = 0  # nested components (VALARM) inside the VEVENT
+    for line in unfold(lines):
+        name, params, value = _split(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and props is None:
+                props = {}
+            elif props is not None:
+                depth += 1
+            continue
+        if name == "END":
+            if props is not None and depth:
+                depth -= 1
+            elif props is not None and value.upper() == "VEVENT":
+                event = _build_event(props, default_tz)
+                props = None
+                if event is not None:
+                    yield event
+            continue
+        if props is not None and not depth and name not in props:
+            props[name] = (value, params)
+
+
+def _build_event(
+    props: dict[str, tuple[str, dict[str, str]]],
+    default_tz: ZoneInfo,
+) -> IcsEvent | None:
+    if "DTSTART" not in props:
+        return None
+    try:
+        start, all_day = _parse_time(*props["DTSTART"], default_tz)
+        end: datetime | None = None
+        if "DTEND" in props:
+            end, _ = _parse_time(*props["DTEND"], default_tz)
+        elif "DURATION" in props:
+            duration = _parse_duration(props["DURATION"][0])
+            end = start + duration if duration is not None else None
+    except ValueError:
+        return None
+    if end is None or end < start:
+        end = start + (timedelta(days=1) if all_day else DEFAULT_DURATION)
+
+    def text(name: str) -> str:
+        return _unescape(props.get(name, ("", {}))[0]).strip()
+
+    return IcsEvent(
+        uid=text("UID") or None,
+        title=text("SUMMARY") or "(no title)",
+        start=start,
+        end=end,
+        location=text("LOCATION") or None,
+        all_day=all_day,
+        cancelled=text("STATUS").upper() == "CANCELLED",
+        recurrence_id=text("RECURRENCE-ID") or None,
+    )
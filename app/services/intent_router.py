@@ -1,21 +1,83 @@
 """Intent router service — classify user intent and route to appropriate handler."""
 
+import asyncio
 import logging
 import re
+import time
+from datetime import datetime
 from typing import Any
+from zoneinfo import ZoneInfo
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.tracing import traced
 from app.models.chat import ChatLog
+from app.services.deadline_parser import (
+    DEADLINE_WINDOWS,
+    deadline_window,
+    detect_window,
+    infer_priority,
+    parse_deadline,
+)
 from app.services.llm_service import LLMService
 from app.services.prompt_manager import PromptManager
-from app.services.task_service import TaskService
+from app.services.retrieval_service import RetrievalService, build_context
+from app.services.task_matcher import (
+    TaskMatcher,
+    choice_keyboard,
+    get_task_matcher,
+)
+from app.services.task_ranker import TaskRanker, get_task_ranker
+from app.services.task_service import HASHTAG_PATTERN, TaskService
 
 logger = logging.getLogger(__name__)
 
 # Regex to extract task ID from user message (e.g. "task 1000001", "#1000001")
 TASK_ID_PATTERN = re.compile(r"(?:task\s*#?\s*|#)(\d{7,})", re.IGNORECASE)
 
+# Ranked tasks given to the response model for a query
+QUERY_TOP_TASKS = 3
+# Tasks listed for a deadline-window query ("hôm nay có task gì?")
+QUERY_WINDOW_TASKS = 10
+_WINDOW_LABELS = {
+    "overdue": "qua han",
+    "today": "den han hom nay",
+    "tomorrow": "den han ngay mai",
+    "this_week": "den han trong tuan nay",
+}
+
+# Tasks created from one brain-dump message at most
+MAX_TASKS_PER_MESSAGE = 20
+
+# Shorter messages ("ok", "hi") carry too little signal to retrieve on
+_MIN_RETRIEVAL_CHARS = 8
+
+# Status an update message asks for, by keyword (first match wins)
+_STATUS_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "done": ("done", "xong", "hoàn thành", "finish"),
+    "cancelled": ("cancel", "hủy", "bỏ"),
+    "in_progress": ("đang làm", "in progress", "wip", "start"),
+}
+
+# Words of an update message that are not part of the task's name
+_REFERENCE_NOISE = re.compile(
+    r"\b(?:"
+    + "|".join(
+        re.escape(w)
+        for words in _STATUS_KEYWORDS.values()
+        for w in sorted(words, key=len, reverse=True)
+    )
+    + r"|task|rồi|roi|đã|nhé|nha|giúp|cái)\b",
+    re.IGNORECASE,
+)
+
+
+def _local(moment: datetime) -> datetime:
+    """A stored (UTC) timestamp in the user's timezone, for LLM context."""
+    return moment.astimezone(ZoneInfo(get_settings().timezone))
+
 
 class IntentRouter:
     """Routes user messages to the appropriate handler based on LLM intent classification.
@@ -28,6 +90,13 @@ class IntentRouter:
         llm: LLMService instance (singleton).
         prompt_manager: PromptManager instance (singleton).
         task_service: TaskService instance (per-request, DB-bound).
+        retrieval: RetrievalService for contextual memory (None disables it).
+        matcher: Resolves task references without IDs (default singleton).
+
+    Attributes:
+        last_intent: Intent classified by the last ``handle`` call.
+        reply_markup: Inline keyboard to send with the last response (task
+            candidates to pick from), or None.
     """
 
     def __init__(
@@ -35,11 +104,19 @@ class IntentRouter:
         llm: LLMService,
         prompt_manager: PromptManager,
         task_service: TaskService,
+        retrieval: RetrievalService | None = None,
+        matcher: TaskMatcher | None = None,
+        ranker: TaskRanker | None = None,
     ) -> None:
         """Initialize intent router with dependencies."""
         self.llm = llm
         self.prompt_manager = prompt_manager
         self.task_service = task_service
+        self.retrieval = retrieval
+        self.matcher = matcher or get_task_matcher(task_service.owner_chat_id)
+        self.ranker = ranker or get_task_ranker(task_service.owner_chat_id)
+        self.last_intent: str | None = None
+        self.reply_markup: dict[str, Any] | None = None
 
     async def handle(
         self,
@@ -55,9 +132,14 @@ class IntentRouter:
         Returns:
             Response text to send back to user.
         """
-        # Step 1: Classify intent
-        classification = await self._classify_intent(user_message, history)
+        # Step 1: Classify intent (memory retrieval runs concurrently)
+        started = time.perf_counter()
+        classification, memory_context = await asyncio.gather(
+            self._classify_intent(user_message, history),
+            self._retrieve_context(user_message),
+        )
         intent = classification.get("intent", "chat")
+        self.last_intent = intent
         confidence = classification.get("confidence", 0.0)
         entities = classification.get("entities", {})
 
@@ -69,19 +151,31 @@ class IntentRouter:
         # Step 2: Route to handler
         extra_context = ""
         if intent == "create_task" and confidence >= 0.6:
-            extra_context = await self._handle_create_task(entities)
+            extra_context = await self._handle_create_task(user_message, entities)
         elif intent == "query" and confidence >= 0.5:
-            extra_context = await self._handle_query()
+            extra_context = await self._handle_query(user_message, entities)
         elif intent == "update_task" and confidence >= 0.6:
             extra_context = await self._handle_update_task(
                 user_message, entities
             )
 
+        if memory_context:
+            extra_context += (
+                "\n\nNgu canh lien quan tu chat/task cu (chi dung neu lien quan):\n"
+                f"{memory_context}"
+            )
+
         # Step 3: Generate natural language response
-        return await self._generate_response(
+        response = await self._generate_response(
             user_message, history, extra_context
         )
 
+        label = metrics.intent_label(intent)
+        metrics.INTENT_COUNT_BY_NAME[label].inc()
+        metrics.INTENT_LATENCY_BY_NAME[label].observe(time.perf_counter() - started)
+        return response
+
+    @traced("IntentRouter.classify_intent")
     async def _classify_intent(
         self,
         user_message: str,
@@ -115,46 +209,159 @@ class IntentRouter:
             logger.exception("Intent classification failed, defaulting to chat")
             return {"intent": "chat", "confidence": 0.0, "entities": {}}
 
+    async def _retrieve_context(self, user_message: str) -> str:
+        """Retrieve past chats/tasks/documents relevant to the message.
+
+        Only this router's owner's chats and tasks are searched.
+
+        Args:
+            user_message: The user's message text.
+
+        Returns:
+            Token-budgeted context lines, or empty if disabled/failed.
+        """
+        if self.retrieval is None or len(user_message.strip()) < _MIN_RETRIEVAL_CHARS:
+            return ""
+        settings = get_settings()
+        try:
+            items = await self.retrieval.retrieve(
+                user_message,
+                limit=settings.retrieval_top_k,
+                owner_chat_id=self.task_service.owner_chat_id,
+            )
+        except Exception:
+            logger.exception("Retrieval failed, continuing without memory context")
+            return ""
+        return build_context(items, settings.retrieval_context_tokens)
+
+    @traced("IntentRouter.handle_create_task")
     async def _handle_create_task(
         self,
+        user_message: str,
         entities: dict[str, Any],
     ) -> str:
-        """Handle task creation intent.
+        """Handle task creation intent (one task or a brain-dump list).
+
+        The analyzer returns either ``task_content`` or a ``tasks`` list,
+        each item with its own ``deadline_mention``; a top-level
+        ``deadline_mention`` applies to items without one ("mai cần: A, B").
+        Deadlines are parsed locally and priorities inferred from the
+        wording, then all tasks are inserted in one statement.
 
         Args:
+            user_message: The user's message text.
             entities: Extracted entities from classification.
 
         Returns:
-            Context string describing the created task.
+            Context string describing the created tasks.
         """
-        content = entities.get("task_content", "")
-        if not content:
+        shared_mention = entities.get("deadline_mention") or ""
+        items = [
+            item
+            for item in entities.get("tasks") or ()
+            if isinstance(item, dict) and item.get("content")
+        ]
+        if not items and entities.get("task_content"):
+            items = [{"content": entities["task_content"]}]
+        if not items:
             return "User muon tao task nhung chua co noi dung cu the. Hoi lai user."
+        skipped = max(len(items) - MAX_TASKS_PER_MESSAGE, 0)
+        items = items[:MAX_TASKS_PER_MESSAGE]
+
+        now = datetime.now(ZoneInfo(get_settings().timezone))
+        drafts: list[dict[str, Any]] = []
+        for item in items:
+            content = str(item["content"]).strip()
+            mention = item.get("deadline_mention") or shared_mention
+            deadline = parse_deadline(mention, now) if mention else None
+            # Urgency words in the message apply to a single task only
+            wording = f"{content} {mention}"
+            if len(items) == 1:
+                wording = f"{user_message} {wording}"
+            drafts.append(
+                {
+                    "content": content,
+                    "priority": infer_priority(wording, deadline, now),
+                    "deadline": deadline,
+                    "tags": HASHTAG_PATTERN.findall(content),
+                }
+            )
+        tasks = await self.task_service.create_tasks(drafts)
+        for task in tasks:
+            self.ranker.observe_on_commit(self.task_service.db, task)
+
+        if len(tasks) == 1:
+            task = tasks[0]
+            tags_line = f"- Tags: {', '.join(task.tags)}\n" if task.tags else ""
+            deadline_line = (
+                f"- Deadline: {_local(task.deadline):%H:%M %d/%m/%Y}\n"
+                if task.deadline
+                else ""
+            )
+            header = (
+                f"Da tao task thanh cong:\n"
+                f"- ID: #{task.id}\n"
+                f"- Content: {task.content}\n"
+                f"- Status: {task.status}\n"
+                f"- Priority: P{task.priority}\n"
+                f"{deadline_line}"
+                f"{tags_line}"
+            )
+        else:
+            lines = [f"Da tao {len(tasks)} task thanh cong:"]
+            for task in tasks:
+                line = f"- #{task.id} [P{task.priority}] {task.content}"
+                if task.deadline:
+                    line += f" (deadline {_local(task.deadline):%H:%M %d/%m})"
+                lines.append(line)
+            if skipped:
+                lines.append(
+                    f"({skipped} task con lai chua tao, toi da "
+                    f"{MAX_TASKS_PER_MESSAGE} task/tin nhan)"
+                )
+            header = "\n".join(lines) + "\n"
+        if all(task.deadline for task in tasks):
+            follow_up = "Hay confirm voi user (nhac lai deadline)."
+        else:
+            follow_up = "Hay confirm voi user va hoi them ve deadline neu can."
+        return header + follow_up
+
+    @traced("IntentRouter.handle_query")
+    async def _handle_query(
+        self,
+        user_message: str,
+        entities: dict[str, Any],
+    ) -> str:
+        """Handle task query intent.
 
-        task = await self.task_service.create_task(
-            content=content,
-            priority=3,
-        )
-        return (
-            f"Da tao task thanh cong:\n"
-            f"- ID: #{task.id}\n"
-            f"- Content: {task.content}\n"
-            f"- Status: {task.status}\n"
-            f"- Priority: P{task.priority}\n"
-            f"Hay confirm voi user va hoi them ve deadline/priority neu chua co."
-        )
+        A question about a deadline window ("hôm nay có task gì?", "task
+        nào quá hạn?") is answered from the index-backed window query;
+        anything else gets the three best-ranked tasks (``TaskRanker``)
+        rather than the raw active list, so the response model does not
+        pick a focus itself.
 
-    async def _handle_query(self) -> str:
-        """Handle task query intent.
+        Args:
+            user_message: The user's message text.
+            entities: Extracted entities (``time_window``, else the
+                ``deadline_mention`` or message is matched to a window).
 
         Returns:
-            Context string with active task list.
+            Context string with the matching or top-ranked active tasks.
         """
-        tasks = await self.task_service.get_active_tasks(limit=10)
+        window = entities.get("time_window")
+        if window not in DEADLINE_WINDOWS:
+            window = detect_window(entities.get("deadline_mention") or user_message)
+        if window is not None:
+            return await self._window_context(window)
+
+        tasks = await self.ranker.top(self.task_service, k=QUERY_TOP_TASKS)
         if not tasks:
             return "Hien tai khong co task nao active (todo/in_progress)."
 
-        lines = [f"Hien co {len(tasks)} task active:"]
+        lines = [
+            f"Hien co {len(self.ranker)} task active. "
+            f"{len(tasks)} task nen lam tiep theo (da xep hang):"
+        ]
         for t in tasks:
             priority_emoji = {1: "🔴", 2: "🟡", 3: "⚪", 4: "🔵", 5: "⚫"}.get(
                 t.priority, "⚪"
@@ -166,8 +373,31 @@ class IntentRouter:
                 f"- {priority_emoji} #{t.id} [P{t.priority}] [{t.status}] "
                 f"{t.content[:60]}{deadline_str}"
             )
+        lines.append("Danh sach day du: /tasks. Goi y task tiep theo: /next.")
+        return "\n".join(lines)
+
+    async def _window_context(self, window: str) -> str:
+        """Context listing the active tasks due in a deadline window."""
+        start, end = deadline_window(window)
+        if start is None:
+            tasks = await self.task_service.get_overdue_tasks(before=end)
+        else:
+            tasks = await self.task_service.get_tasks_due(start, end)
+        label = _WINDOW_LABELS[window]
+        if not tasks:
+            return f"Khong co task active nao {label}."
+
+        lines = [f"Co {len(tasks)} task {label}:"]
+        for t in tasks[:QUERY_WINDOW_TASKS]:
+            line = f"- #{t.id} [P{t.priority}] [{t.status}] {t.content[:60]}"
+            if t.deadline:
+                line += f" | Deadline: {_local(t.deadline):%H:%M %d/%m/%Y}"
+            lines.append(line)
+        if len(tasks) > QUERY_WINDOW_TASKS:
+            lines.append(f"... va {len(tasks) - QUERY_WINDOW_TASKS} task khac.")
         return "\n".join(lines)
 
+    @traced("IntentRouter.handle_update_task")
     async def _handle_update_task(
         self,
         user_message: str,
@@ -175,6 +405,12 @@ class IntentRouter:
     ) -> str:
         """Handle task update intent.
 
+        Without a task ID, the task is resolved from how the user named it
+        (``task_content``, else the message minus status words) by fuzzy
+        matching against active tasks: an unambiguous match is updated
+        right away, otherwise the candidates are offered as inline buttons
+        (``reply_markup``).
+
         Args:
             user_message: Original user message (for regex task ID extraction).
             entities: Extracted entities from classification.
@@ -182,32 +418,41 @@ class IntentRouter:
         Returns:
             Context string describing the update result.
         """
+        new_status = _requested_status(user_message)
+
         # Try to extract task ID from message
         match = TASK_ID_PATTERN.search(user_message)
-        if not match:
-            return "Khong tim thay task ID trong message. Hoi user task ID cu the."
-
-        task_id = int(match.group(1))
-        task = await self.task_service.get_task_by_id(task_id)
-        if not task:
-            return f"Khong tim thay task #{task_id}. Bao user task khong ton tai."
-
-        # Determine new status from message context
-        msg_lower = user_message.lower()
-        new_status: str | None = None
-        if any(w in msg_lower for w in ["done", "xong", "hoàn thành", "finish"]):
-            new_status = "done"
-        elif any(w in msg_lower for w in ["cancel", "hủy", "bỏ"]):
-            new_status = "cancelled"
-        elif any(w in msg_lower for w in ["đang làm", "in progress", "wip", "start"]):
-            new_status = "in_progress"
+        if match:
+            task_id = int(match.group(1))
+            task = await self.task_service.get_task_by_id(task_id)
+            if not task:
+                return f"Khong tim thay task #{task_id}. Bao user task khong ton tai."
+            content, old_status = task.content, task.status
+        else:
+            reference = _task_reference(user_message, entities)
+            candidates = await self.matcher.match(self.task_service, reference)
+            if not candidates:
+                return "Khong tim thay task ID trong message. Hoi user task ID cu the."
+            best = self.matcher.pick(candidates)
+            if best is None:
+                self.reply_markup = choice_keyboard(candidates, new_status)
+                lines = [f"Khong co task ID, '{reference}' khop cac task:"]
+                lines.extend(
+                    f"- #{c.task_id} [{c.status}] {c.content[:60]}" for c in candidates
+                )
+                lines.append(
+                    "Da gui nut chon duoi tin nhan. Hoi user bam vao task dung."
+                )
+                return "\n".join(lines)
+            task_id, content, old_status = best.task_id, best.content, best.status
 
         if new_status:
-            old_status = task.status
             updated = await self.task_service.update_task(
                 task_id, status=new_status
             )
             if updated:
+                self.matcher.invalidate()
+                self.ranker.observe_on_commit(self.task_service.db, updated)
                 return (
                     f"Da update task #{task_id}:\n"
                     f"- Content: {updated.content}\n"
@@ -216,10 +461,11 @@ class IntentRouter:
                 )
 
         return (
-            f"Tim thay task #{task_id}: '{task.content}' (status={task.status}). "
+            f"Tim thay task #{task_id}: '{content}' (status={old_status}). "
             f"Nhung khong xac dinh duoc user muon update gi. Hoi lai."
         )
 
+    @traced("IntentRouter.generate_response")
     async def _generate_response(
         self,
         user_message: str,
@@ -268,3 +514,18 @@ class IntentRouter:
         for log in history:
             lines.append(f"{log.role}: {log.content[:200]}")
         return "\n".join(lines)
+
+
+def _requested_status(user_message: str) -> str | None:
+    """Status an update message asks for ("xong rồi" -> done), if any."""
+    msg_lower = user_message.lower()
+    for status, words in _STATUS_KEYWORDS.items():
+        if any(w in msg_lower for w in words):
+            return status
+    return None
+
+
+def _task_reference(user_message: str, entities: dict[str, Any]) -> str:
+    """How the user named the task, without status words and filler."""
+    text = entities.get("task_content") or user_message
+    return " ".join(_REFERENCE_NOISE.sub(" ", text).split())
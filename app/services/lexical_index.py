@@ -0,0 +1,451 @@
+"""Lexical (keyword) search: Elasticsearch, or an in-process BM25 index.
+
+Both backends index the same items as the vector store (ids from
+``point_id``, payloads with ``source``/``source_id``/``owner_chat_id``/
+``content_preview``) so their results can be fused with vector hits. Text
+is matched after lowercasing and folding Vietnamese diacritics, since
+messages are often typed without accents ("hop voi khach" should find "họp
+với khách").
+"""
+
+import asyncio
+import heapq
+import logging
+import math
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.chat import ChatLog
+from app.models.document import Document
+from app.models.task import Task
+from app.services.embedding_service import chunk_text, point_id
+from app.services.vector_store import SHARED_OWNER, SearchHit
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "lazy_tasks_memory"
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_PREVIEW_CHARS = 200
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip diacritics (``Đường`` -> ``duong``)."""
+    decomposed = unicodedata.normalize("NFD", text.lower().replace("đ", "d"))
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> list[str]:
+    """Folded word tokens."""
+    return _TOKEN.findall(fold(text))
+
+
+def lexical_text(source: str, source_id: int, text: str) -> str:
+    """Text to index for a row: tasks also match their id ("task #1000123")."""
+    return f"task #{source_id} {text}" if source == "task" else text
+
+
+@dataclass(slots=True)
+class LexicalDoc:
+    """A text to index, with the same id and payload as its vector point."""
+
+    id: str
+    text: str
+    payload: dict[str, Any]
+
+
+class LexicalIndex(Protocol):
+    """Keyword search over ingested items."""
+
+    async def warm(self) -> None:
+        """Prepare the index (create it / load it) before the first query."""
+        ...
+
+    async def add(self, docs: list[LexicalDoc]) -> None:
+        """Insert or replace documents by id."""
+        ...
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """Best-matching documents, best first.
+
+        ``owner_chat_id`` restricts hits to that owner's documents and
+        shared ones (``SHARED_OWNER``).
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release resources."""
+        ...
+
+
+class BM25Index:
+    """Okapi BM25 over an in-memory inverted index (not thread-safe)."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        """Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation.
+            b: Document length normalization.
+        """
+        self.k1 = k1
+        self.b = b
+        self._slot_of: dict[str, int] = {}
+        self._payloads: list[dict[str, Any]] = []
+        self._terms: list[Counter[str]] = []
+        self._lengths: list[int] = []
+        self._postings: dict[str, dict[int, int]] = {}
+        self._total_length = 0
+        self._live = 0
+
+    def __len__(self) -> int:
+        """Number of indexed documents."""
+        return self._live
+
+    def __contains__(self, doc_id: str) -> bool:
+        """Whether a document id is indexed."""
+        return doc_id in self._slot_of
+
+    def add(self, docs: list[LexicalDoc]) -> None:
+        """Insert or replace documents by id."""
+        for doc in docs:
+            terms = Counter(tokenize(doc.text))
+            slot = self._slot_of.get(doc.id)
+            if slot is None:
+                slot = len(self._payloads)
+                self._slot_of[doc.id] = slot
+                self._payloads.append({})
+                self._terms.append(Counter())
+                self._lengths.append(0)
+                self._live += 1
+            else:
+                self._remove_postings(slot)
+            self._payloads[slot] = {"id": doc.id, **doc.payload}
+            self._terms[slot] = terms
+            self._lengths[slot] = terms.total()
+            self._total_length += self._lengths[slot]
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[slot] = tf
+
+    def _remove_postings(self, slot: int) -> None:
+        old = self._terms[slot]
+        self._total_length -= self._lengths[slot]
+        for term in old:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(slot, None)
+                if not postings:
+                    del self._postings[term]
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """BM25 top-k, optionally restricted to payload sources and an owner."""
+        if not self._live:
+            return []
+        avg_length = self._total_length / self._live or 1.0
+        k1, b = self.k1, self.b
+        lengths = self._lengths
+        allowed = set(sources) if sources else None
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (self._live - df + 0.5) / (df + 0.5))
+            for slot, tf in postings.items():
+                norm = tf + k1 * (1 - b + b * lengths[slot] / avg_length)
+                scores[slot] = scores.get(slot, 0.0) + idf * tf * (k1 + 1) / norm
+
+        if allowed is not None:
+            scores = {
+                slot: score
+                for slot, score in scores.items()
+                if self._payloads[slot].get("source") in allowed
+            }
+        if owner_chat_id is not None:
+            owners = (owner_chat_id, SHARED_OWNER)
+            scores = {
+                slot: score
+                for slot, score in scores.items()
+                if self._payloads[slot].get("owner_chat_id") in owners
+            }
+        hits = []
+        for slot, score in heapq.nlargest(limit, scores.items(), key=lambda x: x[1]):
+            payload = dict(self._payloads[slot])
+            hits.append(SearchHit(id=payload.pop("id"), score=score, payload=payload))
+        return hits
+
+
+class LocalLexicalIndex:
+    """In-process BM25, loaded from PostgreSQL on first use.
+
+    Ingestion keeps it current afterwards through ``add``. Meant for
+    deployments without Elasticsearch; the index lives only in memory.
+    """
+
+    def __init__(self, max_docs: int) -> None:
+        """Initialize the index.
+
+        Args:
+            max_docs: Most recent chat messages/tasks loaded per source.
+        """
+        self.max_docs = max_docs
+        self.index = BM25Index()
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    async def warm(self) -> None:
+        """Load tasks, user messages and documents from the database once."""
+        async with self._load_lock:
+            if self._loaded:
+                return
+            docs = await self._load_docs()
+            # Rows added by ingestion meanwhile are newer: keep them
+            self.index.add([doc for doc in docs if doc.id not in self.index])
+            self._loaded = True
+            logger.info(f"BM25 index loaded: {len(self.index)} documents")
+
+    async def _load_docs(self) -> list[LexicalDoc]:
+        chunk_tokens = get_settings().embedding_chunk_tokens
+        docs: list[LexicalDoc] = []
+        async with AsyncSessionLocal() as session:
+            chats = await session.execute(
+                select(
+                    ChatLog.id,
+                    ChatLog.content,
+                    ChatLog.telegram_chat_id,
+                    ChatLog.created_at,
+                )
+                .where(ChatLog.role == "user")
+                .order_by(ChatLog.id.desc())
+                .limit(self.max_docs)
+            )
+            for chat in chats:
+                docs.append(
+                    _doc(
+                        "chat_log",
+                        chat.id,
+                        chat.telegram_chat_id,
+                        chat.content,
+                        chat.created_at,
+                    )
+                )
+            tasks = await session.execute(
+                select(
+                    Task.id,
+                    Task.owner_chat_id,
+                    Task.content,
+                    Task.tags,
+                    Task.updated_at,
+                )
+                .order_by(Task.updated_at.desc())
+                .limit(self.max_docs)
+            )
+            for task in tasks:
+                docs.append(
+                    _doc(
+                        "task",
+                        task.id,
+                        task.owner_chat_id,
+                        task.content,
+                        task.updated_at,
+                        task.tags,
+                    )
+                )
+            documents = await session.execute(
+                select(
+                    Document.id,
+                    Document.title,
+                    Document.content,
+                    Document.source,
+                    Document.created_at,
+                )
+            )
+            for document in documents:
+                text = (
+                    f"{document.title}\n\n{document.content}"
+                    if document.title
+                    else document.content
+                )
+                tags = [document.source] if document.source else []
+                for chunk_no, chunk in enumerate(chunk_text(text, chunk_tokens)):
+                    docs.append(
+                        _doc(
+                            "document",
+                            document.id,
+                            SHARED_OWNER,
+                            chunk,
+                            document.created_at,
+                            tags,
+                            chunk_no,
+                        )
+                    )
+        return docs
+
+    async def add(self, docs: list[LexicalDoc]) -> None:
+        """Index documents."""
+        self.index.add(docs)
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """BM25 search (loads the index on first use)."""
+        if not self._loaded:
+            await self.warm()
+        return self.index.search(query, limit, sources, owner_chat_id)
+
+    async def close(self) -> None:
+        """Nothing to release."""
+
+
+def _doc(
+    source: str,
+    source_id: int,
+    owner_chat_id: int | None,
+    text: str,
+    timestamp: Any,
+    tags: list[str] | None = None,
+    chunk: int = 0,
+) -> LexicalDoc:
+    """Build a document with the ingestion payload layout."""
+    return LexicalDoc(
+        id=point_id(source, source_id, chunk),
+        text=lexical_text(source, source_id, text),
+        payload={
+            "source": source,
+            "source_id": source_id,
+            "owner_chat_id": owner_chat_id,
+            "content_preview": text[:_PREVIEW_CHARS],
+            "timestamp": timestamp.isoformat(),
+            "tags": tags or [],
+        },
+    )
+
+
+class ElasticsearchLexicalIndex:
+    """Lexical search backed by Elasticsearch (``ELASTICSEARCH_URL``)."""
+
+    def __init__(self, url: str, index: str = INDEX_NAME) -> None:
+        """Initialize the client (no connection is made yet).
+
+        Args:
+            url: Elasticsearch URL.
+            index: Index name.
+        """
+        from elasticsearch import AsyncElasticsearch
+
+        self.index = index
+        self._client = AsyncElasticsearch(url)
+
+    async def warm(self) -> None:
+        """Create the index with an accent-folding analyzer if missing."""
+        if await self._client.indices.exists(index=self.index):
+            return
+        await self._client.indices.create(
+            index=self.index,
+            settings={
+                "analysis": {
+                    "analyzer": {
+                        "folded": {
+                            "tokenizer": "standard",
+                            "filter": ["lowercase", "asciifolding"],
+                        }
+                    }
+                }
+            },
+            mappings={
+                "properties": {
+                    "text": {"type": "text", "analyzer": "folded"},
+                    "source": {"type": "keyword"},
+                    "source_id": {"type": "long"},
+                    "owner_chat_id": {"type": "long"},
+                    "tags": {"type": "keyword"},
+                    "timestamp": {"type": "date"},
+                    "content_preview": {"type": "keyword", "index": False},
+                }
+            },
+        )
+        logger.info(f"Created Elasticsearch index {self.index}")
+
+    async def add(self, docs: list[LexicalDoc]) -> None:
+        """Bulk index documents by id."""
+        from elasticsearch.helpers import async_bulk
+
+        await async_bulk(
+            self._client,
+            (
+                {
+                    "_index": self.index,
+                    "_id": doc.id,
+                    "_source": {"text": doc.text, **doc.payload},
+                }
+                for doc in docs
+            ),
+        )
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """Full-text match with optional source and owner filters."""
+        filters: list[dict[str, Any]] = []
+        if sources:
+            filters.append({"terms": {"source": sources}})
+        if owner_chat_id is not None:
+            filters.append({"terms": {"owner_chat_id": [owner_chat_id, SHARED_OWNER]}})
+        bool_query: dict[str, Any] = {"must": {"match": {"text": query}}}
+        if filters:
+            bool_query["filter"] = filters
+        response = await self._client.search(
+            index=self.index,
+            query={"bool": bool_query},
+            size=limit,
+            source_excludes=["text"],
+        )
+        return [
+            SearchHit(id=hit["_id"], score=hit["_score"], payload=hit["_source"])
+            for hit in response["hits"]["hits"]
+        ]
+
+    async def close(self) -> None:
+        """Close the client."""
+        await self._client.close()
+
+
+@lru_cache
+def get_lexical_index() -> LexicalIndex:
+    """Get the configured lexical index singleton.
+
+    Returns:
+        LexicalIndex for the configured ``LEXICAL_BACKEND``.
+    """
+    settings = get_settings()
+    if settings.lexical_backend == "elasticsearch":
+        return ElasticsearchLexicalIndex(settings.elasticsearch_url)
+    return LocalLexicalIndex(settings.retrieval_bm25_max_docs)
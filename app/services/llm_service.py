@@ -2,40 +2,66 @@
 
 import json
 import logging
-from typing import Any
+import time
+from typing import TYPE_CHECKING, Any
 
+import httpx
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
-from langchain_openai import ChatOpenAI
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.tracing import span
 from app.models.chat import ChatLog
 
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+_DEFAULT_OPENAI_BASE_URL = "https://api.openai.com/v1"
 
 
 class LLMService:
     """Service for LLM interactions via langchain-openai.
 
     Provides two modes: creative chat (temp 0.7) and structured JSON (temp 0.3).
-    Singleton usage recommended (no DB dependency).
+    Singleton usage recommended (no DB dependency). Both models share one
+    pooled HTTP client so connections opened by ``preconnect`` are reused.
     """
 
     def __init__(self) -> None:
         """Initialize LLM models."""
+        # Deferred: langchain_openai dominates app import time
+        from langchain_openai import ChatOpenAI
+
+        settings = get_settings()
+        self.base_url = settings.openai_base_url or _DEFAULT_OPENAI_BASE_URL
+        self._http_client = httpx.AsyncClient(timeout=60.0)
         self._chat_model = ChatOpenAI(
             model="gpt-4o",
             temperature=0.7,
             api_key=settings.openai_api_key,
+            base_url=self.base_url,
+            http_async_client=self._http_client,
         )
         self._json_model = ChatOpenAI(
             model="gpt-4o",
             temperature=0.3,
             api_key=settings.openai_api_key,
+            base_url=self.base_url,
+            http_async_client=self._http_client,
             model_kwargs={"response_format": {"type": "json_object"}},
         )
 
+    async def preconnect(self) -> None:
+        """Open a pooled connection to the LLM host (TLS handshake included)."""
+        await self._http_client.head(self.base_url, timeout=5.0)
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client."""
+        await self._http_client.aclose()
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -53,7 +79,7 @@ class LLMService:
         Returns:
             The assistant's text response.
         """
-        response: AIMessage = await self._chat_model.ainvoke(messages)
+        response = await self._invoke(self._chat_model, messages, "chat")
         return str(response.content)
 
     @retry(
@@ -73,9 +99,49 @@ class LLMService:
         Returns:
             Parsed JSON dict from the assistant's response.
         """
-        response: AIMessage = await self._json_model.ainvoke(messages)
+        response = await self._invoke(self._json_model, messages, "chat_json")
         return json.loads(str(response.content))
 
+    @staticmethod
+    async def _invoke(
+        model: "ChatOpenAI",
+        messages: list[BaseMessage],
+        call_type: str,
+    ) -> AIMessage:
+        """Invoke a model and record latency, errors and token usage.
+
+        Args:
+            model: Chat model to call.
+            messages: List of LangChain message objects.
+            call_type: Metrics label (chat, chat_json).
+
+        Returns:
+            The model's response message.
+        """
+        started = time.perf_counter()
+        try:
+            with span(f"LLMService.{call_type}") as llm_span:
+                response: AIMessage = await model.ainvoke(messages)
+                if llm_span is not None and response.usage_metadata:
+                    llm_span.attributes["tokens"] = response.usage_metadata[
+                        "total_tokens"
+                    ]
+        except Exception:
+            metrics.LLM_ERRORS_BY_TYPE[call_type].inc()
+            raise
+        finally:
+            metrics.LLM_LATENCY_BY_TYPE[call_type].observe(
+                time.perf_counter() - started
+            )
+
+        usage = response.usage_metadata
+        if usage:
+            metrics.LLM_PROMPT_TOKENS_BY_TYPE[call_type].inc(usage["input_tokens"])
+            metrics.LLM_COMPLETION_TOKENS_BY_TYPE[call_type].inc(
+                usage["output_tokens"]
+            )
+        return response
+
     @staticmethod
     def chat_logs_to_messages(chat_logs: list[ChatLog]) -> list[BaseMessage]:
         """Convert ChatLog list to LangChain message objects.
@@ -1,59 +1,239 @@
 """Prompt management service for loading YAML prompts and rendering Jinja2 templates."""
 
+import asyncio
+import hashlib
 import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import Any
+from zoneinfo import ZoneInfo
 
 import yaml
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from app.core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
 SYSTEM_DIR = PROMPTS_DIR / "system"
 TEMPLATES_DIR = PROMPTS_DIR / "templates"
+BYTECODE_CACHE_DIR = Path(tempfile.gettempdir()) / "lazy_tasks_jinja_cache"
+
+
+def format_time(value: datetime | None, fmt: str = "%H:%M %d/%m") -> str:
+    """Jinja filter: format a datetime for Telegram messages.
+
+    Timezone-aware values are shown in the user's timezone.
+
+    Args:
+        value: Datetime to format (None renders as empty string).
+        fmt: strftime format.
+
+    Returns:
+        Formatted string.
+    """
+    if value is None:
+        return ""
+    if value.tzinfo is not None:
+        value = value.astimezone(ZoneInfo(get_settings().timezone))
+    return value.strftime(fmt)
+
+
+TEMPLATE_FILTERS: dict[str, Any] = {
+    "format_time": format_time,
+}
+
+
+def _content_hash(data: bytes) -> str:
+    """Short stable hash of file content."""
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class PromptEntry:
+    """A loaded YAML prompt.
+
+    Attributes:
+        name: Prompt name (filename without .yaml).
+        version: ``version`` field from the YAML, if any.
+        content_hash: Hash of the file content; changes on every edit, so
+            downstream caches can key on it.
+        system_prompt: The ``system_prompt`` text.
+        data: Full parsed YAML.
+    """
+
+    name: str
+    version: str | None
+    content_hash: str
+    system_prompt: str
+    data: dict[str, Any]
+
+
+@dataclass(frozen=True)
+class TemplateEntry:
+    """A compiled Jinja2 template and its content hash."""
+
+    name: str
+    content_hash: str
+    template: Template
+
+
+@dataclass(frozen=True)
+class _Registry:
+    """Immutable snapshot of all prompts; replaced wholesale on reload."""
+
+    prompts: dict[str, PromptEntry]
+    templates: dict[str, TemplateEntry]
+    signature: tuple[tuple[str, int, int], ...]
+
+
+def _directory_signature() -> tuple[tuple[str, int, int], ...]:
+    """(path, mtime_ns, size) for every prompt file; cheap change detection."""
+    files = sorted(SYSTEM_DIR.glob("*.yaml")) + sorted(TEMPLATES_DIR.glob("*.jinja2"))
+    signature = []
+    for path in files:
+        stat = path.stat()
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
 
 
 class PromptManager:
-    """Loads YAML system prompts and renders Jinja2 templates.
+    """Registry of YAML system prompts and precompiled Jinja2 templates.
 
-    Uses simple dict cache for YAML files. Singleton usage recommended.
+    Everything is loaded and compiled up front (``preload``, called during
+    warmup) into an immutable snapshot. ``watch`` polls file mtimes and, on
+    change, builds a new snapshot off the event loop and swaps it in with a
+    single reference assignment, so readers never see a half-loaded state
+    and never block on a reload. Singleton usage recommended.
     """
 
     def __init__(self) -> None:
-        """Initialize prompt manager with file paths and caches."""
-        self._cache: dict[str, dict[str, Any]] = {}
-        self._jinja_env = Environment(
+        """Initialize prompt manager (nothing is loaded until first use)."""
+        self._registry: _Registry | None = None
+        self._failed_signature: tuple[tuple[str, int, int], ...] | None = None
+        self._bytecode_cache = FileSystemBytecodeCache(str(self._cache_dir()))
+
+    @staticmethod
+    def _cache_dir() -> Path:
+        BYTECODE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        return BYTECODE_CACHE_DIR
+
+    def _build_registry(self) -> _Registry:
+        """Load every YAML prompt and compile every template.
+
+        Raises:
+            yaml.YAMLError, jinja2.TemplateError: If any file is invalid.
+        """
+        signature = _directory_signature()
+
+        prompts: dict[str, PromptEntry] = {}
+        for file_path in sorted(SYSTEM_DIR.glob("*.yaml")):
+            raw = file_path.read_bytes()
+            data = yaml.safe_load(raw) or {}
+            version = data.get("version")
+            prompts[file_path.stem] = PromptEntry(
+                name=file_path.stem,
+                version=str(version) if version is not None else None,
+                content_hash=_content_hash(raw),
+                system_prompt=data.get("system_prompt", ""),
+                data=data,
+            )
+
+        env = Environment(
             loader=FileSystemLoader(str(TEMPLATES_DIR)),
             trim_blocks=True,
             lstrip_blocks=True,
+            bytecode_cache=self._bytecode_cache,
+            auto_reload=False,
         )
+        env.filters.update(TEMPLATE_FILTERS)
 
-    def _load_yaml(self, agent_name: str) -> dict[str, Any]:
-        """Load and cache a YAML prompt file.
+        templates: dict[str, TemplateEntry] = {}
+        for file_path in sorted(TEMPLATES_DIR.glob("*.jinja2")):
+            templates[file_path.name] = TemplateEntry(
+                name=file_path.name,
+                content_hash=_content_hash(file_path.read_bytes()),
+                template=env.get_template(file_path.name),
+            )
 
-        Args:
-            agent_name: Name of the agent (matches filename without .yaml).
+        return _Registry(prompts=prompts, templates=templates, signature=signature)
+
+    def _current(self) -> _Registry:
+        """Current snapshot, loading synchronously on first use."""
+        registry = self._registry
+        if registry is None:
+            registry = self._registry = self._build_registry()
+        return registry
+
+    def preload(self) -> None:
+        """Load every YAML prompt and compile every template up front."""
+        self._registry = self._build_registry()
+        logger.info(
+            f"Loaded {len(self._registry.prompts)} prompts, "
+            f"{len(self._registry.templates)} templates"
+        )
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild and swap the snapshot if any prompt file changed.
+
+        A snapshot that fails to build is discarded and the previous one
+        stays active.
 
         Returns:
-            Parsed YAML content.
+            True if a new snapshot was installed.
+        """
+        current = self._current()
+        signature = _directory_signature()
+        if signature in (current.signature, self._failed_signature):
+            return False
+        try:
+            registry = self._build_registry()
+        except Exception as e:
+            # Remember the broken state so it is reported once, not every poll
+            self._failed_signature = signature
+            logger.error(f"Prompt reload failed, keeping previous version: {e}")
+            return False
+        self._registry = registry
+        changed = [
+            name
+            for name, entry in registry.prompts.items()
+            if current.prompts.get(name) != entry
+        ]
+        logger.info(f"Prompts reloaded (changed: {changed or 'templates only'})")
+        return True
 
-        Raises:
-            FileNotFoundError: If the YAML file doesn't exist.
+    async def watch(self, interval: float) -> None:
+        """Poll for prompt file changes forever (run as a background task).
+
+        Args:
+            interval: Seconds between mtime checks.
         """
-        if agent_name in self._cache:
-            return self._cache[agent_name]
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception:
+                logger.exception("Prompt watcher error")
 
-        file_path = SYSTEM_DIR / f"{agent_name}.yaml"
-        if not file_path.exists():
-            raise FileNotFoundError(f"Prompt file not found: {file_path}")
+    def get_prompt(self, agent_name: str) -> PromptEntry:
+        """Get a loaded prompt with its version and content hash.
 
-        with open(file_path) as f:
-            data = yaml.safe_load(f)
+        Args:
+            agent_name: Name of the agent (matches filename without .yaml).
 
-        self._cache[agent_name] = data
-        logger.debug(f"Loaded prompt: {agent_name}")
-        return data
+        Returns:
+            PromptEntry for the agent.
+
+        Raises:
+            FileNotFoundError: If no such prompt exists.
+        """
+        entry = self._current().prompts.get(agent_name)
+        if entry is None:
+            raise FileNotFoundError(f"Prompt file not found: {agent_name}.yaml")
+        return entry
 
     def get_system_prompt(self, agent_name: str) -> str:
         """Get the system prompt string for an agent.
@@ -64,8 +244,24 @@ class PromptManager:
         Returns:
             The system prompt text.
         """
-        data = self._load_yaml(agent_name)
-        return data.get("system_prompt", "")
+        return self.get_prompt(agent_name).system_prompt
+
+    def get_template(self, template_name: str) -> TemplateEntry:
+        """Get a precompiled template with its content hash.
+
+        Args:
+            template_name: Template filename (e.g. 'daily_briefing.jinja2').
+
+        Returns:
+            TemplateEntry for the template.
+
+        Raises:
+            FileNotFoundError: If no such template exists.
+        """
+        entry = self._current().templates.get(template_name)
+        if entry is None:
+            raise FileNotFoundError(f"Template not found: {template_name}")
+        return entry
 
     def render_template(self, template_name: str, **kwargs: Any) -> str:
         """Render a Jinja2 template with given variables.
@@ -77,5 +273,4 @@ class PromptManager:
         Returns:
             Rendered template string.
         """
-        template = self._jinja_env.get_template(template_name)
-        return template.render(**kwargs)
+        return self.get_template(template_name).template.render(**kwargs)
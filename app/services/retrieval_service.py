@@ -0,0 +1,280 @@
+"""Hybrid retrieval over past chats, tasks and documents (F2 contextual memory).
+
+Vector search finds paraphrases; lexical search finds exact identifiers
+(task numbers, project names) that embeddings blur. Both run concurrently
+and are fused with reciprocal rank fusion (RRF): each item scores
+``sum(1 / (k + rank))`` over the rankings it appears in, so no score
+calibration between BM25 and cosine similarity is needed. Queries that
+contain an identifier (a number, ``#tag``) weight the lexical ranking
+double, since embeddings do not preserve exact ids. Both searches can be
+restricted to one owner's chats and tasks (plus shared documents). Fused
+results are cached per owner and normalized query for
+``retrieval_cache_ttl_s``.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import lru_cache
+from typing import Any
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.tracing import traced
+from app.services.embedding_service import Embedder, estimate_tokens, get_embedder
+from app.services.lexical_index import LexicalIndex, fold, get_lexical_index
+from app.services.vector_store import SearchHit, VectorStore, get_vector_store
+
+logger = logging.getLogger(__name__)
+
+RRF_K = 60
+IDENTIFIER_LEXICAL_WEIGHT = 2.0
+_IDENTIFIER = re.compile(r"#\w+|\d{3,}")
+_CACHE_SIZE = 256
+# Candidates fetched per retriever, relative to the requested limit
+_CANDIDATE_FACTOR = 3
+_SOURCE_LABELS = {"chat_log": "chat", "task": "task", "document": "tài liệu"}
+
+
+@dataclass(slots=True)
+class RetrievedItem:
+    """A fused result: one source row, however many chunks matched."""
+
+    key: str
+    payload: dict[str, Any]
+    score: float = 0.0
+    ranks: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def source(self) -> str:
+        """Payload source (chat_log, task, document)."""
+        return str(self.payload.get("source", ""))
+
+    @property
+    def text(self) -> str:
+        """Content preview."""
+        return str(self.payload.get("content_preview", ""))
+
+
+def reciprocal_rank_fusion(
+    rankings: dict[str, list[SearchHit]],
+    limit: int,
+    k: int = RRF_K,
+    weights: dict[str, float] | None = None,
+) -> list[RetrievedItem]:
+    """Fuse ranked hit lists by (source, source_id).
+
+    Args:
+        rankings: Hits per retriever name, best first.
+        limit: Maximum fused items.
+        k: RRF constant; larger values flatten the rank weighting.
+        weights: Per-retriever multipliers (default 1.0).
+
+    Returns:
+        Fused items, best first.
+    """
+    fused: dict[str, RetrievedItem] = {}
+    for name, hits in rankings.items():
+        weight = (weights or {}).get(name, 1.0)
+        rank = 0
+        for hit in hits:
+            key = f"{hit.payload.get('source')}:{hit.payload.get('source_id')}"
+            item = fused.get(key)
+            if item is not None and name in item.ranks:
+                continue  # another chunk of an already ranked document
+            rank += 1
+            if item is None:
+                item = fused[key] = RetrievedItem(key=key, payload=hit.payload)
+            item.ranks[name] = rank
+            item.score += weight / (k + rank)
+    return sorted(fused.values(), key=lambda item: item.score, reverse=True)[:limit]
+
+
+def build_context(items: list[RetrievedItem], max_tokens: int) -> str:
+    """Format retrieved items as compact prompt lines within a token budget.
+
+    Args:
+        items: Fused items, best first.
+        max_tokens: Token budget (estimated) for the whole block.
+
+    Returns:
+        One line per item that fits; empty if none do.
+    """
+    lines: list[str] = []
+    used = 0
+    for item in items:
+        label = _SOURCE_LABELS.get(item.source, item.source)
+        if item.source == "task":
+            label = f"task #{item.payload.get('source_id')}"
+        timestamp = item.payload.get("timestamp")
+        if timestamp:
+            label += f", {datetime.fromisoformat(timestamp):%d/%m/%Y}"
+        text = " ".join(item.text.split())
+        line = f"- [{label}] {text}"
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            break
+        lines.append(line)
+        used += cost
+    return "\n".join(lines)
+
+
+class RetrievalService:
+    """Concurrent vector + lexical retrieval with RRF fusion and a query cache."""
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        vector_store: VectorStore,
+        lexical: LexicalIndex,
+        cache_ttl_s: float = 300.0,
+        cache_size: int = _CACHE_SIZE,
+    ) -> None:
+        """Initialize the service.
+
+        Args:
+            embedder: Embedder for queries (must match the ingested vectors).
+            vector_store: Vector store to search.
+            lexical: Lexical index to search.
+            cache_ttl_s: Lifetime of cached results; 0 disables the cache.
+            cache_size: Maximum cached queries (LRU).
+        """
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.lexical = lexical
+        self.cache_ttl_s = cache_ttl_s
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[Any, ...], tuple[float, list[RetrievedItem]]]
+        self._cache = OrderedDict()
+
+    async def warm(self) -> None:
+        """Create the vector collection and prepare the lexical index."""
+        await self.vector_store.ensure_collection(self.embedder.dim)
+        await self.lexical.warm()
+
+    def invalidate(self) -> None:
+        """Drop cached results (after new content is ingested)."""
+        self._cache.clear()
+
+    @traced("RetrievalService.retrieve")
+    async def retrieve(
+        self,
+        query: str,
+        limit: int = 6,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[RetrievedItem]:
+        """Retrieve the items most relevant to a query.
+
+        A retriever that fails is logged and skipped, so retrieval degrades
+        to the other one instead of failing the message.
+
+        Args:
+            query: Free-text query (usually the user's message).
+            limit: Maximum items.
+            sources: Restrict to these payload sources.
+            owner_chat_id: Restrict to this owner's items and shared ones
+                (None: every owner's).
+
+        Returns:
+            Fused items, best first.
+        """
+        key = (
+            owner_chat_id,
+            " ".join(fold(query).split()),
+            limit,
+            tuple(sorted(sources or ())),
+        )
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        if cached is not None and now - cached[0] < self.cache_ttl_s:
+            self._cache.move_to_end(key)
+            metrics.RETRIEVAL_CACHE_HITS.inc()
+            return cached[1]
+        metrics.RETRIEVAL_CACHE_MISSES.inc()
+
+        started = time.perf_counter()
+        candidates = limit * _CANDIDATE_FACTOR
+        vector_hits, lexical_hits = await asyncio.gather(
+            self._vector_search(query, candidates, sources, owner_chat_id),
+            self._lexical_search(query, candidates, sources, owner_chat_id),
+            return_exceptions=True,
+        )
+        rankings: dict[str, list[SearchHit]] = {}
+        for name, hits in (("vector", vector_hits), ("lexical", lexical_hits)):
+            if isinstance(hits, BaseException):
+                logger.warning(f"{name.capitalize()} retrieval failed: {hits}")
+                continue
+            rankings[name] = hits
+        weights = (
+            {"lexical": IDENTIFIER_LEXICAL_WEIGHT}
+            if _IDENTIFIER.search(query)
+            else None
+        )
+        items = reciprocal_rank_fusion(rankings, limit, weights=weights)
+        metrics.RETRIEVAL_LATENCY_BY_RETRIEVER["hybrid"].observe(
+            time.perf_counter() - started
+        )
+
+        if self.cache_ttl_s > 0:
+            self._cache[key] = (now, items)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return items
+
+    async def _vector_search(
+        self,
+        query: str,
+        limit: int,
+        sources: list[str] | None,
+        owner_chat_id: int | None,
+    ) -> list[SearchHit]:
+        started = time.perf_counter()
+        vector = (await self.embedder.embed([query]))[0]
+        hits = await self.vector_store.search(
+            vector, limit, sources=sources, owner_chat_id=owner_chat_id
+        )
+        metrics.RETRIEVAL_LATENCY_BY_RETRIEVER["vector"].observe(
+            time.perf_counter() - started
+        )
+        return hits
+
+    async def _lexical_search(
+        self,
+        query: str,
+        limit: int,
+        sources: list[str] | None,
+        owner_chat_id: int | None,
+    ) -> list[SearchHit]:
+        started = time.perf_counter()
+        hits = await self.lexical.search(
+            query, limit, sources=sources, owner_chat_id=owner_chat_id
+        )
+        metrics.RETRIEVAL_LATENCY_BY_RETRIEVER["lexical"].observe(
+            time.perf_counter() - started
+        )
+        return hits
+
+    async def close(self) -> None:
+        """Close the underlying stores."""
+        await self.vector_store.close()
+        await self.lexical.close()
+
+
+@lru_cache
+def get_retrieval_service() -> RetrievalService:
+    """Get the RetrievalService singleton over the configured backends.
+
+    Returns:
+        RetrievalService instance.
+    """
+    return RetrievalService(
+        get_embedder(),
+        get_vector_store(),
+        get_lexical_index(),
+        cache_ttl_s=get_settings().retrieval_cache_ttl_s,
+    )
@@ -0,0 +1,170 @@
+"""Local lexicon-based sentiment scoring for chat messages.
+
+A small Vietnamese/English lexicon with negation and intensifiers, scored
+per token and normalized VADER-style into [-1.0, 1.0]. It needs no model or
+network call, so the reflection worker can score tens of thousands of
+messages per second.
+"""
+
+import math
+import re
+import unicodedata
+
+# Multi-syllable entries are matched before single syllables.
+LEXICON: dict[str, float] = {
+    # Vietnamese - positive
+    "tuyệt vời": 3.0,
+    "xuất sắc": 3.0,
+    "hoàn thành": 1.5,
+    "xong rồi": 1.5,
+    "vui": 2.0,
+    "tốt": 1.5,
+    "ổn": 1.0,
+    "ngon": 1.5,
+    "thích": 1.5,
+    "cảm ơn": 1.5,
+    "hay": 1.0,
+    "nhanh": 0.5,
+    "hiệu quả": 2.0,
+    "thoải mái": 2.0,
+    "hào hứng": 2.5,
+    "nhẹ nhõm": 2.0,
+    "launch": 1.5,
+    # Vietnamese - negative
+    "mệt": -2.0,
+    "mệt mỏi": -2.5,
+    "căng thẳng": -2.5,
+    "stress": -2.5,
+    "áp lực": -2.0,
+    "chán": -2.0,
+    "buồn": -2.0,
+    "tệ": -2.5,
+    "bực": -2.5,
+    "bực mình": -2.5,
+    "khó chịu": -2.0,
+    "quá tải": -3.0,
+    "ngập": -1.5,
+    "trễ": -1.5,
+    "trễ hạn": -2.0,
+    "lo": -1.5,
+    "lo lắng": -2.0,
+    "nản": -2.5,
+    "kiệt sức": -3.0,
+    "bế tắc": -2.5,
+    "lỗi": -1.0,
+    "khó": -1.0,
+    "fail": -2.0,
+    "bug": -1.0,
+    "overdue": -1.5,
+    "burnout": -3.0,
+    # English
+    "great": 2.5,
+    "good": 1.5,
+    "nice": 1.5,
+    "awesome": 3.0,
+    "done": 1.0,
+    "thanks": 1.5,
+    "happy": 2.0,
+    "tired": -2.0,
+    "exhausted": -3.0,
+    "bad": -2.0,
+    "terrible": -3.0,
+    "stuck": -2.0,
+    "annoying": -2.0,
+    "overwhelmed": -3.0,
+}
+
+NEGATORS = frozenset({"không", "chẳng", "chả", "chưa", "đừng", "not", "no", "never"})
+INTENSIFIERS: dict[str, float] = {
+    "rất": 1.5,
+    "quá": 1.5,
+    "lắm": 1.3,
+    "cực": 1.8,
+    "siêu": 1.8,
+    "very": 1.5,
+    "so": 1.3,
+}
+EMOJI: dict[str, float] = {
+    "🚀": 2.0,
+    "🎉": 2.5,
+    "😊": 2.0,
+    "😄": 2.0,
+    "👍": 1.5,
+    "💪": 1.5,
+    "😩": -2.5,
+    "😫": -2.5,
+    "😢": -2.0,
+    "😞": -2.0,
+    "😡": -3.0,
+    "😤": -2.0,
+}
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_NORMALIZATION_ALPHA = 15.0
+_NEGATION_SCOPE = 3
+_MAX_BIGRAM = max(len(k.split()) for k in LEXICON)
+
+
+def _tokens(text: str) -> list[str]:
+    return _TOKEN.findall(unicodedata.normalize("NFC", text).lower())
+
+
+def score_sentiment(text: str) -> float:
+    """Score a message's sentiment.
+
+    Args:
+        text: Message text.
+
+    Returns:
+        Score in [-1.0, 1.0]; 0.0 when no lexicon entry matches.
+    """
+    tokens = _tokens(text)
+    total = sum(value for emoji, value in EMOJI.items() if emoji in text)
+    negate_until = -1
+    boost = 1.0
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in NEGATORS:
+            negate_until = i + _NEGATION_SCOPE
+            i += 1
+            continue
+        if token in INTENSIFIERS:
+            boost = INTENSIFIERS[token]
+            i += 1
+            continue
+
+        value = None
+        for size in range(min(_MAX_BIGRAM, len(tokens) - i), 0, -1):
+            value = LEXICON.get(" ".join(tokens[i : i + size]))
+            if value is not None:
+                break
+        if value is None:
+            i += 1
+            continue
+
+        if i <= negate_until:
+            value *= -0.75
+        i += size
+        # Vietnamese intensifiers also follow the word ("mệt quá", "vui lắm")
+        if i < len(tokens) and tokens[i] in INTENSIFIERS:
+            boost *= INTENSIFIERS[tokens[i]]
+            i += 1
+        total += value * boost
+        boost = 1.0
+
+    if total == 0:
+        return 0.0
+    return total / math.sqrt(total * total + _NORMALIZATION_ALPHA)
+
+
+def score_batch(texts: list[str]) -> list[float]:
+    """Score many messages (see ``score_sentiment``).
+
+    Args:
+        texts: Message texts.
+
+    Returns:
+        Scores in the same order.
+    """
+    return [round(score_sentiment(text), 4) for text in texts]
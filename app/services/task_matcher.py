@@ -0,0 +1,265 @@
+"""Resolve task references without IDs ("task review PR xong rồi").
+
+A reference is matched against active tasks by trigram word similarity,
+the pg_trgm ``word_similarity`` measure: the share of the reference's
+trigrams found in the task content, after folding diacritics. PostgreSQL
+answers from a GIN trigram index (``TaskService.match_active``); where
+pg_trgm is not installed, an in-process trigram index over the active
+tasks, rebuilt every ``task_match_cache_ttl_s``, is used instead. Tasks
+are per owner, so there is one matcher per owner chat.
+
+A best match is applied without asking when it is unambiguous: it scores
+at least ``task_match_auto_threshold`` and leads the runner-up by
+``task_match_margin``. Otherwise the caller offers the candidates.
+"""
+
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy.exc import ProgrammingError
+
+from app.core.config import get_settings
+from app.core.tracing import traced
+from app.services.lexical_index import fold
+from app.services.task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+# pg_trgm.word_similarity_threshold default; weaker matches are noise
+MIN_SIMILARITY = 0.6
+_WORD = re.compile(r"[^\W_]+")
+# Active tasks loaded into the in-memory index
+_MEMORY_MAX_TASKS = 5_000
+# Owners whose matcher stays cached (least recently used are rebuilt)
+_MAX_OWNERS = 256
+
+# Inline buttons: callback_data is "task:<id>:<status|show>" (64 bytes max)
+CALLBACK_PREFIX = "task"
+CHOICE_STATUSES = ("done", "cancelled", "in_progress")
+_BUTTON_CHARS = 40
+
+
+def trigrams(text: str) -> set[str]:
+    """pg_trgm-style trigrams: per folded word, padded ``"  word "``."""
+    grams: set[str] = set()
+    for word in _WORD.findall(fold(text)):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+@dataclass(slots=True)
+class TaskMatch:
+    """An active task matching a reference."""
+
+    task_id: int
+    content: str
+    status: str
+    score: float
+
+
+class TrigramIndex:
+    """Inverted trigram index over task contents (not thread-safe)."""
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self._postings: dict[str, list[int]] = {}
+        self._tasks: dict[int, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        """Number of indexed tasks."""
+        return len(self._tasks)
+
+    def add(self, task_id: int, content: str, status: str) -> None:
+        """Index a task (ids must not repeat)."""
+        self._tasks[task_id] = (content, status)
+        for gram in trigrams(content):
+            self._postings.setdefault(gram, []).append(task_id)
+
+    def search(
+        self,
+        query: str,
+        limit: int = 3,
+        min_score: float = MIN_SIMILARITY,
+    ) -> list[TaskMatch]:
+        """Tasks containing most of the query's trigrams, best first.
+
+        The score is the share of query trigrams present anywhere in the
+        task, an upper bound of pg_trgm's ``word_similarity`` (which only
+        counts trigrams of one contiguous extent).
+        """
+        grams = trigrams(query)
+        if not grams:
+            return []
+        shared: Counter[int] = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        matches: list[TaskMatch] = []
+        for task_id, count in shared.most_common():
+            score = count / len(grams)
+            if score < min_score or len(matches) == limit:
+                break
+            content, status = self._tasks[task_id]
+            matches.append(TaskMatch(task_id, content, status, score))
+        return matches
+
+
+class TaskMatcher:
+    """Fuzzy task resolution over pg_trgm, with an in-memory fallback."""
+
+    def __init__(
+        self,
+        backend: str = "pg_trgm",
+        auto_threshold: float = 0.8,
+        margin: float = 0.15,
+        cache_ttl_s: float = 30.0,
+    ) -> None:
+        """Initialize the matcher.
+
+        Args:
+            backend: ``pg_trgm`` (falls back to memory if unavailable) or
+                ``memory``.
+            auto_threshold: Minimum score of a match applied without asking.
+            margin: Minimum lead of that match over the runner-up.
+            cache_ttl_s: Lifetime of the in-memory index.
+        """
+        self.use_pg = backend == "pg_trgm"
+        self.auto_threshold = auto_threshold
+        self.margin = margin
+        self.cache_ttl_s = cache_ttl_s
+        self._index: TrigramIndex | None = None
+        self._index_built_at = 0.0
+
+    @traced("TaskMatcher.match")
+    async def match(
+        self,
+        task_service: TaskService,
+        reference: str,
+        limit: int = 3,
+    ) -> list[TaskMatch]:
+        """Active tasks matching a reference, best first.
+
+        Args:
+            task_service: Request-scoped task service.
+            reference: How the user named the task ("review PR").
+            limit: Maximum candidates.
+
+        Returns:
+            Matches scoring at least ``MIN_SIMILARITY``.
+        """
+        if not reference.strip():
+            return []
+        if self.use_pg:
+            try:
+                # Savepoint: a missing extension must not abort the request
+                async with task_service.db.begin_nested():
+                    rows = await task_service.match_active(reference, limit)
+                return [
+                    TaskMatch(task.id, task.content, task.status, score)
+                    for task, score in rows
+                ]
+            except ProgrammingError as e:
+                logger.warning(
+                    f"pg_trgm task matching unavailable, using memory index: {e}"
+                )
+                self.use_pg = False
+        index = await self._memory_index(task_service)
+        return index.search(reference, limit)
+
+    def pick(self, matches: list[TaskMatch]) -> TaskMatch | None:
+        """The match to apply without asking, if one is unambiguous.
+
+        Args:
+            matches: Candidates from ``match``, best first.
+
+        Returns:
+            The best match, or None when the user should choose.
+        """
+        if not matches or matches[0].score < self.auto_threshold:
+            return None
+        if len(matches) > 1 and matches[0].score - matches[1].score < self.margin:
+            return None
+        return matches[0]
+
+    def invalidate(self) -> None:
+        """Drop the in-memory index (after a task changed status)."""
+        self._index = None
+
+    async def _memory_index(self, task_service: TaskService) -> TrigramIndex:
+        now = time.monotonic()
+        if self._index is None or now - self._index_built_at > self.cache_ttl_s:
+            index = TrigramIndex()
+            tasks = await task_service.get_active_tasks(limit=_MEMORY_MAX_TASKS)
+            for task in tasks:
+                index.add(task.id, task.content, task.status)
+            self._index, self._index_built_at = index, now
+        return self._index
+
+
+@lru_cache(maxsize=_MAX_OWNERS)
+def get_task_matcher(owner_chat_id: int) -> TaskMatcher:
+    """Get the TaskMatcher of one owner (its memory index holds their tasks).
+
+    Args:
+        owner_chat_id: Telegram chat that owns the tasks.
+
+    Returns:
+        TaskMatcher configured from settings.
+    """
+    settings = get_settings()
+    return TaskMatcher(
+        backend=settings.task_match_backend,
+        auto_threshold=settings.task_match_auto_threshold,
+        margin=settings.task_match_margin,
+        cache_ttl_s=settings.task_match_cache_ttl_s,
+    )
+
+
+def choice_keyboard(matches: list[TaskMatch], status: str | None) -> dict[str, Any]:
+    """Inline keyboard offering candidate tasks, one button per row.
+
+    Args:
+        matches: Candidates, best first.
+        status: Status to apply to the chosen task, or None to show it.
+
+    Returns:
+        Telegram ``reply_markup`` (``InlineKeyboardMarkup``).
+    """
+    action = status or "show"
+    return {
+        "inline_keyboard": [
+            [
+                {
+                    "text": f"#{m.task_id} {m.content[:_BUTTON_CHARS]}",
+                    "callback_data": f"{CALLBACK_PREFIX}:{m.task_id}:{action}",
+                }
+            ]
+            for m in matches
+        ]
+    }
+
+
+def parse_choice(data: str) -> tuple[int, str | None] | None:
+    """Parse the ``callback_data`` of a ``choice_keyboard`` button.
+
+    Args:
+        data: Callback data from a Telegram ``callback_query``.
+
+    Returns:
+        ``(task_id, status)`` (status None: show the task), or None if the
+        data did not come from a choice keyboard.
+    """
+    prefix, _, rest = data.partition(":")
+    task_id, _, status = rest.partition(":")
+    if prefix != CALLBACK_PREFIX or not task_id.isdigit():
+        return None
+    if status == "show":
+        return int(task_id), None
+    if status not in CHOICE_STATUSES:
+        return None
+    return int(task_id), status
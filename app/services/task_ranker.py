@@ -0,0 +1,247 @@
+"""Next-best-task ranking ("what should I do now?").
+
+Active tasks are scored by priority, deadline urgency, complexity and age:
+
+- priority: ``PRIORITY_WEIGHT`` per level above P5;
+- urgency: up to ``URGENCY_WEIGHT``, halving every ``URGENCY_HALF_LIFE_H``
+  hours of slack before the deadline (slack is the time left minus the
+  expected effort of the task's complexity, so large tasks surface earlier);
+  overdue tasks get the full weight plus ``OVERDUE_BONUS``;
+- age: ``AGE_WEIGHT`` per day since creation, capped at ``AGE_CAP_DAYS``, so
+  old low-priority tasks are not starved forever;
+- ``IN_PROGRESS_BONUS`` for tasks already started.
+
+``TaskRanker`` keeps the scored tasks in a max-heap with lazy deletion:
+a task write pushes a fresh entry and bumps the task's version, and stale
+entries are dropped when they reach the top; writes are applied once their
+session commits (``observe_on_commit``). Urgency and age drift with time,
+so the whole heap is rebuilt from the database every
+``task_rank_rescore_s``; the rebuild also repairs any write the ranker did
+not see. Each owner chat has its own ranker over its own tasks.
+"""
+
+import heapq
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from functools import lru_cache
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.tracing import traced
+from app.models.task import Task
+from app.services.task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_WEIGHT = 10.0
+URGENCY_WEIGHT = 40.0
+URGENCY_HALF_LIFE_H = 48.0
+OVERDUE_BONUS = 5.0
+AGE_WEIGHT = 0.5
+AGE_CAP_DAYS = 30
+IN_PROGRESS_BONUS = 5.0
+# Expected effort per complexity, subtracted from the time left
+EFFORT_HOURS = {"low": 1.0, "medium": 4.0, "high": 12.0}
+ACTIVE_STATUSES = ("todo", "in_progress")
+# Active tasks loaded per rebuild
+_MAX_TASKS = 5_000
+# Owners whose ranking stays cached (least recently used are rebuilt)
+_MAX_OWNERS = 256
+# Session.info key of writes to apply once the session commits
+_PENDING_KEY = "task_ranker_pending"
+
+
+@dataclass(slots=True)
+class RankedTask:
+    """Snapshot of an active task with its score."""
+
+    id: int
+    content: str
+    status: str
+    priority: int
+    deadline: datetime | None
+    complexity: str | None
+    created_at: datetime
+    score: float = 0.0
+
+    @classmethod
+    def from_task(cls, task: Task, now: datetime) -> "RankedTask":
+        """Snapshot an ORM task and score it at ``now``."""
+        ranked = cls(
+            task.id,
+            task.content,
+            task.status,
+            task.priority,
+            task.deadline,
+            task.complexity,
+            task.created_at,
+        )
+        ranked.score = score_task(ranked, now)
+        return ranked
+
+
+def score_task(task: RankedTask, now: datetime) -> float:
+    """Score an active task (higher is more urgent to work on).
+
+    Args:
+        task: Task snapshot.
+        now: Reference time (timezone-aware).
+
+    Returns:
+        Score; see the module docstring for the terms.
+    """
+    score = PRIORITY_WEIGHT * (5 - min(max(task.priority, 1), 5))
+    if task.deadline is not None:
+        hours_left = (task.deadline - now).total_seconds() / 3600
+        if hours_left <= 0:
+            score += URGENCY_WEIGHT + OVERDUE_BONUS
+        else:
+            slack = max(hours_left - EFFORT_HOURS.get(task.complexity or "", 0.0), 0)
+            score += URGENCY_WEIGHT * 0.5 ** (slack / URGENCY_HALF_LIFE_H)
+    if task.created_at is not None:
+        age_days = (now - task.created_at).total_seconds() / 86400
+        score += AGE_WEIGHT * min(max(age_days, 0.0), AGE_CAP_DAYS)
+    if task.status == "in_progress":
+        score += IN_PROGRESS_BONUS
+    return score
+
+
+class TaskRanker:
+    """Active tasks in a max-heap by score, updated on task writes."""
+
+    def __init__(self, rescore_s: float = 300.0) -> None:
+        """Initialize an empty ranker.
+
+        Args:
+            rescore_s: Interval between full rebuilds (scores drift with time).
+        """
+        self.rescore_s = rescore_s
+        self._heap: list[tuple[float, int, int]] = []  # (-score, id, version)
+        self._tasks: dict[int, RankedTask] = {}
+        self._versions: dict[int, int] = {}
+        self._built_at: float | None = None
+
+    def __len__(self) -> int:
+        """Number of ranked (active) tasks."""
+        return len(self._tasks)
+
+    def observe(self, task: Task) -> None:
+        """Apply a task write: re-rank an active task, drop any other.
+
+        A no-op until the first rebuild (nothing to keep up to date yet).
+
+        Args:
+            task: Task as just written (flushed).
+        """
+        if self._built_at is None:
+            return
+        if task.status in ACTIVE_STATUSES:
+            self._push(RankedTask.from_task(task, datetime.now(UTC)))
+        else:
+            self.discard(task.id)
+
+    def observe_on_commit(self, session: AsyncSession, task: Task) -> None:
+        """Apply a task write once ``session`` commits it.
+
+        A write that is rolled back never reaches the ranker.
+
+        Args:
+            session: Session the write was flushed in.
+            task: Task as just written (flushed).
+        """
+        session.info.setdefault(_PENDING_KEY, []).append((self, task))
+
+    def discard(self, task_id: int) -> None:
+        """Drop a task (its heap entries become stale)."""
+        if self._tasks.pop(task_id, None) is not None:
+            self._versions[task_id] = self._versions.get(task_id, 0) + 1
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next ``top``."""
+        self._built_at = None
+
+    @traced("TaskRanker.top")
+    async def top(self, task_service: TaskService, k: int = 3) -> list[RankedTask]:
+        """The ``k`` best tasks to work on next, best first.
+
+        Args:
+            task_service: Request-scoped task service of this ranker's owner
+                (for rebuilds).
+            k: Number of tasks.
+
+        Returns:
+            Ranked active tasks.
+        """
+        now = time.monotonic()
+        if self._built_at is None or now - self._built_at > self.rescore_s:
+            await self._rebuild(task_service)
+
+        best: list[tuple[float, int, int]] = []
+        while self._heap and len(best) < k:
+            entry = heapq.heappop(self._heap)
+            if self._versions.get(entry[1]) == entry[2]:
+                best.append(entry)
+        for entry in best:
+            heapq.heappush(self._heap, entry)
+        return [self._tasks[task_id] for _, task_id, _ in best]
+
+    def _push(self, ranked: RankedTask) -> None:
+        version = self._versions.get(ranked.id, 0) + 1
+        self._versions[ranked.id] = version
+        self._tasks[ranked.id] = ranked
+        heapq.heappush(self._heap, (-ranked.score, ranked.id, version))
+        # Bound the garbage left by lazy deletion
+        if len(self._heap) > 2 * len(self._tasks) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [
+            entry for entry in self._heap if self._versions.get(entry[1]) == entry[2]
+        ]
+        heapq.heapify(self._heap)
+
+    async def _rebuild(self, task_service: TaskService) -> None:
+        started = time.perf_counter()
+        tasks = await task_service.get_active_tasks(limit=_MAX_TASKS)
+        now = datetime.now(UTC)
+        self._tasks = {t.id: RankedTask.from_task(t, now) for t in tasks}
+        self._versions = dict.fromkeys(self._tasks, 0)
+        self._heap = [(-r.score, r.id, 0) for r in self._tasks.values()]
+        heapq.heapify(self._heap)
+        self._built_at = time.monotonic()
+        logger.debug(
+            f"Ranked {len(self._tasks)} active tasks in "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session: Session) -> None:
+    if session.in_nested_transaction():
+        return  # a savepoint release; the write is not committed yet
+    for ranker, task in session.info.pop(_PENDING_KEY, ()):
+        ranker.observe(task)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_pending(session: Session) -> None:
+    if not session.in_nested_transaction():
+        session.info.pop(_PENDING_KEY, None)
+
+
+@lru_cache(maxsize=_MAX_OWNERS)
+def get_task_ranker(owner_chat_id: int) -> TaskRanker:
+    """Get the TaskRanker of one owner (it ranks only their tasks).
+
+    Args:
+        owner_chat_id: Telegram chat that owns the tasks.
+
+    Returns:
+        TaskRanker configured from settings.
+    """
+    return TaskRanker(rescore_s=get_settings().task_rank_rescore_s)
@@ -1,28 +1,122 @@
 """Task service for CRUD operations on tasks."""
 
 import logging
-from datetime import datetime
-from typing import Any
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, cast
 
-from sqlalchemy import func, select, or_
+from sqlalchemy import bindparam, func, insert, literal, select, or_, update
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.engine import CursorResult
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, raiseload
 
-from app.models.task import Task
+from app.core.metrics import observe_query
+from app.core.tracing import traced
+from app.models.task import SEARCH_CONFIG, Project, Reminder, TagCount, Task
 
 logger = logging.getLogger(__name__)
 
+# Active-status filter rendered as literals, so the planner can match it to
+# the partial index idx_tasks_owner_active_deadline (bound parameters cannot be)
+_ACTIVE_LITERAL = Task.status.in_(
+    bindparam(
+        "active_statuses",
+        ("todo", "in_progress"),
+        expanding=True,
+        literal_execute=True,
+    )
+)
+
+# Hashtags in task text ("review code #backend"); "#1000001" is a task ID
+HASHTAG_PATTERN = re.compile(r"#([^\W\d_][\w-]*)")
+
+
+def normalize_tags(tags: list[str] | None) -> list[str] | None:
+    """Lowercase tags, drop ``#`` prefixes, blanks and duplicates.
+
+    Args:
+        tags: Tags as typed.
+
+    Returns:
+        Normalized tags in their original order, or None if none remain.
+    """
+    seen: dict[str, None] = {}
+    for tag in tags or ():
+        normalized = tag.strip().lstrip("#").lower()
+        if normalized:
+            seen[normalized] = None
+    return list(seen) or None
+
+
+@dataclass(slots=True)
+class ProjectStats:
+    """Task aggregates of one project (``TaskService.get_project_stats``)."""
+
+    project: Project
+    todo: int
+    in_progress: int
+    done: int
+    cancelled: int
+    overdue: int
+    next_deadline: datetime | None
+
+    @property
+    def active(self) -> int:
+        """Tasks still open (todo + in_progress)."""
+        return self.todo + self.in_progress
+
+    @property
+    def total(self) -> int:
+        """Tasks that count towards progress (all but cancelled)."""
+        return self.active + self.done
+
 
 class TaskService:
-    """Service for managing tasks in the database.
+    """Service for managing one owner's tasks in the database.
+
+    Every query is filtered by ``owner_chat_id`` (the indexes on ``tasks``
+    and ``projects`` lead with it), and created rows belong to that owner.
 
     Args:
         db: Async database session (per-request).
+        owner_chat_id: Telegram chat whose tasks this service sees.
     """
 
-    def __init__(self, db: AsyncSession) -> None:
-        """Initialize task service with database session."""
+    def __init__(self, db: AsyncSession, owner_chat_id: int) -> None:
+        """Initialize task service with database session and owner."""
         self.db = db
+        self.owner_chat_id = owner_chat_id
+        self._owned = Task.owner_chat_id == owner_chat_id
+
+    @traced("TaskService.claim_unowned")
+    @observe_query("TaskService.claim_unowned")
+    async def claim_unowned(self) -> int:
+        """Assign rows created before ownership (owner 0) to this owner.
+
+        Returns:
+            Number of tasks claimed (projects and reminders are claimed too).
+        """
+        claimed = 0
+        for model in (Project, Task, Reminder):
+            result = await self.db.execute(
+                update(model)
+                .where(model.owner_chat_id == 0)
+                .values(owner_chat_id=self.owner_chat_id)
+                .execution_options(synchronize_session=False)
+            )
+            if model is Task:
+                # DML statements return cursor results, which carry rowcount
+                claimed = cast(CursorResult[Any], result).rowcount
+        if claimed:
+            logger.info(
+                f"Claimed {claimed} unowned tasks for chat {self.owner_chat_id}"
+            )
+        return claimed
 
+    @traced("TaskService.create_task")
+    @observe_query("TaskService.create_task")
     async def create_task(
         self,
         content: str,
@@ -31,6 +125,7 @@ class TaskService:
         tags: list[str] | None = None,
         project_id: int | None = None,
         complexity: str | None = None,
+        parent_task_id: int | None = None,
     ) -> Task:
         """Create a new task.
 
@@ -38,20 +133,23 @@ class TaskService:
             content: Task description.
             priority: Priority level 1-5 (default 3).
             deadline: Optional deadline.
-            tags: Optional list of tags.
+            tags: Optional list of tags (normalized, see ``normalize_tags``).
             project_id: Optional project ID.
             complexity: Optional complexity (low, medium, high).
+            parent_task_id: Optional parent, making this a subtask.
 
         Returns:
             The created Task instance.
         """
         task = Task(
+            owner_chat_id=self.owner_chat_id,
             content=content,
             priority=priority,
             deadline=deadline,
-            tags=tags,
+            tags=normalize_tags(tags),
             project_id=project_id,
             complexity=complexity,
+            parent_task_id=parent_task_id,
         )
         self.db.add(task)
         await self.db.flush()
@@ -59,19 +157,128 @@ class TaskService:
         logger.info(f"Created task #{task.id}: {content[:50]}")
         return task
 
-    async def get_task_by_id(self, task_id: int) -> Task | None:
+    @traced("TaskService.create_tasks")
+    @observe_query("TaskService.create_tasks")
+    async def create_tasks(self, tasks: list[dict[str, Any]]) -> list[Task]:
+        """Create several tasks in one multi-row ``INSERT ... RETURNING``.
+
+        Args:
+            tasks: One dict per task with ``create_task`` keyword arguments
+                (``content`` required; the others default as there).
+
+        Returns:
+            The created Task instances, in input order.
+        """
+        if not tasks:
+            return []
+        rows = [
+            {
+                "owner_chat_id": self.owner_chat_id,
+                "content": task["content"],
+                "priority": task.get("priority", 3),
+                "deadline": task.get("deadline"),
+                "tags": normalize_tags(task.get("tags")),
+                "project_id": task.get("project_id"),
+                "complexity": task.get("complexity"),
+                "parent_task_id": task.get("parent_task_id"),
+            }
+            for task in tasks
+        ]
+        result = await self.db.scalars(insert(Task).values(rows).returning(Task))
+        # RETURNING order is unspecified; ids are drawn in VALUES order
+        created = sorted(result.all(), key=lambda task: task.id)
+        logger.info(f"Created {len(created)} tasks: {[t.id for t in created]}")
+        return created
+
+    @traced("TaskService.get_task_by_id")
+    @observe_query("TaskService.get_task_by_id")
+    async def get_task_by_id(
+        self,
+        task_id: int,
+        with_project: bool = False,
+    ) -> Task | None:
         """Get a task by its ID.
 
         Args:
             task_id: Task ID.
+            with_project: Also load ``task.project`` in the same query.
 
         Returns:
-            Task instance or None if not found.
+            Task instance or None if not found. Relationships other than
+            the requested ones are not loaded and raise on access.
         """
-        stmt = select(Task).where(Task.id == task_id)
+        stmt = select(Task).where(Task.id == task_id, self._owned)
+        if with_project:
+            stmt = stmt.options(
+                joinedload(Task.project),
+                raiseload("*"),
+            )
+        else:
+            stmt = stmt.options(raiseload("*"))
         result = await self.db.execute(stmt)
         return result.scalar_one_or_none()
 
+    @traced("TaskService.get_subtree")
+    @observe_query("TaskService.get_subtree")
+    async def get_subtree(
+        self,
+        task_id: int,
+        max_depth: int = 10,
+        limit: int = 200,
+        with_project: bool = False,
+    ) -> list[tuple[Task, int]]:
+        """Get a task and its descendants in one recursive query.
+
+        Args:
+            task_id: Root task ID.
+            max_depth: Deepest level returned (children are depth 1).
+            limit: Maximum rows, root included.
+            with_project: Also load ``task.project`` for every row.
+
+        Returns:
+            ``(task, depth)`` pairs in depth-first order (siblings by ID),
+            the root first; empty if the task does not exist. Relationships
+            other than the requested ones raise on access.
+        """
+        tree = (
+            select(
+                Task.id,
+                literal(0).label("depth"),
+                array([Task.id]).label("path"),
+            )
+            .where(Task.id == task_id, self._owned)
+            .cte("subtree", recursive=True)
+        )
+        child = aliased(Task, name="child")
+        tree = tree.union_all(
+            select(
+                child.id,
+                tree.c.depth + 1,
+                tree.c.path.concat(array([child.id])),
+            ).where(
+                child.parent_task_id == tree.c.id,
+                child.owner_chat_id == self.owner_chat_id,
+                tree.c.depth < max_depth,
+            )
+        )
+        stmt = (
+            select(Task, tree.c.depth)
+            .join(tree, Task.id == tree.c.id)
+            .order_by(tree.c.path)
+            .limit(limit)
+        )
+        if with_project:
+            stmt = stmt.options(
+                joinedload(Task.project),
+                raiseload("*"),
+            )
+        else:
+            stmt = stmt.options(raiseload("*"))
+        result = await self.db.execute(stmt)
+        return [(task, depth) for task, depth in result.tuples()]
+
+    @traced("TaskService.list_tasks_by_status")
+    @observe_query("TaskService.list_tasks_by_status")
     async def list_tasks_by_status(
         self,
         status: str,
@@ -88,13 +295,239 @@ class TaskService:
         """
         stmt = (
             select(Task)
-            .where(Task.status == status)
+            .where(self._owned, Task.status == status)
+            .order_by(Task.priority.asc(), Task.created_at.desc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.search")
+    @observe_query("TaskService.search")
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        statuses: tuple[str, ...] | None = None,
+    ) -> list[Task]:
+        """Full-text search over task content, best match first.
+
+        Uses the GIN-indexed ``tasks.search_vector`` column: the query is
+        parsed with ``websearch_to_tsquery`` (``"exact phrase"``, ``or``,
+        ``-excluded`` work) and matched without diacritics, so
+        "hop khach" finds "Họp khách hàng".
+
+        Args:
+            query: Search text as the user typed it.
+            limit: Maximum number of tasks to return.
+            statuses: Only tasks with these statuses (default: any).
+
+        Returns:
+            Matching tasks ordered by ``ts_rank``, then most recently updated.
+        """
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        rank = func.ts_rank(Task.search_vector, tsquery).label("rank")
+        stmt = (
+            select(Task, rank)
+            .where(self._owned, Task.search_vector.bool_op("@@")(tsquery))
+            .order_by(rank.desc(), Task.updated_at.desc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        if statuses:
+            stmt = stmt.where(Task.status.in_(statuses))
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.match_active")
+    @observe_query("TaskService.match_active")
+    async def match_active(
+        self,
+        query: str,
+        limit: int = 3,
+    ) -> list[tuple[Task, float]]:
+        """Active tasks whose content contains the query words, fuzzily.
+
+        Scores with pg_trgm ``word_similarity`` over diacritic-folded text
+        (served by the ``idx_tasks_content_trgm`` GIN index); tasks below
+        ``pg_trgm.word_similarity_threshold`` (default 0.6) are skipped.
+        Needs the ``pg_trgm`` extension and ``fold_text`` from
+        ``scripts/init.sql``.
+
+        Args:
+            query: How the user referred to the task ("review PR").
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            ``(task, score)`` pairs, best first; scores are in [0, 1].
+        """
+        folded_query = func.fold_text(query)
+        folded_content = func.fold_text(Task.content)
+        score = func.word_similarity(folded_query, folded_content).label("score")
+        stmt = (
+            select(Task, score)
+            .where(
+                self._owned,
+                folded_query.op("<%")(folded_content),
+                Task.status.in_(("todo", "in_progress")),
+            )
+            .order_by(score.desc(), Task.updated_at.desc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return [(task, float(task_score)) for task, task_score in result.tuples()]
+
+    @traced("TaskService.list_tasks_by_tags")
+    @observe_query("TaskService.list_tasks_by_tags")
+    async def list_tasks_by_tags(
+        self,
+        tags: list[str],
+        match_all: bool = True,
+        statuses: tuple[str, ...] | None = ("todo", "in_progress"),
+        limit: int = 20,
+    ) -> list[Task]:
+        """List tasks carrying the given tags (GIN index on ``tasks.tags``).
+
+        Args:
+            tags: Tags to filter by (normalized like stored tags).
+            match_all: Require every tag (``@>``); else any of them (``&&``).
+            statuses: Only tasks with these statuses (None: any).
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            Matching tasks ordered by priority, then newest first.
+        """
+        wanted = normalize_tags(tags)
+        if not wanted:
+            return []
+        tag_filter = (
+            Task.tags.contains(wanted) if match_all else Task.tags.overlap(wanted)
+        )
+        stmt = (
+            select(Task)
+            .where(self._owned, tag_filter)
             .order_by(Task.priority.asc(), Task.created_at.desc())
             .limit(limit)
+            .options(raiseload("*"))
         )
+        if statuses:
+            stmt = stmt.where(Task.status.in_(statuses))
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    @traced("TaskService.get_tag_counts")
+    @observe_query("TaskService.get_tag_counts")
+    async def get_tag_counts(self, limit: int = 50) -> list[TagCount]:
+        """Most used tags, from the trigger-maintained ``tag_counts`` table.
+
+        Args:
+            limit: Maximum number of tags to return.
+
+        Returns:
+            TagCount rows ordered by active tasks, then all tasks.
+        """
+        stmt = (
+            select(TagCount)
+            .where(TagCount.owner_chat_id == self.owner_chat_id)
+            .order_by(
+                TagCount.active_count.desc(),
+                TagCount.task_count.desc(),
+                TagCount.tag.asc(),
+            )
+            .limit(limit)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.get_project_stats")
+    @observe_query("TaskService.get_project_stats")
+    async def get_project_stats(
+        self,
+        project_id: int | None = None,
+        name: str | None = None,
+        include_archived: bool = False,
+        limit: int = 20,
+    ) -> list[ProjectStats]:
+        """Per-project task counts, overdue count and next deadline.
+
+        Aggregated in one ``GROUP BY`` query with ``FILTER`` clauses; no
+        task rows are loaded.
+
+        Args:
+            project_id: Only this project.
+            name: Only projects with this name (case-insensitive).
+            include_archived: Also list archived projects.
+            limit: Maximum projects.
+
+        Returns:
+            Stats per project, most open tasks first.
+        """
+        active = Task.status.in_(("todo", "in_progress"))
+        open_count = func.count(Task.id).filter(active)
+        stmt = (
+            select(
+                Project,
+                func.count(Task.id).filter(Task.status == "todo"),
+                func.count(Task.id).filter(Task.status == "in_progress"),
+                func.count(Task.id).filter(Task.status == "done"),
+                func.count(Task.id).filter(Task.status == "cancelled"),
+                func.count(Task.id).filter(active, Task.deadline < func.now()),
+                func.min(Task.deadline).filter(active, Task.deadline >= func.now()),
+            )
+            .outerjoin(Task, (Task.project_id == Project.id) & self._owned)
+            .where(Project.owner_chat_id == self.owner_chat_id)
+            .group_by(Project.id)
+            .order_by(open_count.desc(), Project.name.asc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        if project_id is not None:
+            stmt = stmt.where(Project.id == project_id)
+        if name is not None:
+            stmt = stmt.where(func.lower(Project.name) == name.strip().lower())
+        if not include_archived and project_id is None:
+            stmt = stmt.where(Project.status != "archived")
+        result = await self.db.execute(stmt)
+        return [ProjectStats(*row) for row in result.all()]
+
+    @traced("TaskService.list_project_tasks")
+    @observe_query("TaskService.list_project_tasks")
+    async def list_project_tasks(
+        self,
+        project_id: int,
+        limit: int = 10,
+    ) -> list[Task]:
+        """Get a project's active tasks, most urgent first.
+
+        Args:
+            project_id: Project ID.
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            Active tasks ordered by priority, then nearest deadline.
+        """
+        stmt = (
+            select(Task)
+            .where(
+                self._owned,
+                Task.project_id == project_id,
+                Task.status.in_(("todo", "in_progress")),
+            )
+            .order_by(
+                Task.priority.asc(),
+                Task.deadline.asc().nulls_last(),
+                Task.created_at.desc(),
+            )
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.get_active_tasks")
+    @observe_query("TaskService.get_active_tasks")
     async def get_active_tasks(self, limit: int = 20) -> list[Task]:
         """Get active tasks (todo + in_progress).
 
@@ -106,13 +539,105 @@ class TaskService:
         """
         stmt = (
             select(Task)
-            .where(or_(Task.status == "todo", Task.status == "in_progress"))
+            .where(
+                self._owned,
+                or_(Task.status == "todo", Task.status == "in_progress"),
+            )
             .order_by(Task.priority.asc(), Task.created_at.desc())
             .limit(limit)
+            .options(raiseload("*"))
         )
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    @traced("TaskService.get_focus_tasks")
+    @observe_query("TaskService.get_focus_tasks")
+    async def get_focus_tasks(self, limit: int = 5) -> list[Task]:
+        """Get the most important active tasks for today's focus.
+
+        Args:
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            Active tasks ordered by priority, then nearest deadline.
+        """
+        stmt = (
+            select(Task)
+            .where(self._owned, Task.status.in_(("todo", "in_progress")))
+            .order_by(
+                Task.priority.asc(),
+                Task.deadline.asc().nulls_last(),
+                Task.created_at.desc(),
+            )
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.get_overdue_tasks")
+    @observe_query("TaskService.get_overdue_tasks")
+    async def get_overdue_tasks(
+        self,
+        before: datetime,
+        limit: int = 50,
+    ) -> list[Task]:
+        """Get active tasks whose deadline has passed.
+
+        Args:
+            before: Cutoff; tasks with ``deadline < before`` are overdue.
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            Overdue tasks, oldest deadline first.
+        """
+        stmt = (
+            select(Task)
+            .where(self._owned, _ACTIVE_LITERAL, Task.deadline < before)
+            .order_by(Task.deadline.asc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.get_tasks_due")
+    @observe_query("TaskService.get_tasks_due")
+    async def get_tasks_due(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: int = 50,
+    ) -> list[Task]:
+        """Get active tasks with a deadline in ``[start, end)``.
+
+        A range scan on the partial index over active deadlines.
+
+        Args:
+            start: Window start (inclusive).
+            end: Window end (exclusive).
+            limit: Maximum number of tasks to return.
+
+        Returns:
+            Tasks due in the window, nearest deadline first.
+        """
+        stmt = (
+            select(Task)
+            .where(
+                self._owned,
+                _ACTIVE_LITERAL,
+                Task.deadline >= start,
+                Task.deadline < end,
+            )
+            .order_by(Task.deadline.asc(), Task.priority.asc())
+            .limit(limit)
+            .options(raiseload("*"))
+        )
+        result = await self.db.execute(stmt)
+        return list(result.scalars().all())
+
+    @traced("TaskService.count_tasks_by_status")
+    @observe_query("TaskService.count_tasks_by_status")
     async def count_tasks_by_status(self) -> dict[str, int]:
         """Count tasks grouped by status.
 
@@ -121,11 +646,59 @@ class TaskService:
         """
         stmt = (
             select(Task.status, func.count(Task.id))
+            .where(self._owned)
             .group_by(Task.status)
         )
         result = await self.db.execute(stmt)
         return dict(result.all())
 
+    @traced("TaskService.count_completed_by_day")
+    @observe_query("TaskService.count_completed_by_day")
+    async def count_completed_by_day(
+        self,
+        since: datetime,
+        timezone: str,
+    ) -> dict[date, int]:
+        """Count tasks marked done per local day.
+
+        Uses ``updated_at`` of done tasks as the completion time.
+
+        Args:
+            since: Only count completions at or after this time.
+            timezone: IANA timezone that defines day boundaries.
+
+        Returns:
+            Dict mapping local date to number of tasks completed.
+        """
+        day = func.date(func.timezone(timezone, Task.updated_at))
+        stmt = (
+            select(day, func.count(Task.id))
+            .where(self._owned, Task.status == "done", Task.updated_at >= since)
+            .group_by(day)
+        )
+        result = await self.db.execute(stmt)
+        return dict(result.all())
+
+    @traced("TaskService.count_overdue")
+    @observe_query("TaskService.count_overdue")
+    async def count_overdue(self, before: datetime) -> int:
+        """Count active tasks whose deadline has passed.
+
+        Args:
+            before: Cutoff; tasks with ``deadline < before`` are overdue.
+
+        Returns:
+            Number of overdue tasks.
+        """
+        stmt = select(func.count(Task.id)).where(
+            self._owned,
+            _ACTIVE_LITERAL,
+            Task.deadline < before,
+        )
+        return (await self.db.execute(stmt)).scalar_one()
+
+    @traced("TaskService.update_task")
+    @observe_query("TaskService.update_task")
     async def update_task(self, task_id: int, **fields: Any) -> Task | None:
         """Update a task's fields.
 
@@ -134,16 +707,29 @@ class TaskService:
             **fields: Fields to update (status, priority, deadline, etc.).
 
         Returns:
-            Updated Task instance or None if not found.
+            Updated Task instance, or None if the task, or the project given
+            as ``project_id``, is not found for this owner.
         """
         task = await self.get_task_by_id(task_id)
         if task is None:
             return None
+        project_id = fields.get("project_id")
+        if project_id is not None:
+            owned = await self.db.scalar(
+                select(Project.id).where(
+                    Project.id == project_id,
+                    Project.owner_chat_id == self.owner_chat_id,
+                )
+            )
+            if owned is None:
+                return None
 
         allowed_fields = {"status", "priority", "deadline", "tags", "content",
                           "complexity", "project_id"}
         for key, value in fields.items():
             if key in allowed_fields:
+                if key == "tags":
+                    value = normalize_tags(value)
                 setattr(task, key, value)
 
         await self.db.flush()
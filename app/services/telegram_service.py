@@ -1,30 +1,57 @@
 """Telegram bot service for sending messages."""
 
 import logging
-from typing import Any
+import time
+from typing import IO, Any
 
 import httpx
 
+from app.core import metrics
 from app.core.config import get_settings
+from app.core.tracing import traced
 
 logger = logging.getLogger(__name__)
-settings = get_settings()
+
+# Shared pooled client: keeps TLS connections to the Bot API alive across
+# requests instead of reconnecting per message.
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client for the Telegram Bot API."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=30.0)
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 
 class TelegramService:
     """Service for interacting with Telegram Bot API."""
 
-    BASE_URL = "https://api.telegram.org"
-
     def __init__(self, bot_token: str | None = None) -> None:
         """Initialize Telegram service.
 
         Args:
             bot_token: Telegram bot token. Defaults to settings value.
         """
+        settings = get_settings()
         self.bot_token = bot_token or settings.telegram_bot_token
-        self.api_url = f"{self.BASE_URL}/bot{self.bot_token}"
+        self.base_url = settings.telegram_api_base_url
+        self.api_url = f"{self.base_url}/bot{self.bot_token}"
 
+    async def preconnect(self) -> None:
+        """Open a pooled connection to the Bot API host (TLS handshake included)."""
+        await get_http_client().head(self.base_url, timeout=5.0)
+
+    @traced("TelegramService.send_message")
     async def send_message(
         self,
         chat_id: int,
@@ -52,14 +79,102 @@ class TelegramService:
         if reply_markup:
             payload["reply_markup"] = reply_markup
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().post(
                 f"{self.api_url}/sendMessage",
                 json=payload,
                 timeout=30.0,
             )
             response.raise_for_status()
-            return response.json()
+            body: dict[str, Any] = response.json()
+            return body
+        except Exception:
+            metrics.TELEGRAM_ERRORS_BY_METHOD["sendMessage"].inc()
+            raise
+        finally:
+            metrics.TELEGRAM_LATENCY_BY_METHOD["sendMessage"].observe(
+                time.perf_counter() - started
+            )
+
+    @traced("TelegramService.send_document")
+    async def send_document(
+        self,
+        chat_id: int,
+        filename: str,
+        document: IO[bytes],
+        caption: str | None = None,
+    ) -> dict[str, Any]:
+        """Upload a file to a Telegram chat (Bot API limit: 50 MB).
+
+        Args:
+            chat_id: Target chat ID.
+            filename: File name shown in the chat.
+            document: Open binary file, read as the upload streams.
+            caption: Optional caption.
+
+        Returns:
+            Telegram API response.
+        """
+        data: dict[str, Any] = {"chat_id": str(chat_id)}
+        if caption:
+            data["caption"] = caption
+
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().post(
+                f"{self.api_url}/sendDocument",
+                data=data,
+                files={"document": (filename, document)},
+                timeout=120.0,
+            )
+            response.raise_for_status()
+            body: dict[str, Any] = response.json()
+            return body
+        except Exception:
+            metrics.TELEGRAM_ERRORS_BY_METHOD["sendDocument"].inc()
+            raise
+        finally:
+            metrics.TELEGRAM_LATENCY_BY_METHOD["sendDocument"].observe(
+                time.perf_counter() - started
+            )
+
+    @traced("TelegramService.answer_callback_query")
+    async def answer_callback_query(
+        self,
+        callback_query_id: str,
+        text: str | None = None,
+    ) -> dict[str, Any]:
+        """Acknowledge an inline button press (stops the client's spinner).
+
+        Args:
+            callback_query_id: ID of the ``callback_query`` update.
+            text: Optional short notification shown to the user.
+
+        Returns:
+            Telegram API response.
+        """
+        payload: dict[str, Any] = {"callback_query_id": callback_query_id}
+        if text:
+            payload["text"] = text
+
+        started = time.perf_counter()
+        try:
+            response = await get_http_client().post(
+                f"{self.api_url}/answerCallbackQuery",
+                json=payload,
+                timeout=30.0,
+            )
+            response.raise_for_status()
+            body: dict[str, Any] = response.json()
+            return body
+        except Exception:
+            metrics.TELEGRAM_ERRORS_BY_METHOD["answerCallbackQuery"].inc()
+            raise
+        finally:
+            metrics.TELEGRAM_LATENCY_BY_METHOD["answerCallbackQuery"].observe(
+                time.perf_counter() - started
+            )
 
     async def set_webhook(
         self,
@@ -79,14 +194,14 @@ class TelegramService:
         if secret_token:
             payload["secret_token"] = secret_token
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_url}/setWebhook",
-                json=payload,
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_http_client().post(
+            f"{self.api_url}/setWebhook",
+            json=payload,
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        body: dict[str, Any] = response.json()
+        return body
 
     async def delete_webhook(self) -> dict[str, Any]:
         """Delete the current webhook.
@@ -94,13 +209,13 @@ class TelegramService:
         Returns:
             Telegram API response.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.api_url}/deleteWebhook",
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_http_client().post(
+            f"{self.api_url}/deleteWebhook",
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        body: dict[str, Any] = response.json()
+        return body
 
     async def get_webhook_info(self) -> dict[str, Any]:
         """Get current webhook info.
@@ -108,10 +223,10 @@ class TelegramService:
         Returns:
             Telegram API response with webhook info.
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.api_url}/getWebhookInfo",
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_http_client().get(
+            f"{self.api_url}/getWebhookInfo",
+            timeout=30.0,
+        )
+        response.raise_for_status()
+        body: dict[str, Any] = response.json()
+        return body
@@ -0,0 +1,62 @@
+"""User state service for the ``user_state`` key-value store."""
+
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.metrics import observe_query
+from app.core.tracing import traced
+from app.models.user_state import UserState
+
+
+class UserStateService:
+    """Service for reading and writing user state keys (incl. job watermarks)."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        """Initialize user state service with database session.
+
+        Args:
+            db: Async database session.
+        """
+        self.db = db
+
+    @traced("UserStateService.get_many")
+    @observe_query("UserStateService.get_many")
+    async def get_many(self, keys: list[str]) -> dict[str, Any]:
+        """Get the values of several keys in one query.
+
+        Args:
+            keys: Keys to look up.
+
+        Returns:
+            Dict of key -> value for the keys that exist.
+        """
+        if not keys:
+            return {}
+        result = await self.db.execute(
+            select(UserState.key, UserState.value).where(UserState.key.in_(keys))
+        )
+        return dict(result.all())
+
+    @traced("UserStateService.set")
+    @observe_query("UserStateService.set")
+    async def set(self, key: str, value: Any, confidence: float = 1.0) -> None:
+        """Insert or overwrite a key.
+
+        Args:
+            key: State key.
+            value: JSON-serializable value.
+            confidence: Confidence of an inferred value.
+        """
+        stmt = insert(UserState).values(key=key, value=value, confidence=confidence)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserState.key],
+            set_={
+                "value": stmt.excluded.value,
+                "confidence": stmt.excluded.confidence,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        await self.db.execute(stmt)
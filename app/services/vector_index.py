@@ -0,0 +1,518 @@
+"""Embedded vector store: a memory-mapped float16 matrix searched with NumPy.
+
+Meant for single-node deployments where running Qdrant costs more memory
+than the data is worth. Layout under the index directory:
+
+- ``vectors.f16``: ``(capacity, dim)`` float16 rows, memory-mapped and grown
+  by doubling; only pages touched by a query are resident;
+- ``payloads.jsonl``: append-only log of ``{"row", "id", "payload"}``; the
+  last entry per row wins on load, and the log is compacted when it grows
+  to twice the row count;
+- ``ivf.npz``: coarse centroids and row assignments for approximate search;
+- ``meta.json``: dim and committed row count, written last on every upsert
+  so a crash mid-write loses at most the unacknowledged batch.
+
+Search is exact (chunked float32 dot products over unit vectors) below
+``ann_min_vectors`` rows. Above it, an inverted-file (IVF) index built with
+spherical k-means narrows the scan to the ``nprobe`` closest clusters;
+appended rows are assigned to their nearest centroid immediately and the
+centroids are retrained when the index has grown 4x since training.
+
+The index is owned by one process: the app's scheduler runs ingestion
+in-process, so readers and the writer share this object's state.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+
+from app.services.vector_store import SHARED_OWNER, SearchHit, VectorPoint
+
+logger = logging.getLogger(__name__)
+
+_VECTORS_FILE = "vectors.f16"
+_PAYLOADS_FILE = "payloads.jsonl"
+_IVF_FILE = "ivf.npz"
+_META_FILE = "meta.json"
+_INITIAL_CAPACITY = 1024
+# Rows converted to float32 per step of an exact scan (~25 MB at dim 384)
+_SCAN_CHUNK = 16384
+_KMEANS_ITERATIONS = 8
+_KMEANS_SAMPLE_PER_LIST = 64
+_RETRAIN_GROWTH = 4
+# Owner column value of rows without an owner in their payload (never matches)
+_NO_OWNER = np.iinfo(np.int64).min
+
+
+def _normalize(vectors: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    out = np.zeros_like(vectors)
+    np.divide(vectors, norms, out=out, where=norms > 0)
+    return out
+
+
+def _top_k(scores: npt.NDArray[np.float32], k: int) -> npt.NDArray[np.intp]:
+    """Indices of the ``k`` largest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+class EmbeddedVectorStore:
+    """In-process vector store over a memory-mapped float16 matrix."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        ann_min_vectors: int = 50_000,
+        nprobe: int = 16,
+    ) -> None:
+        """Open (or lazily create) the index directory.
+
+        Args:
+            path: Index directory.
+            ann_min_vectors: Row count from which approximate (IVF) search is
+                used; 0 disables it.
+            nprobe: Clusters scanned per approximate query.
+        """
+        self.path = Path(path)
+        self.ann_min_vectors = ann_min_vectors
+        self.nprobe = nprobe
+        self._lock = threading.RLock()
+
+        self.dim = 0
+        self._count = 0
+        self._capacity = 0
+        self._vectors: np.memmap[Any, np.dtype[np.float16]] | None = None
+        self._ids: list[str] = []
+        self._row_of: dict[str, int] = {}
+        self._payloads: list[dict[str, Any]] = []
+        self._log_lines = 0
+
+        # Filter columns: source code and owner per row, rows per tag
+        self._source_codes = np.zeros(0, dtype=np.int16)
+        self._owners = np.zeros(0, dtype=np.int64)
+        self._source_ids: dict[str, int] = {}
+        self._tag_rows: dict[str, set[int]] = {}
+
+        # IVF state
+        self._centroids: npt.NDArray[np.float32] | None = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_count = 0
+        self._order: npt.NDArray[np.intp] | None = None
+        self._offsets: npt.NDArray[Any] | None = None
+
+        if (self.path / _META_FILE).exists():
+            self._load()
+
+    # -- VectorStore API ---------------------------------------------------
+
+    async def ensure_collection(self, dim: int) -> None:
+        """Create the index files for ``dim`` if missing."""
+        await asyncio.to_thread(self.ensure_collection_sync, dim)
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        """Insert or replace points by id."""
+        if points:
+            await asyncio.to_thread(self.upsert_sync, points)
+
+    async def search(
+        self,
+        vector: npt.NDArray[np.float32],
+        limit: int = 10,
+        sources: list[str] | None = None,
+        tags: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """Cosine top-k with optional source/tag/owner filters."""
+        return await asyncio.to_thread(
+            self.search_sync, vector, limit, sources, tags, owner_chat_id
+        )
+
+    async def close(self) -> None:
+        """Flush the memory map."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def __len__(self) -> int:
+        """Number of stored vectors."""
+        return self._count
+
+    # -- writes ------------------------------------------------------------
+
+    def ensure_collection_sync(self, dim: int) -> None:
+        """Create the index files for ``dim`` if missing (blocking)."""
+        with self._lock:
+            if self.dim:
+                if self.dim != dim:
+                    raise ValueError(
+                        f"Vector index at {self.path} has dim {self.dim}, got {dim}"
+                    )
+                return
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.dim = dim
+            self._grow(_INITIAL_CAPACITY)
+            self._write_meta()
+            logger.info(f"Created embedded vector index at {self.path} (dim={dim})")
+
+    def upsert_sync(self, points: list[VectorPoint]) -> None:
+        """Insert or replace points by id (blocking)."""
+        with self._lock:
+            if not self.dim:
+                self.ensure_collection_sync(len(points[0].vector))
+            vectors = _normalize(np.stack([p.vector for p in points]))
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected dim {self.dim}, got {vectors.shape[1]}")
+
+            # Later duplicates in the same batch win, as with sequential upserts
+            rows = np.empty(len(points), dtype=np.int64)
+            new_rows = 0
+            for i, point in enumerate(points):
+                row = self._row_of.get(point.id)
+                if row is None:
+                    row = self._count + new_rows
+                    self._row_of[point.id] = row
+                    self._ids.append(point.id)
+                    self._payloads.append({})
+                    new_rows += 1
+                rows[i] = row
+            needed = self._count + new_rows
+            if needed > self._capacity:
+                self._grow(max(needed, self._capacity * 2))
+
+            assert self._vectors is not None
+            self._vectors[rows] = vectors.astype(np.float16)
+            self._vectors.flush()
+            for point, stored_row in zip(points, rows.tolist(), strict=True):
+                self._set_payload(stored_row, point.payload)
+            self._append_log(points, rows)
+            self._count = needed
+
+            if self._centroids is not None:
+                self._assign_rows(rows, vectors)
+            self._maybe_train()
+            self._write_meta()
+            if self._log_lines > 2 * self._count + _INITIAL_CAPACITY:
+                self._compact_log()
+
+    def _grow(self, capacity: int) -> None:
+        """Resize the vector file and remap it."""
+        file = self.path / _VECTORS_FILE
+        if self._vectors is not None:
+            self._vectors.flush()
+            del self._vectors
+        with open(file, "ab") as f:
+            f.truncate(capacity * self.dim * 2)
+        self._vectors = np.memmap(
+            file, dtype=np.float16, mode="r+", shape=(capacity, self.dim)
+        )
+        self._capacity = capacity
+        codes = np.zeros(capacity, dtype=np.int16)
+        codes[: len(self._source_codes)] = self._source_codes[:capacity]
+        self._source_codes = codes
+        owners = np.full(capacity, _NO_OWNER, dtype=np.int64)
+        owners[: len(self._owners)] = self._owners[:capacity]
+        self._owners = owners
+        assign = np.zeros(capacity, dtype=np.int32)
+        assign[: len(self._assign)] = self._assign[:capacity]
+        self._assign = assign
+
+    def _set_payload(self, row: int, payload: dict[str, Any]) -> None:
+        for tag in self._payloads[row].get("tags") or ():
+            self._tag_rows.get(tag, set()).discard(row)
+        self._payloads[row] = payload
+        source = payload.get("source")
+        if source is None:
+            self._source_codes[row] = 0
+        else:
+            code = self._source_ids.setdefault(source, len(self._source_ids) + 1)
+            self._source_codes[row] = code
+        owner = payload.get("owner_chat_id")
+        self._owners[row] = _NO_OWNER if owner is None else owner
+        for tag in payload.get("tags") or ():
+            self._tag_rows.setdefault(tag, set()).add(row)
+
+    def _append_log(self, points: list[VectorPoint], rows: npt.NDArray[Any]) -> None:
+        lines = [
+            json.dumps(
+                {"row": row, "id": point.id, "payload": point.payload},
+                ensure_ascii=False,
+                default=str,
+            )
+            for point, row in zip(points, rows.tolist(), strict=True)
+        ]
+        with open(self.path / _PAYLOADS_FILE, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._log_lines += len(lines)
+
+    def _compact_log(self) -> None:
+        tmp = self.path / f"{_PAYLOADS_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for row in range(self._count):
+                f.write(
+                    json.dumps(
+                        {
+                            "row": row,
+                            "id": self._ids[row],
+                            "payload": self._payloads[row],
+                        },
+                        ensure_ascii=False,
+                        default=str,
+                    )
+                    + "\n"
+                )
+        os.replace(tmp, self.path / _PAYLOADS_FILE)
+        self._log_lines = self._count
+
+    def _write_meta(self) -> None:
+        tmp = self.path / f"{_META_FILE}.tmp"
+        tmp.write_text(json.dumps({"dim": self.dim, "count": self._count}))
+        os.replace(tmp, self.path / _META_FILE)
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        meta = json.loads((self.path / _META_FILE).read_text())
+        self.dim = int(meta["dim"])
+        count = int(meta["count"])
+        file = self.path / _VECTORS_FILE
+        self._grow(max(file.stat().st_size // (self.dim * 2), _INITIAL_CAPACITY))
+
+        self._ids = [""] * count
+        self._payloads = [{} for _ in range(count)]
+        payload_file = self.path / _PAYLOADS_FILE
+        if payload_file.exists():
+            with open(payload_file, encoding="utf-8") as f:
+                for line in f:
+                    self._log_lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn tail of an interrupted write
+                    row = entry["row"]
+                    if row < count:
+                        self._ids[row] = entry["id"]
+                        self._set_payload(row, entry["payload"])
+        self._row_of = {point_id: row for row, point_id in enumerate(self._ids)}
+        self._count = count
+
+        ivf_file = self.path / _IVF_FILE
+        if ivf_file.exists():
+            data = np.load(ivf_file)
+            self._centroids = data["centroids"]
+            self._trained_count = int(data["trained_count"])
+            saved = data["assign"][:count]
+            self._assign[: len(saved)] = saved
+            if len(saved) < count:
+                rows = np.arange(len(saved), count)
+                self._assign_rows(rows, self._rows_f32(rows))
+        logger.info(
+            f"Loaded embedded vector index: {count} vectors "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+
+    # -- IVF ---------------------------------------------------------------
+
+    def _rows_f32(self, rows: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+        assert self._vectors is not None
+        return np.asarray(self._vectors[rows], dtype=np.float32)
+
+    def _maybe_train(self) -> None:
+        if not self.ann_min_vectors or self._count < self.ann_min_vectors:
+            return
+        if self._centroids is not None and (
+            self._count < self._trained_count * _RETRAIN_GROWTH
+        ):
+            self._save_ivf()
+            return
+        self.train()
+
+    def train(self) -> None:
+        """(Re)build the IVF index with spherical k-means over all rows."""
+        with self._lock:
+            started = time.perf_counter()
+            n = self._count
+            n_lists = int(np.clip(np.sqrt(n), 16, 4096))
+            rng = np.random.default_rng(0)
+            sample_size = min(n, n_lists * _KMEANS_SAMPLE_PER_LIST)
+            sample = self._rows_f32(
+                np.sort(rng.choice(n, size=sample_size, replace=False))
+            )
+            centroids = sample[rng.choice(sample_size, size=n_lists, replace=False)]
+            for _ in range(_KMEANS_ITERATIONS):
+                labels = np.argmax(sample @ centroids.T, axis=1)
+                counts = np.bincount(labels, minlength=n_lists)
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+                empty = counts == 0
+                sums = np.zeros_like(centroids)
+                sums[~empty] = np.add.reduceat(
+                    sample[np.argsort(labels, kind="stable")], starts[~empty], axis=0
+                )
+                # Re-seed empty clusters from random sample points
+                sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+                centroids = _normalize(sums)
+
+            self._centroids = centroids
+            self._trained_count = n
+            for start in range(0, n, _SCAN_CHUNK):
+                rows = np.arange(start, min(start + _SCAN_CHUNK, n))
+                self._assign_rows(rows, self._rows_f32(rows))
+            self._save_ivf()
+            logger.info(
+                f"Trained IVF index: {n_lists} lists over {n} vectors "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+    def _assign_rows(
+        self, rows: npt.NDArray[Any], vectors: npt.NDArray[np.float32]
+    ) -> None:
+        assert self._centroids is not None
+        self._assign[rows] = np.argmax(vectors @ self._centroids.T, axis=1)
+        self._order = None
+
+    def _save_ivf(self) -> None:
+        assert self._centroids is not None
+        tmp = self.path / f"{_IVF_FILE}.tmp.npz"
+        np.savez(
+            tmp,
+            centroids=self._centroids,
+            assign=self._assign[: self._count],
+            trained_count=self._trained_count,
+        )
+        os.replace(tmp, self.path / _IVF_FILE)
+
+    def _inverted_lists(self) -> tuple[npt.NDArray[np.intp], npt.NDArray[Any]]:
+        """Rows grouped by cluster (rebuilt lazily after writes)."""
+        if self._order is None or self._offsets is None:
+            assert self._centroids is not None
+            assign = self._assign[: self._count]
+            self._order = np.argsort(assign, kind="stable")
+            self._offsets = np.concatenate(
+                ([0], np.cumsum(np.bincount(assign, minlength=len(self._centroids))))
+            )
+        return self._order, self._offsets
+
+    # -- search ------------------------------------------------------------
+
+    def search_sync(
+        self,
+        vector: npt.NDArray[np.float32],
+        limit: int = 10,
+        sources: list[str] | None = None,
+        tags: list[str] | None = None,
+        owner_chat_id: int | None = None,
+        exact: bool = False,
+    ) -> list[SearchHit]:
+        """Cosine top-k (blocking).
+
+        Args:
+            vector: Query vector.
+            limit: Maximum hits.
+            sources: Restrict to these payload sources.
+            tags: Restrict to points carrying any of these tags.
+            owner_chat_id: Restrict to this owner's points and shared ones.
+            exact: Force a full scan even when the IVF index is available.
+
+        Returns:
+            Hits, best first.
+        """
+        with self._lock:
+            if not self._count or limit <= 0:
+                return []
+            query = _normalize(vector).reshape(-1)
+            mask = self._filter_mask(sources, tags, owner_chat_id)
+            candidates: npt.NDArray[Any] | None = None
+            if mask is not None:
+                candidates = np.flatnonzero(mask)
+                if not len(candidates):
+                    return []
+
+            use_ann = (
+                not exact
+                and self._centroids is not None
+                and (candidates is None or len(candidates) >= self.ann_min_vectors)
+            )
+            if use_ann:
+                probed = self._probe(query)
+                candidates = (
+                    probed if mask is None else probed[mask[probed]]
+                )  # IVF lists ∩ filter
+                if len(candidates) < limit:
+                    return self.search_sync(
+                        vector, limit, sources, tags, owner_chat_id, exact=True
+                    )
+
+            if candidates is None:
+                scores = self._scan_all(query)
+                best = _top_k(scores, limit)
+                rows = best
+            else:
+                scores = self._rows_f32(candidates) @ query
+                best = _top_k(scores, limit)
+                rows = candidates[best]
+            return [
+                SearchHit(
+                    id=self._ids[row],
+                    score=float(scores[i]),
+                    payload=self._payloads[row],
+                )
+                for i, row in zip(best.tolist(), rows.tolist(), strict=True)
+            ]
+
+    def _filter_mask(
+        self,
+        sources: list[str] | None,
+        tags: list[str] | None,
+        owner_chat_id: int | None = None,
+    ) -> npt.NDArray[np.bool_] | None:
+        if not sources and not tags and owner_chat_id is None:
+            return None
+        mask = np.ones(self._count, dtype=bool)
+        if owner_chat_id is not None:
+            owners = self._owners[: self._count]
+            mask &= (owners == owner_chat_id) | (owners == SHARED_OWNER)
+        if sources:
+            codes = [self._source_ids[s] for s in sources if s in self._source_ids]
+            mask &= np.isin(self._source_codes[: self._count], codes)
+        if tags:
+            tagged = np.zeros(self._count, dtype=bool)
+            for tag in tags:
+                rows = self._tag_rows.get(tag)
+                if rows:
+                    tagged[np.fromiter(rows, dtype=np.int64, count=len(rows))] = True
+            mask &= tagged
+        return mask
+
+    def _scan_all(self, query: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        assert self._vectors is not None
+        scores = np.empty(self._count, dtype=np.float32)
+        buffer = np.empty((min(_SCAN_CHUNK, self._count), self.dim), np.float32)
+        for start in range(0, self._count, _SCAN_CHUNK):
+            stop = min(start + _SCAN_CHUNK, self._count)
+            chunk = buffer[: stop - start]
+            chunk[:] = self._vectors[start:stop]
+            np.matmul(chunk, query, out=scores[start:stop])
+        return scores
+
+    def _probe(self, query: npt.NDArray[np.float32]) -> npt.NDArray[np.intp]:
+        """Rows in the ``nprobe`` clusters closest to the query, ascending."""
+        assert self._centroids is not None
+        order, offsets = self._inverted_lists()
+        nprobe = min(self.nprobe, len(self._centroids))
+        lists = _top_k(self._centroids @ query, nprobe)
+        rows: npt.NDArray[np.intp] = np.concatenate(
+            [order[offsets[c] : offsets[c + 1]] for c in lists]
+        )
+        # Ascending rows turn the gather into forward reads of the memmap
+        rows.sort()
+        return rows
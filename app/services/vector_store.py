@@ -0,0 +1,201 @@
+"""Vector store interface and backends.
+
+``VECTOR_BACKEND`` selects Qdrant (``QdrantVectorStore``) or the in-process
+index (``app.services.vector_index.EmbeddedVectorStore``).
+"""
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Protocol
+
+import numpy as np
+import numpy.typing as npt
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = "lazy_tasks_memory"
+_UPSERT_BATCH = 256
+# Payload owner of points every owner may retrieve (documents have no owner)
+SHARED_OWNER = -1
+
+
+@dataclass(slots=True)
+class VectorPoint:
+    """A vector with its payload.
+
+    Payload keys follow the documented schema: ``source`` (chat_log,
+    document, task), ``source_id``, ``owner_chat_id`` (``SHARED_OWNER`` for
+    documents), ``content_preview``, ``timestamp``, ``tags``.
+    """
+
+    id: str
+    vector: npt.NDArray[np.float32]
+    payload: dict[str, Any]
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """A search result, best first."""
+
+    id: str
+    score: float
+    payload: dict[str, Any]
+
+
+class VectorStore(Protocol):
+    """Storage and similarity search over embedded points."""
+
+    async def ensure_collection(self, dim: int) -> None:
+        """Create the collection/index if missing."""
+        ...
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        """Insert or replace points by id."""
+        ...
+
+    async def search(
+        self,
+        vector: npt.NDArray[np.float32],
+        limit: int = 10,
+        sources: list[str] | None = None,
+        tags: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """Cosine top-k, optionally restricted to sources and/or any of tags.
+
+        ``owner_chat_id`` restricts hits to that owner's points and shared
+        ones (``SHARED_OWNER``).
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release resources."""
+        ...
+
+
+class QdrantVectorStore:
+    """Vector store backed by a Qdrant server (``QDRANT_URL``)."""
+
+    def __init__(self, url: str, collection: str = COLLECTION) -> None:
+        """Initialize the client (no connection is made yet).
+
+        Args:
+            url: Qdrant URL, or ``:memory:`` for the embedded local mode.
+            collection: Collection name.
+        """
+        # Deferred: qdrant_client pulls in grpc/protobuf at import
+        from qdrant_client import AsyncQdrantClient
+
+        self.collection = collection
+        if url == ":memory:":
+            self._client = AsyncQdrantClient(location=url)
+        else:
+            self._client = AsyncQdrantClient(url=url)
+
+    async def ensure_collection(self, dim: int) -> None:
+        """Create the collection and payload indexes if missing."""
+        from qdrant_client import models
+
+        if await self._client.collection_exists(self.collection):
+            return
+        await self._client.create_collection(
+            collection_name=self.collection,
+            vectors_config=models.VectorParams(
+                size=dim,
+                distance=models.Distance.COSINE,
+                on_disk=True,
+            ),
+        )
+        for field in ("source", "tags"):
+            await self._client.create_payload_index(
+                collection_name=self.collection,
+                field_name=field,
+                field_schema=models.PayloadSchemaType.KEYWORD,
+            )
+        await self._client.create_payload_index(
+            collection_name=self.collection,
+            field_name="owner_chat_id",
+            field_schema=models.PayloadSchemaType.INTEGER,
+        )
+        logger.info(f"Created Qdrant collection {self.collection} (dim={dim})")
+
+    async def upsert(self, points: list[VectorPoint]) -> None:
+        """Upsert points in bulk requests."""
+        from qdrant_client import models
+
+        for start in range(0, len(points), _UPSERT_BATCH):
+            chunk = points[start : start + _UPSERT_BATCH]
+            await self._client.upsert(
+                collection_name=self.collection,
+                points=models.Batch(
+                    ids=[p.id for p in chunk],
+                    vectors=np.stack([p.vector for p in chunk]).tolist(),
+                    payloads=[p.payload for p in chunk],
+                ),
+                wait=True,
+            )
+
+    async def search(
+        self,
+        vector: npt.NDArray[np.float32],
+        limit: int = 10,
+        sources: list[str] | None = None,
+        tags: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """Cosine top-k with optional source/tag/owner filters."""
+        from qdrant_client import models
+
+        conditions: list[models.Condition] = []
+        if sources:
+            conditions.append(
+                models.FieldCondition(key="source", match=models.MatchAny(any=sources))
+            )
+        if tags:
+            conditions.append(
+                models.FieldCondition(key="tags", match=models.MatchAny(any=tags))
+            )
+        if owner_chat_id is not None:
+            conditions.append(
+                models.FieldCondition(
+                    key="owner_chat_id",
+                    match=models.MatchAny(any=[owner_chat_id, SHARED_OWNER]),
+                )
+            )
+        response = await self._client.query_points(
+            collection_name=self.collection,
+            query=np.asarray(vector, dtype=np.float32).tolist(),
+            query_filter=models.Filter(must=conditions) if conditions else None,
+            limit=limit,
+            with_payload=True,
+        )
+        return [
+            SearchHit(id=str(p.id), score=p.score, payload=p.payload or {})
+            for p in response.points
+        ]
+
+    async def close(self) -> None:
+        """Close the client."""
+        await self._client.close()
+
+
+@lru_cache
+def get_vector_store() -> VectorStore:
+    """Get the configured vector store singleton.
+
+    Returns:
+        VectorStore for the configured ``VECTOR_BACKEND``.
+    """
+    settings = get_settings()
+    if settings.vector_backend == "embedded":
+        from app.services.vector_index import EmbeddedVectorStore
+
+        return EmbeddedVectorStore(
+            settings.vector_index_path,
+            ann_min_vectors=settings.vector_ann_min_vectors,
+            nprobe=settings.vector_ann_nprobe,
+        )
+    return QdrantVectorStore(settings.qdrant_url)
@@ -0,0 +1,404 @@
+"""Daily briefing fan-out job.
+
+Renders ``daily_briefing.jinja2`` for every recipient chat and sends it:
+
+1. Recipients (owner chat + recently active chats) and their watermarks are
+   loaded with one query each; chats already briefed today are skipped.
+2. Briefing data is loaded with set-based queries covering all recipients
+   at once (``owner_chat_id = ANY(:ids)``), grouped by chat in Python.
+3. Optional LLM insights run under a semaphore, templates render
+   concurrently off the event loop.
+4. Delivery is paced by a token bucket below the Bot API rate limit.
+
+Each chat's watermark (``briefing_sent:<chat_id>`` in ``user_state``) is
+written right after its message is sent, so a crashed run can be re-run: it
+resumes with the chats that were not reached, at worst re-sending the one
+message that was in flight. A Postgres advisory lock keeps concurrent runs
+from several app workers from overlapping.
+"""
+
+import asyncio
+import heapq
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import BigInteger, ColumnElement, Row, any_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, advisory_lock
+from app.core.rate_limit import TokenBucket
+from app.core.tracing import get_tracer
+from app.models.calendar import CalendarEvent
+from app.models.task import Task
+from app.services.calendar_service import CalendarService
+from app.services.chat_service import ChatService
+from app.services.llm_service import LLMService
+from app.services.prompt_manager import PromptManager
+from app.services.task_ranker import ACTIVE_STATUSES, RankedTask, score_task
+from app.services.telegram_service import TelegramService
+from app.services.user_state_service import UserStateService
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE = "daily_briefing.jinja2"
+WATERMARK_PREFIX = "briefing_sent:"
+_ADVISORY_LOCK_KEY = 0x1A2B_0001  # arbitrary, unique per job
+_BLANK_LINES = re.compile(r"\n{3,}")
+_FOCUS_TASKS = 5
+_OVERDUE_TASKS = 50
+_FETCH_BATCH = 1000
+
+# Rendered as literals so the planner can match idx_tasks_owner_active_deadline
+_ACTIVE = Task.status.in_(
+    bindparam("active_statuses", ACTIVE_STATUSES, expanding=True, literal_execute=True)
+)
+
+
+def _owned_by(chat_ids: list[int]) -> ColumnElement[bool]:
+    """``owner_chat_id = ANY(:chat_ids)``: one array parameter for all chats."""
+    return Task.owner_chat_id == any_(
+        bindparam("chat_ids", chat_ids, type_=ARRAY(BigInteger))
+    )
+
+
+@dataclass(slots=True)
+class BriefingTask:
+    """Task fields used by the briefing template."""
+
+    id: int
+    content: str
+    priority: int
+    deadline: datetime | None
+    days_overdue: int = 0
+
+    @classmethod
+    def from_task(
+        cls, task: Task | RankedTask | Row[Any], start_of_day: datetime
+    ) -> "BriefingTask":
+        """Build from a task or task row, computing days overdue relative to today."""
+        days_overdue = 0
+        if task.deadline is not None and task.deadline < start_of_day:
+            days_overdue = (start_of_day - task.deadline).days + 1
+        return cls(task.id, task.content, task.priority, task.deadline, days_overdue)
+
+
+@dataclass(slots=True)
+class BriefingEvent:
+    """Calendar event fields used by the briefing template."""
+
+    title: str
+    start_time: datetime
+    duration: str | None = None
+
+    @classmethod
+    def from_event(cls, event: CalendarEvent) -> "BriefingEvent":
+        """Build from an ORM event, formatting its length ("45 phút", "1h30")."""
+        duration = None
+        if event.end_time is not None and event.end_time > event.start_time:
+            minutes = int((event.end_time - event.start_time).total_seconds()) // 60
+            hours, minutes = divmod(minutes, 60)
+            if hours >= 24:
+                duration = "cả ngày"
+            elif hours:
+                duration = f"{hours}h{minutes:02d}" if minutes else f"{hours}h"
+            else:
+                duration = f"{minutes} phút"
+        return cls(event.title, event.start_time, duration)
+
+
+@dataclass(slots=True)
+class BriefingData:
+    """Template context for one chat."""
+
+    focus_tasks: list[BriefingTask]
+    overdue_tasks: list[BriefingTask]
+    calendar_events: list[BriefingEvent] = field(default_factory=list)
+    insights: str | None = None
+
+
+@dataclass(slots=True)
+class BriefingReport:
+    """Outcome of one briefing run."""
+
+    day: date
+    recipients: int = 0
+    already_sent: int = 0
+    sent: int = 0
+    failed: int = 0
+    duration_ms: float = 0.0
+
+
+class BriefingJob:
+    """Build and deliver the daily briefing to every recipient chat."""
+
+    def __init__(
+        self,
+        prompt_manager: PromptManager,
+        telegram: TelegramService | None = None,
+        llm_service: LLMService | None = None,
+    ) -> None:
+        """Initialize the job.
+
+        Args:
+            prompt_manager: PromptManager instance (singleton).
+            telegram: Telegram service (defaults to a new instance).
+            llm_service: LLMService for insights; None disables insights.
+        """
+        settings = get_settings()
+        self.prompt_manager = prompt_manager
+        self.telegram = telegram or TelegramService()
+        self.llm_service = llm_service
+        self.tz = ZoneInfo(settings.timezone)
+        self.owner_chat_id = settings.telegram_owner_chat_id
+        self.active_window = timedelta(days=settings.briefing_active_days)
+        self.llm_semaphore = asyncio.Semaphore(settings.briefing_llm_concurrency)
+        self.rate_limiter = TokenBucket(settings.telegram_rate_limit_per_s)
+
+    async def run(self, day: date | None = None) -> BriefingReport:
+        """Send today's briefing to every chat that has not received it.
+
+        Args:
+            day: Briefing date (defaults to today in the user's timezone).
+
+        Returns:
+            Run report. Nothing is sent if another worker holds the job lock.
+        """
+        now = datetime.now(self.tz)
+        report = BriefingReport(day=day or now.date())
+        started = time.perf_counter()
+
+        async with advisory_lock(_ADVISORY_LOCK_KEY) as locked:
+            if not locked:
+                logger.info("Daily briefing already running elsewhere, skipping")
+                return report
+            with get_tracer().start_trace("daily_briefing") as root:
+                await self._run(now, report)
+                if root is not None:
+                    root.attributes.update(sent=report.sent, failed=report.failed)
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Daily briefing {report.day}: {report.sent} sent, "
+            f"{report.failed} failed, {report.already_sent} already sent "
+            f"({report.duration_ms:.0f} ms)"
+        )
+        return report
+
+    async def _run(self, now: datetime, report: BriefingReport) -> None:
+        start_of_day = datetime.combine(report.day, dt_time.min, tzinfo=self.tz)
+        watermark = report.day.isoformat()
+
+        async with AsyncSessionLocal() as session:
+            chat_ids = set(
+                await ChatService(session).get_active_chat_ids(now - self.active_window)
+            )
+            if self.owner_chat_id:
+                chat_ids.add(self.owner_chat_id)
+            report.recipients = len(chat_ids)
+
+            keys = {chat_id: f"{WATERMARK_PREFIX}{chat_id}" for chat_id in chat_ids}
+            sent = await UserStateService(session).get_many(list(keys.values()))
+            pending = sorted(c for c in chat_ids if sent.get(keys[c]) != watermark)
+            report.already_sent = len(chat_ids) - len(pending)
+            if not pending:
+                return
+            data = await self._load_data(session, pending, start_of_day)
+
+        llm_service = self.llm_service
+        if llm_service is not None:
+            insights = await asyncio.gather(
+                *(self._insights(data[chat_id], llm_service) for chat_id in pending)
+            )
+            for chat_id, text in zip(pending, insights, strict=True):
+                data[chat_id].insights = text
+
+        texts = await asyncio.gather(
+            *(asyncio.to_thread(self._render, data[chat_id]) for chat_id in pending)
+        )
+
+        async def _deliver(chat_id: int, text: str) -> None:
+            try:
+                await self._send(chat_id, text)
+            except Exception as e:
+                report.failed += 1
+                logger.error(f"Briefing to chat {chat_id} failed: {e}")
+                return
+            async with AsyncSessionLocal() as session, session.begin():
+                await UserStateService(session).set(keys[chat_id], watermark)
+            report.sent += 1
+
+        await asyncio.gather(
+            *(_deliver(c, t) for c, t in zip(pending, texts, strict=True))
+        )
+
+    async def _load_data(
+        self,
+        session: AsyncSession,
+        chat_ids: list[int],
+        start_of_day: datetime,
+    ) -> dict[int, BriefingData]:
+        """Load briefing data for all chats with set-based queries.
+
+        Tasks are owned per chat, but one focus query and one overdue query
+        cover every recipient (``owner_chat_id = ANY(:ids)``, served by the
+        owner-led indexes) and are grouped by chat here. Calendar events are
+        not scoped per chat, so one query serves every recipient.
+        """
+        focus = await self._load_focus(session, chat_ids)
+        overdue: dict[int, list[BriefingTask]] = {chat_id: [] for chat_id in chat_ids}
+        for row in await self._load_overdue(session, chat_ids, start_of_day):
+            overdue[row.owner_chat_id].append(BriefingTask.from_task(row, start_of_day))
+        events = await CalendarService(session).get_events(
+            start_of_day, start_of_day + timedelta(days=1), limit=10
+        )
+        events_view = [BriefingEvent.from_event(e) for e in events]
+        return {
+            chat_id: BriefingData(
+                focus_tasks=[
+                    BriefingTask.from_task(t, start_of_day) for t in focus[chat_id]
+                ],
+                overdue_tasks=overdue[chat_id],
+                calendar_events=events_view,
+            )
+            for chat_id in chat_ids
+        }
+
+    async def _load_focus(
+        self,
+        session: AsyncSession,
+        chat_ids: list[int],
+    ) -> dict[int, list[RankedTask]]:
+        """Best active tasks per chat, scored as ``TaskRanker`` does.
+
+        Active tasks of all chats are streamed as plain rows; only the
+        ``_FOCUS_TASKS`` best per chat are kept while reading.
+        """
+        now = datetime.now(UTC)
+        # Min-heaps of (score, -id, task): the worst kept task is on top
+        best: dict[int, list[tuple[float, int, RankedTask]]] = {
+            chat_id: [] for chat_id in chat_ids
+        }
+        result = await session.stream(
+            select(
+                Task.owner_chat_id,
+                Task.id,
+                Task.content,
+                Task.status,
+                Task.priority,
+                Task.deadline,
+                Task.complexity,
+                Task.created_at,
+            )
+            .where(_owned_by(chat_ids), _ACTIVE)
+            .execution_options(yield_per=_FETCH_BATCH)
+        )
+        async for rows in result.partitions():
+            for row in rows:
+                task = RankedTask(*row[1:])
+                task.score = score_task(task, now)
+                heap = best[row.owner_chat_id]
+                entry = (task.score, -task.id, task)
+                if len(heap) < _FOCUS_TASKS:
+                    heapq.heappush(heap, entry)
+                elif entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+        return {
+            chat_id: [task for *_, task in sorted(heap, reverse=True)]
+            for chat_id, heap in best.items()
+        }
+
+    async def _load_overdue(
+        self,
+        session: AsyncSession,
+        chat_ids: list[int],
+        before: datetime,
+    ) -> list[Row[Any]]:
+        """Up to ``_OVERDUE_TASKS`` overdue tasks per chat, oldest deadline first."""
+        overdue = (
+            select(
+                Task.owner_chat_id,
+                Task.id,
+                Task.content,
+                Task.priority,
+                Task.deadline,
+                func.row_number()
+                .over(
+                    partition_by=Task.owner_chat_id,
+                    order_by=(Task.deadline, Task.id),
+                )
+                .label("position"),
+            )
+            .where(_owned_by(chat_ids), _ACTIVE, Task.deadline < before)
+            .subquery()
+        )
+        result = await session.execute(
+            select(overdue)
+            .where(overdue.c.position <= _OVERDUE_TASKS)
+            .order_by(overdue.c.owner_chat_id, overdue.c.position)
+        )
+        return list(result.all())
+
+    async def _insights(
+        self, data: BriefingData, llm_service: LLMService
+    ) -> str | None:
+        """Generate the optional one-line insight (concurrency-capped)."""
+        if not data.focus_tasks and not data.overdue_tasks:
+            return None
+        lines = [f"- [P{t.priority}] {t.content}" for t in data.focus_tasks]
+        lines += [
+            f"- overdue {t.days_overdue} ngày: {t.content}" for t in data.overdue_tasks
+        ]
+        messages = [
+            SystemMessage(
+                content=self.prompt_manager.get_system_prompt("briefing_insights")
+            ),
+            HumanMessage(content="\n".join(lines)),
+        ]
+        async with self.llm_semaphore:
+            try:
+                return (await llm_service.chat(messages)).strip()
+            except Exception as e:
+                logger.warning(f"Briefing insights failed: {e}")
+                return None
+
+    def _render(self, data: BriefingData) -> str:
+        text = self.prompt_manager.render_template(
+            TEMPLATE,
+            focus_tasks=data.focus_tasks,
+            overdue_tasks=data.overdue_tasks,
+            calendar_events=data.calendar_events,
+            insights=data.insights,
+        )
+        return _BLANK_LINES.sub("\n\n", text).strip()
+
+    async def _send(self, chat_id: int, text: str) -> None:
+        """Send one message within the rate limit, honouring 429 retry_after."""
+        await self.rate_limiter.acquire()
+        try:
+            await self.telegram.send_message(chat_id=chat_id, text=text)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 429:
+                raise
+            retry_after = e.response.json().get("parameters", {}).get("retry_after", 1)
+            await asyncio.sleep(retry_after)
+            await self.rate_limiter.acquire()
+            await self.telegram.send_message(chat_id=chat_id, text=text)
+
+
+async def run_daily_briefing() -> None:
+    """Scheduler entry point for the daily briefing."""
+    from app.api.deps import get_llm_service, get_prompt_manager
+
+    settings = get_settings()
+    llm_service = get_llm_service() if settings.briefing_insights_enabled else None
+    await BriefingJob(get_prompt_manager(), llm_service=llm_service).run()
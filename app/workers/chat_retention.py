@@ -0,0 +1,147 @@
+"""Create future ``chat_logs`` partitions and archive old ones.
+
+Daily job (and partition creation once at startup). Under an advisory lock:
+
+1. partitions for the current month and ``chat_partitions_ahead`` more are
+   created, so inserts never reach a month without one;
+2. each partition older than ``chat_retention_months`` full months is
+   streamed to ``<chat_archive_dir>/chat_logs_yYYYYmMM.jsonl.gz`` (one JSON
+   row per line, written to a temporary file and renamed), then detached
+   (and dropped, unless ``chat_archive_drop`` is off) in a transaction
+   that first checks its row count against the archive.
+
+A failure between the two steps leaves the partition attached; the next
+run exports it again and replaces the archive.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, TextIO
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, advisory_lock
+from app.services.chat_partitions import (
+    ChatPartition,
+    ChatPartitionService,
+    add_months,
+    month_start,
+)
+
+logger = logging.getLogger(__name__)
+
+_ADVISORY_LOCK_KEY = 0x1A2B_0004
+_EXPORT_BATCH_SIZE = 1000
+
+
+@dataclass(slots=True)
+class RetentionReport:
+    """Outcome of one retention run."""
+
+    created: list[str] = field(default_factory=list)
+    archived: list[str] = field(default_factory=list)
+    rows: int = 0
+    duration_ms: float = 0.0
+
+
+def _write_lines(f: TextIO, records: list[dict[str, Any]]) -> None:
+    """Append records as JSON lines (blocking; run off the event loop)."""
+    f.writelines(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+
+
+async def ensure_chat_partitions(months_ahead: int | None = None) -> list[str]:
+    """Create missing partitions from the current month onwards.
+
+    Args:
+        months_ahead: Future months (defaults to the setting).
+
+    Returns:
+        Names of the partitions created.
+    """
+    if months_ahead is None:
+        months_ahead = get_settings().chat_partitions_ahead
+    async with AsyncSessionLocal() as session, session.begin():
+        created = await ChatPartitionService(session).ensure_partitions(months_ahead)
+    return [p.name for p in created]
+
+
+class ChatRetentionWorker:
+    """Keep ``chat_logs`` partitions ahead of time and archive old ones."""
+
+    def __init__(self, archive_dir: Path | None = None) -> None:
+        """Initialize the worker.
+
+        Args:
+            archive_dir: Archive directory (defaults to the setting).
+        """
+        settings = get_settings()
+        self.months_ahead = settings.chat_partitions_ahead
+        self.retention_months = settings.chat_retention_months
+        self.archive_dir = archive_dir or Path(settings.chat_archive_dir)
+        self.drop = settings.chat_archive_drop
+
+    async def run(self) -> RetentionReport:
+        """Create future partitions, then archive expired ones.
+
+        Returns:
+            Run report (empty if another worker holds the job lock).
+        """
+        report = RetentionReport()
+        started = time.perf_counter()
+        async with advisory_lock(_ADVISORY_LOCK_KEY) as locked:
+            if not locked:
+                logger.info("chat_logs retention already running elsewhere, skipping")
+                return report
+            report.created = await ensure_chat_partitions(self.months_ahead)
+            if self.retention_months > 0:
+                for partition in await self._expired():
+                    report.rows += await self._archive(partition)
+                    report.archived.append(partition.name)
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"chat_logs retention: {len(report.created)} partitions created, "
+            f"{len(report.archived)} archived ({report.rows} rows, "
+            f"{report.duration_ms:.0f} ms)"
+        )
+        return report
+
+    async def _expired(self) -> list[ChatPartition]:
+        """Attached partitions entirely before the retention window."""
+        cutoff = add_months(month_start(datetime.now(UTC)), -self.retention_months)
+        async with AsyncSessionLocal() as session:
+            partitions = await ChatPartitionService(session).list_partitions()
+        return [p for p in partitions if p.end <= cutoff]
+
+    async def _archive(self, partition: ChatPartition) -> int:
+        """Export one partition to gzipped JSON lines, then detach it.
+
+        Returns:
+            Rows archived.
+        """
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        path = self.archive_dir / f"{partition.name}.jsonl.gz"
+        tmp = path.with_name(f"{path.name}.tmp")
+        rows = 0
+        async with AsyncSessionLocal() as session, session.begin():
+            service = ChatPartitionService(session)
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                async for batch in service.stream_rows(partition, _EXPORT_BATCH_SIZE):
+                    await asyncio.to_thread(_write_lines, f, batch)
+                    rows += len(batch)
+        tmp.replace(path)
+
+        async with AsyncSessionLocal() as session, session.begin():
+            await ChatPartitionService(session).detach(partition, rows, drop=self.drop)
+        logger.info(f"Archived {partition.name}: {rows} rows to {path}")
+        return rows
+
+
+async def run_chat_retention() -> None:
+    """Scheduler entry point for the daily chat_logs retention."""
+    await ChatRetentionWorker().run()
@@ -0,0 +1,454 @@
+"""Embedding ingestion: chat logs, tasks and documents into the vector store.
+
+Each source is read in keyset pages past its watermark in ``user_state``
+(``embedding_watermark:v2:<source>``): chat logs and documents by id, tasks by
+``(updated_at, id)`` so edits are re-ingested. Per page:
+
+1. texts are hashed and looked up in ``embedding_cache`` with one query;
+   only unseen content is sent to the embedder;
+2. misses are grouped into requests bounded by estimated tokens and run
+   with limited concurrency;
+3. new vectors are cached and all points are upserted to the vector store
+   (and the lexical index) in bulk under deterministic ids, so
+   re-ingesting overwrites;
+4. the watermark advances only after the upsert, so a crash re-does at
+   most one page.
+
+Usage:
+    python -m app.workers.embedding
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, advisory_lock
+from app.core.tracing import get_tracer
+from app.models.chat import ChatLog
+from app.models.document import Document, EmbeddingCache
+from app.models.task import Task
+from app.services.embedding_service import (
+    Embedder,
+    batch_by_tokens,
+    chunk_text,
+    content_hash,
+    get_embedder,
+    point_id,
+)
+from app.services.lexical_index import (
+    LexicalDoc,
+    LexicalIndex,
+    get_lexical_index,
+    lexical_text,
+)
+from app.services.retrieval_service import get_retrieval_service
+from app.services.user_state_service import UserStateService
+from app.services.vector_store import (
+    SHARED_OWNER,
+    VectorPoint,
+    VectorStore,
+    get_vector_store,
+)
+
+logger = logging.getLogger(__name__)
+
+# v2: payloads carry owner_chat_id; older points are re-ingested once (the
+# embedding cache makes that upserts only)
+WATERMARK_PREFIX = "embedding_watermark:v2:"
+_ADVISORY_LOCK_KEY = 0x1A2B_0003
+_COMMIT_LAG = timedelta(minutes=1)
+_PREVIEW_CHARS = 200
+_MIN_CHARS = 4
+
+
+@dataclass(slots=True)
+class IngestItem:
+    """One text to embed and store."""
+
+    point_id: str
+    text: str
+    payload: dict[str, Any]
+    hash: str = ""
+
+
+@dataclass(slots=True)
+class IngestionReport:
+    """Throughput and cache statistics of one ingestion run."""
+
+    rows: dict[str, int] = field(default_factory=dict)
+    points: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    embed_requests: int = 0
+    duration_s: float = 0.0
+
+    @property
+    def total_rows(self) -> int:
+        """Rows read across all sources."""
+        return sum(self.rows.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        """Ingestion throughput."""
+        return self.total_rows / self.duration_s if self.duration_s else 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of unique texts that were already embedded."""
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+
+class EmbeddingIngestor:
+    """Incrementally embed new and changed rows into the vector store."""
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        store: VectorStore,
+        lexical: LexicalIndex | None = None,
+    ) -> None:
+        """Initialize the ingestor.
+
+        Args:
+            embedder: Embedder to use (its ``model`` keys the cache).
+            store: Target vector store.
+            lexical: Lexical index fed the same items (None skips it).
+        """
+        settings = get_settings()
+        self.embedder = embedder
+        self.store = store
+        self.lexical = lexical
+        self.page_size = settings.embedding_page_size
+        self.batch_tokens = settings.embedding_batch_tokens
+        self.batch_max_items = settings.embedding_batch_max_items
+        self.chunk_tokens = settings.embedding_chunk_tokens
+        self.semaphore = asyncio.Semaphore(settings.embedding_concurrency)
+
+    async def run(self) -> IngestionReport:
+        """Ingest every source up to now.
+
+        Returns:
+            Run report (empty if another worker holds the job lock).
+        """
+        report = IngestionReport()
+        started = time.perf_counter()
+        sources: dict[str, Callable[[IngestionReport], Awaitable[int]]] = {
+            "chat_log": self._ingest_chat_logs,
+            "task": self._ingest_tasks,
+            "document": self._ingest_documents,
+        }
+        async with advisory_lock(_ADVISORY_LOCK_KEY) as locked:
+            if not locked:
+                logger.info("Embedding ingestion already running elsewhere, skipping")
+                return report
+            with get_tracer().start_trace("embedding_ingestion") as root:
+                await self.store.ensure_collection(self.embedder.dim)
+                for source, ingest_page in sources.items():
+                    report.rows.setdefault(source, 0)
+                    while await ingest_page(report) == self.page_size:
+                        pass
+                if root is not None:
+                    root.attributes.update(
+                        rows=report.total_rows, cache_hits=report.cache_hits
+                    )
+
+        report.duration_s = time.perf_counter() - started
+        logger.info(
+            f"Embedding ingestion: {report.total_rows} rows {report.rows} "
+            f"-> {report.points} points in {report.duration_s:.1f}s "
+            f"({report.rows_per_second:.0f} rows/s, "
+            f"cache hit rate {report.cache_hit_rate:.0%}, "
+            f"{report.embed_requests} embedding requests)"
+        )
+        return report
+
+    # -- sources -----------------------------------------------------------
+
+    async def _ingest_chat_logs(self, report: IngestionReport) -> int:
+        key = f"{WATERMARK_PREFIX}chat_log"
+        async with AsyncSessionLocal() as session:
+            stored = await UserStateService(session).get_many([key])
+            watermark = int(stored.get(key, 0))
+            result = await session.execute(
+                select(
+                    ChatLog.id,
+                    ChatLog.content,
+                    ChatLog.session_id,
+                    ChatLog.telegram_chat_id,
+                    ChatLog.created_at,
+                )
+                .where(
+                    ChatLog.id > watermark,
+                    ChatLog.role == "user",
+                    ChatLog.created_at < datetime.now(UTC) - _COMMIT_LAG,
+                )
+                .order_by(ChatLog.id)
+                .limit(self.page_size)
+            )
+            rows = result.all()
+        if not rows:
+            return 0
+
+        items = [
+            IngestItem(
+                point_id=point_id("chat_log", row.id),
+                text=row.content,
+                payload={
+                    "source": "chat_log",
+                    "source_id": row.id,
+                    "owner_chat_id": row.telegram_chat_id,
+                    "content_preview": row.content[:_PREVIEW_CHARS],
+                    "timestamp": row.created_at.isoformat(),
+                    "tags": [],
+                    "session_id": row.session_id,
+                },
+            )
+            for row in rows
+            if len(row.content.strip()) >= _MIN_CHARS
+        ]
+        await self._store(items, report)
+        await self._save_watermark(key, rows[-1].id)
+        self._count(report, "chat_log", len(rows))
+        return len(rows)
+
+    async def _ingest_tasks(self, report: IngestionReport) -> int:
+        key = f"{WATERMARK_PREFIX}task"
+        async with AsyncSessionLocal() as session:
+            stored = await UserStateService(session).get_many([key])
+            watermark = stored.get(key) or {"updated_at": None, "id": 0}
+            stmt = select(
+                Task.id,
+                Task.owner_chat_id,
+                Task.content,
+                Task.status,
+                Task.priority,
+                Task.tags,
+                Task.project_id,
+                Task.updated_at,
+            ).where(Task.updated_at < datetime.now(UTC) - _COMMIT_LAG)
+            if watermark["updated_at"] is not None:
+                stmt = stmt.where(
+                    tuple_(Task.updated_at, Task.id)
+                    > (datetime.fromisoformat(watermark["updated_at"]), watermark["id"])
+                )
+            result = await session.execute(
+                stmt.order_by(Task.updated_at, Task.id).limit(self.page_size)
+            )
+            rows = result.all()
+        if not rows:
+            return 0
+
+        items = [
+            IngestItem(
+                point_id=point_id("task", row.id),
+                text=row.content,
+                payload={
+                    "source": "task",
+                    "source_id": row.id,
+                    "owner_chat_id": row.owner_chat_id,
+                    "content_preview": row.content[:_PREVIEW_CHARS],
+                    "timestamp": row.updated_at.isoformat(),
+                    "tags": row.tags or [],
+                    "status": row.status,
+                    "priority": row.priority,
+                    "project_id": row.project_id,
+                },
+            )
+            for row in rows
+        ]
+        await self._store(items, report)
+        last = rows[-1]
+        await self._save_watermark(
+            key, {"updated_at": last.updated_at.isoformat(), "id": last.id}
+        )
+        self._count(report, "task", len(rows))
+        return len(rows)
+
+    async def _ingest_documents(self, report: IngestionReport) -> int:
+        key = f"{WATERMARK_PREFIX}document"
+        async with AsyncSessionLocal() as session:
+            stored = await UserStateService(session).get_many([key])
+            watermark = int(stored.get(key, 0))
+            result = await session.execute(
+                select(
+                    Document.id,
+                    Document.title,
+                    Document.content,
+                    Document.source,
+                    Document.created_at,
+                )
+                .where(
+                    Document.id > watermark,
+                    Document.created_at < datetime.now(UTC) - _COMMIT_LAG,
+                )
+                .order_by(Document.id)
+                .limit(self.page_size)
+            )
+            rows = result.all()
+        if not rows:
+            return 0
+
+        items: list[IngestItem] = []
+        first_chunk_ids: dict[int, str] = {}
+        for row in rows:
+            text = f"{row.title}\n\n{row.content}" if row.title else row.content
+            for chunk_no, chunk in enumerate(chunk_text(text, self.chunk_tokens)):
+                pid = point_id("document", row.id, chunk_no)
+                first_chunk_ids.setdefault(row.id, pid)
+                items.append(
+                    IngestItem(
+                        point_id=pid,
+                        text=chunk,
+                        payload={
+                            "source": "document",
+                            "source_id": row.id,
+                            "owner_chat_id": SHARED_OWNER,
+                            "chunk": chunk_no,
+                            "content_preview": chunk[:_PREVIEW_CHARS],
+                            "timestamp": row.created_at.isoformat(),
+                            "tags": [row.source] if row.source else [],
+                        },
+                    )
+                )
+        await self._store(items, report)
+        async with AsyncSessionLocal() as session, session.begin():
+            if first_chunk_ids:
+                await session.execute(
+                    update(Document),
+                    [
+                        {"id": doc_id, "embedding_id": pid}
+                        for doc_id, pid in first_chunk_ids.items()
+                    ],
+                )
+            await UserStateService(session).set(key, rows[-1].id)
+        self._count(report, "document", len(rows))
+        return len(rows)
+
+    # -- embedding ---------------------------------------------------------
+
+    async def _store(self, items: list[IngestItem], report: IngestionReport) -> None:
+        """Embed (cache first) and upsert a page of items."""
+        if not items:
+            return
+        for item in items:
+            item.hash = content_hash(item.text)
+        unique = {item.hash: item.text for item in items}
+
+        async with AsyncSessionLocal() as session:
+            vectors = await self._load_cached(session, list(unique))
+        missing = {h: t for h, t in unique.items() if h not in vectors}
+        report.cache_hits += len(unique) - len(missing)
+        report.cache_misses += len(missing)
+        metrics.EMBEDDING_CACHE_HITS.inc(len(unique) - len(missing))
+        metrics.EMBEDDING_CACHE_MISSES.inc(len(missing))
+
+        if missing:
+            hashes = list(missing)
+            texts = list(missing.values())
+
+            async def _embed(indices: list[int]) -> None:
+                async with self.semaphore:
+                    embedded = await self.embedder.embed([texts[i] for i in indices])
+                for i, vector in zip(indices, embedded, strict=True):
+                    vectors[hashes[i]] = vector
+
+            batches = list(
+                batch_by_tokens(texts, self.batch_tokens, self.batch_max_items)
+            )
+            report.embed_requests += len(batches)
+            await asyncio.gather(*(_embed(batch) for batch in batches))
+
+            async with AsyncSessionLocal() as session, session.begin():
+                await session.execute(
+                    insert(EmbeddingCache).on_conflict_do_nothing(),
+                    [
+                        {
+                            "model": self.embedder.model,
+                            "content_hash": h,
+                            "vector": vectors[h].astype("<f4").tobytes(),
+                        }
+                        for h in hashes
+                    ],
+                )
+
+        await self.store.upsert(
+            [
+                VectorPoint(
+                    id=item.point_id,
+                    vector=vectors[item.hash],
+                    payload={**item.payload, "content_hash": item.hash},
+                )
+                for item in items
+            ]
+        )
+        if self.lexical is not None:
+            await self.lexical.add(
+                [
+                    LexicalDoc(
+                        item.point_id,
+                        lexical_text(
+                            item.payload["source"], item.payload["source_id"], item.text
+                        ),
+                        item.payload,
+                    )
+                    for item in items
+                ]
+            )
+        report.points += len(items)
+
+    async def _load_cached(
+        self,
+        session: AsyncSession,
+        hashes: list[str],
+    ) -> dict[str, npt.NDArray[np.float32]]:
+        """Fetch cached vectors for content hashes in one query."""
+        result = await session.execute(
+            select(EmbeddingCache.content_hash, EmbeddingCache.vector).where(
+                EmbeddingCache.model == self.embedder.model,
+                EmbeddingCache.content_hash.in_(hashes),
+            )
+        )
+        return {h: np.frombuffer(blob, dtype="<f4") for h, blob in result.all()}
+
+    async def _save_watermark(self, key: str, value: Any) -> None:
+        async with AsyncSessionLocal() as session, session.begin():
+            await UserStateService(session).set(key, value)
+
+    @staticmethod
+    def _count(report: IngestionReport, source: str, rows: int) -> None:
+        report.rows[source] = report.rows.get(source, 0) + rows
+        metrics.EMBEDDING_ROWS_BY_SOURCE[source].inc(rows)
+
+
+async def run_embedding_ingestion() -> IngestionReport:
+    """Scheduler entry point for embedding ingestion."""
+    report = await EmbeddingIngestor(
+        get_embedder(), get_vector_store(), get_lexical_index()
+    ).run()
+    if report.points and get_retrieval_service.cache_info().currsize:
+        get_retrieval_service().invalidate()
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(run_embedding_ingestion())
+    print(
+        f"rows={result.total_rows} {result.rows} points={result.points} "
+        f"rows/s={result.rows_per_second:.0f} "
+        f"cache_hit_rate={result.cache_hit_rate:.1%} "
+        f"embed_requests={result.embed_requests}"
+    )
@@ -0,0 +1,354 @@
+"""Incremental nightly reflection over ``chat_logs``.
+
+Each run processes only chat logs past the ``reflection_watermark`` id
+stored in ``user_state``, in id-ordered batches. Per batch, in one
+transaction:
+
+1. user messages are scored with the local sentiment lexicon and missing
+   intents are filled by keyword matching (intents classified online by
+   ``IntentRouter`` are kept);
+2. ``intent``/``sentiment`` are written back with one executemany UPDATE;
+3. ``chat_daily_rollups`` rows for the touched (session, day) pairs are
+   merged;
+4. the watermark advances to the batch's last id.
+
+A batch ends at the first row younger than the commit lag, so rows are
+taken strictly in id order and the watermark never passes a row that has
+not been processed.
+
+A crash therefore never double-counts or skips rows. The LLM step then
+infers the user's state from the last few days of rollups and task
+completion counts only, never from raw chat logs.
+"""
+
+import itertools
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from datetime import time as dt_time
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, advisory_lock
+from app.core.tracing import get_tracer
+from app.models.chat import ChatDailyRollup, ChatLog
+from app.services.llm_service import LLMService
+from app.services.prompt_manager import PromptManager
+from app.services.sentiment import score_batch
+from app.services.task_service import TaskService
+from app.services.user_state_service import UserStateService
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "reflection_watermark"
+_ADVISORY_LOCK_KEY = 0x1A2B_0002
+# Rows newer than this may belong to transactions that have not committed
+# yet; a batch stops at the first one, leaving it and everything after it
+# for the next run so the id watermark stays gap-free.
+_COMMIT_LAG = timedelta(minutes=1)
+_LATE_NIGHT_HOURS = frozenset({23, 0, 1, 2, 3, 4})
+
+STATUSES = ("normal", "busy", "overwhelmed", "low_energy")
+TRENDS = ("improving", "stable", "declining")
+
+# Keyword fallback for rows without an online classification (mirrors the
+# analyzer prompt's keyword hints; first match wins).
+INTENT_KEYWORDS: tuple[tuple[str, tuple[str, ...]], ...] = (
+    ("update_task", ("done", "xong", "update", "đổi", "hoãn", "cancel", "huỷ")),
+    ("review", ("review", "tiến độ", "tuần qua", "làm được gì")),
+    ("query", ("xem", "list", "có gì", "bao nhiêu", "hôm nay", "tuần này")),
+    ("create_task", ("tạo", "thêm", "nhắc", "cần", "phải", "task", "việc")),
+)
+
+
+def infer_intent(text: str) -> str:
+    """Cheap keyword intent for messages never classified by the LLM."""
+    lowered = text.lower()
+    for intent, keywords in INTENT_KEYWORDS:
+        if any(keyword in lowered for keyword in keywords):
+            return intent
+    return "chat"
+
+
+@dataclass(slots=True)
+class ReflectionReport:
+    """Outcome of one reflection run."""
+
+    processed: int = 0
+    batches: int = 0
+    watermark: int = 0
+    state: dict[str, Any] = field(default_factory=dict)
+    duration_ms: float = 0.0
+
+
+class ReflectionWorker:
+    """Advance the chat_logs watermark, then refresh inferred user state."""
+
+    def __init__(
+        self,
+        prompt_manager: PromptManager,
+        llm_service: LLMService | None = None,
+    ) -> None:
+        """Initialize the worker.
+
+        Args:
+            prompt_manager: PromptManager instance (singleton).
+            llm_service: LLMService for the reflection step; None skips it.
+        """
+        settings = get_settings()
+        self.prompt_manager = prompt_manager
+        self.llm_service = llm_service
+        self.tz = ZoneInfo(settings.timezone)
+        self.batch_size = settings.reflection_batch_size
+        self.window_days = settings.reflection_window_days
+        # user_state describes the deployment owner; so do its task counts
+        self.owner_chat_id = settings.telegram_owner_chat_id or 0
+
+    async def run(self) -> ReflectionReport:
+        """Process new chat logs and update the inferred user state.
+
+        Returns:
+            Run report (empty if another worker holds the job lock).
+        """
+        report = ReflectionReport()
+        started = time.perf_counter()
+        async with advisory_lock(_ADVISORY_LOCK_KEY) as locked:
+            if not locked:
+                logger.info("Reflection already running elsewhere, skipping")
+                return report
+            with get_tracer().start_trace("reflection") as root:
+                while await self._process_batch(report) == self.batch_size:
+                    pass
+                if self.llm_service is not None:
+                    await self._reflect(report, self.llm_service)
+                if root is not None:
+                    root.attributes.update(
+                        processed=report.processed, batches=report.batches
+                    )
+
+        report.duration_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            f"Reflection: {report.processed} logs in {report.batches} batches "
+            f"(watermark {report.watermark}, {report.duration_ms:.0f} ms)"
+        )
+        return report
+
+    async def _process_batch(self, report: ReflectionReport) -> int:
+        """Process one batch past the watermark; returns rows processed."""
+        cutoff = datetime.now(self.tz) - _COMMIT_LAG
+        async with AsyncSessionLocal() as session, session.begin():
+            state = UserStateService(session)
+            stored = await state.get_many([WATERMARK_KEY])
+            watermark = int(stored.get(WATERMARK_KEY, 0))
+
+            result = await session.execute(
+                select(
+                    ChatLog.id,
+                    ChatLog.session_id,
+                    ChatLog.telegram_chat_id,
+                    ChatLog.role,
+                    ChatLog.content,
+                    ChatLog.intent,
+                    ChatLog.created_at,
+                )
+                .where(ChatLog.id > watermark)
+                .order_by(ChatLog.id)
+                .limit(self.batch_size)
+            )
+            # Filtering on created_at instead would let the watermark jump
+            # over older ids held back by the cutoff and skip them for good
+            rows = list(
+                itertools.takewhile(lambda row: row.created_at < cutoff, result)
+            )
+            report.watermark = watermark
+            if not rows:
+                return 0
+
+            user_rows = [row for row in rows if row.role == "user"]
+            scores = score_batch([row.content for row in user_rows])
+            changes = [
+                {
+                    "id": row.id,
+                    "created_at": row.created_at,  # rest of the primary key
+                    "intent": row.intent or infer_intent(row.content),
+                    "sentiment": score,
+                }
+                for row, score in zip(user_rows, scores, strict=True)
+            ]
+            if changes:
+                # ORM bulk UPDATE by primary key: a single executemany
+                await session.execute(update(ChatLog), changes)
+
+            await self._merge_rollups(session, rows, changes)
+            await state.set(WATERMARK_KEY, rows[-1].id)
+
+        report.processed += len(rows)
+        report.batches += 1
+        report.watermark = rows[-1].id
+        return len(rows)
+
+    async def _merge_rollups(
+        self,
+        session: AsyncSession,
+        rows: list[Any],
+        changes: list[dict[str, Any]],
+    ) -> None:
+        """Add a batch's counts to ``chat_daily_rollups``.
+
+        Only this worker writes rollups (under the advisory lock), so a
+        read-modify-write of the touched rows is safe.
+        """
+        by_id = {change["id"]: change for change in changes}
+        deltas: dict[tuple[str, date], dict[str, Any]] = {}
+        for row in rows:
+            local = row.created_at.astimezone(self.tz)
+            delta = deltas.setdefault(
+                (row.session_id, local.date()),
+                {
+                    "telegram_chat_id": row.telegram_chat_id,
+                    "user": 0,
+                    "assistant": 0,
+                    "sentiment_sum": 0.0,
+                    "sentiment_min": None,
+                    "intents": Counter(),
+                    "late_night": 0,
+                },
+            )
+            change = by_id.get(row.id)
+            if change is None:
+                if row.role == "assistant":
+                    delta["assistant"] += 1
+                continue
+            delta["user"] += 1
+            delta["sentiment_sum"] += change["sentiment"]
+            if (
+                delta["sentiment_min"] is None
+                or change["sentiment"] < delta["sentiment_min"]
+            ):
+                delta["sentiment_min"] = change["sentiment"]
+            delta["intents"][change["intent"]] += 1
+            if local.hour in _LATE_NIGHT_HOURS:
+                delta["late_night"] += 1
+
+        result = await session.execute(
+            select(ChatDailyRollup).where(
+                tuple_(ChatDailyRollup.session_id, ChatDailyRollup.day).in_(
+                    list(deltas)
+                )
+            )
+        )
+        existing = {(r.session_id, r.day): r for r in result.scalars()}
+
+        for (session_id, day), delta in deltas.items():
+            rollup = existing.get((session_id, day))
+            if rollup is None:
+                rollup = ChatDailyRollup(
+                    session_id=session_id,
+                    day=day,
+                    telegram_chat_id=delta["telegram_chat_id"],
+                    user_messages=0,
+                    assistant_messages=0,
+                    sentiment_sum=0.0,
+                    intent_counts={},
+                    late_night_messages=0,
+                )
+                session.add(rollup)
+            rollup.user_messages += delta["user"]
+            rollup.assistant_messages += delta["assistant"]
+            rollup.sentiment_sum += delta["sentiment_sum"]
+            if delta["sentiment_min"] is not None:
+                rollup.sentiment_min = min(
+                    rollup.sentiment_min
+                    if rollup.sentiment_min is not None
+                    else delta["sentiment_min"],
+                    delta["sentiment_min"],
+                )
+            # Reassign (not mutate) so the JSONB change is detected
+            rollup.intent_counts = dict(
+                Counter(rollup.intent_counts) + delta["intents"]
+            )
+            rollup.late_night_messages += delta["late_night"]
+
+    async def _reflect(self, report: ReflectionReport, llm_service: LLMService) -> None:
+        """Infer user state from compact daily aggregates."""
+        today = datetime.now(self.tz).date()
+        since_day = today - timedelta(days=self.window_days - 1)
+        since = datetime.combine(since_day, dt_time.min, tzinfo=self.tz)
+        start_of_today = datetime.combine(today, dt_time.min, tzinfo=self.tz)
+
+        async with AsyncSessionLocal() as session:
+            rollups = list(
+                await session.scalars(
+                    select(ChatDailyRollup).where(ChatDailyRollup.day >= since_day)
+                )
+            )
+            task_service = TaskService(session, owner_chat_id=self.owner_chat_id)
+            done_by_day = await task_service.count_completed_by_day(since, self.tz.key)
+            overdue = await task_service.count_overdue(start_of_today)
+
+        lines = []
+        for offset in range(self.window_days):
+            day = since_day + timedelta(days=offset)
+            day_rollups = [r for r in rollups if r.day == day]
+            user_messages = sum(r.user_messages for r in day_rollups)
+            mins = [r.sentiment_min for r in day_rollups if r.sentiment_min is not None]
+            intents: Counter[str] = Counter()
+            for r in day_rollups:
+                intents.update(r.intent_counts)
+            avg = (
+                sum(r.sentiment_sum for r in day_rollups) / user_messages
+                if user_messages
+                else 0.0
+            )
+            lines.append(
+                f"{day.isoformat()}: messages={user_messages} "
+                f"sentiment_avg={avg:.2f} sentiment_min={min(mins, default=0.0):.2f} "
+                f"intents={dict(intents)} "
+                f"late_night={sum(r.late_night_messages for r in day_rollups)} "
+                f"tasks_done={done_by_day.get(day, 0)}"
+            )
+        lines.append(f"overdue_tasks={overdue}")
+
+        messages = [
+            SystemMessage(content=self.prompt_manager.get_system_prompt("reflection")),
+            HumanMessage(content="\n".join(lines)),
+        ]
+        try:
+            result = await llm_service.chat_json(messages)
+        except Exception as e:
+            logger.warning(f"Reflection LLM call failed: {e}")
+            return
+
+        confidence = float(result.get("confidence", 0.5))
+        updates: dict[str, Any] = {}
+        if result.get("status") in STATUSES:
+            updates["status"] = result["status"]
+        if result.get("productivity_trend") in TRENDS:
+            updates["productivity_trend"] = result["productivity_trend"]
+        if result.get("summary"):
+            updates["reflection_summary"] = {
+                "day": today.isoformat(),
+                "text": str(result["summary"]),
+            }
+
+        async with AsyncSessionLocal() as session, session.begin():
+            state = UserStateService(session)
+            for key, value in updates.items():
+                await state.set(key, value, confidence=confidence)
+        report.state = updates
+
+
+async def run_reflection() -> None:
+    """Scheduler entry point for the nightly reflection."""
+    from app.api.deps import get_llm_service, get_prompt_manager
+
+    settings = get_settings()
+    llm_service = get_llm_service() if settings.reflection_llm_enabled else None
+    await ReflectionWorker(get_prompt_manager(), llm_service=llm_service).run()
@@ -0,0 +1,296 @@
+"""In-process reminder scheduler.
+
+Upcoming unsent reminders are kept in a min-heap keyed by ``remind_at`` and
+the scheduler sleeps until the earliest one is due. A trigger on
+``reminders`` (see ``scripts/init.sql``) publishes every change on the
+``reminders_changed`` channel; the scheduler LISTENs on a dedicated asyncpg
+connection and updates the heap, so new or rescheduled reminders are picked
+up immediately instead of on the next poll.
+
+Due rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` in batches
+and marked sent in the same transaction, so several app workers can run the
+scheduler without double-sending. A failed send moves the row's
+``remind_at`` forward by ``reminder_retry_delay_s`` in that transaction, so
+refills and other workers honour the retry delay too. A periodic full
+refill covers notifications missed while the LISTEN connection was down.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import asyncpg
+from sqlalchemy import false, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.tracing import get_tracer
+from app.models.task import Reminder, Task
+from app.services.telegram_service import TelegramService
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "reminders_changed"
+_MAX_HEAP_SIZE = 10_000
+_RECONNECT_DELAY_S = 5.0
+
+
+class ReminderScheduler:
+    """Dispatch reminders at their ``remind_at`` time.
+
+    Heap entries are ``(remind_at, reminder_id)``. Rescheduled or deleted
+    reminders are handled by lazy deletion: ``_scheduled`` holds the current
+    due time per id and heap entries that disagree with it are skipped.
+    """
+
+    def __init__(
+        self,
+        chat_id: int,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        telegram: TelegramService | None = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            chat_id: Telegram chat that receives unclaimed reminders (each
+                reminder otherwise goes to its owner chat).
+            session_factory: Session factory for claiming reminders.
+            telegram: Telegram service (defaults to a new instance).
+        """
+        settings = get_settings()
+        self.chat_id = chat_id
+        self.session_factory = session_factory
+        self.telegram = telegram or TelegramService()
+        self.batch_size = settings.reminder_batch_size
+        self.retry_delay = timedelta(seconds=settings.reminder_retry_delay_s)
+        self.refill_interval = timedelta(seconds=settings.reminder_refill_interval_s)
+
+        self._heap: list[tuple[datetime, int]] = []
+        self._scheduled: dict[int, datetime] = {}
+        self._wake = asyncio.Event()
+        self._refill_at = datetime.min.replace(tzinfo=UTC)
+        self._tasks: list[asyncio.Task[None]] = []
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the dispatch loop and the LISTEN connection."""
+        self._tasks = [
+            asyncio.create_task(self._run(), name="reminders-dispatch"),
+            asyncio.create_task(self._listen(), name="reminders-listen"),
+        ]
+
+    async def stop(self) -> None:
+        """Cancel background tasks and wait for them to exit."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # -- heap --------------------------------------------------------------
+
+    def _schedule(self, reminder_id: int, remind_at: datetime) -> None:
+        if self._scheduled.get(reminder_id) == remind_at:
+            return
+        self._scheduled[reminder_id] = remind_at
+        heapq.heappush(self._heap, (remind_at, reminder_id))
+
+    def _unschedule(self, reminder_id: int) -> None:
+        self._scheduled.pop(reminder_id, None)
+
+    def _next_due(self) -> datetime | None:
+        """Earliest live entry, discarding stale heap entries."""
+        while self._heap:
+            remind_at, reminder_id = self._heap[0]
+            if self._scheduled.get(reminder_id) == remind_at:
+                return remind_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now: datetime) -> None:
+        while (due := self._next_due()) is not None and due <= now:
+            _, reminder_id = heapq.heappop(self._heap)
+            self._unschedule(reminder_id)
+
+    async def _refill(self) -> None:
+        """Rebuild the heap from the ``idx_reminders_remind_at`` partial index.
+
+        ``is_sent = false`` (not ``IS false``) so the planner can match the
+        partial index predicate.
+        """
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(Reminder.id, Reminder.remind_at)
+                .where(Reminder.is_sent == false())
+                .order_by(Reminder.remind_at)
+                .limit(_MAX_HEAP_SIZE)
+            )
+            rows = result.all()
+        self._heap = [(remind_at, reminder_id) for reminder_id, remind_at in rows]
+        heapq.heapify(self._heap)
+        self._scheduled = {reminder_id: remind_at for reminder_id, remind_at in rows}
+        self._refill_at = datetime.now(UTC) + self.refill_interval
+        logger.info(f"Reminder heap loaded: {len(rows)} pending")
+
+    # -- LISTEN/NOTIFY -----------------------------------------------------
+
+    def _on_notify(self, conn: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            change = json.loads(payload)
+            reminder_id = int(change["id"])
+            if change["op"] == "DELETE" or change.get("is_sent"):
+                self._unschedule(reminder_id)
+            else:
+                self._schedule(reminder_id, datetime.fromisoformat(change["remind_at"]))
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Bad {CHANNEL} payload {payload!r}: {e}")
+            return
+        self._wake.set()
+
+    async def _listen(self) -> None:
+        """Keep a LISTEN connection open, reconnecting on failure."""
+        dsn = get_settings().asyncpg_dsn
+        while True:
+            closed = asyncio.Event()
+            try:
+                conn = await asyncpg.connect(dsn)
+            except Exception as e:
+                logger.warning(f"Reminder LISTEN connect failed: {e}")
+                await asyncio.sleep(_RECONNECT_DELAY_S)
+                continue
+            try:
+                conn.add_termination_listener(lambda _: closed.set())
+                await conn.add_listener(CHANNEL, self._on_notify)
+                # Changes may have been missed while disconnected
+                self._refill_at = datetime.min.replace(tzinfo=UTC)
+                self._wake.set()
+                await closed.wait()
+                logger.warning("Reminder LISTEN connection lost, reconnecting")
+            finally:
+                if not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(_RECONNECT_DELAY_S)
+
+    # -- dispatch ----------------------------------------------------------
+
+    async def _run(self) -> None:
+        """Sleep until the next reminder is due (or a NOTIFY arrives)."""
+        while True:
+            try:
+                now = datetime.now(UTC)
+                if now >= self._refill_at:
+                    await self._refill()
+                due = self._next_due()
+                if due is not None and due <= now:
+                    self._pop_due(now)
+                    await self.dispatch_due(now)
+                    continue
+                wake_at = self._refill_at if due is None else min(due, self._refill_at)
+                timeout = max((wake_at - now).total_seconds(), 0.0)
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout)
+                except TimeoutError:
+                    pass
+                self._wake.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Reminder dispatch loop error")
+                await asyncio.sleep(self.retry_delay.total_seconds())
+
+    async def dispatch_due(self, now: datetime) -> int:
+        """Claim and send every reminder due at ``now``, batch by batch.
+
+        Args:
+            now: Cutoff; reminders with ``remind_at <= now`` are due.
+
+        Returns:
+            Number of reminders delivered.
+        """
+        delivered = 0
+        while True:
+            with get_tracer().start_trace("reminder_dispatch") as root:
+                sent, claimed = await self._dispatch_batch(now)
+                if root is not None:
+                    root.attributes.update(claimed=claimed, sent=sent)
+            delivered += sent
+            # Stop on a short batch, or when sends failed (retried later)
+            if claimed < self.batch_size or sent < claimed:
+                return delivered
+
+    async def _dispatch_batch(self, now: datetime) -> tuple[int, int]:
+        """Claim one batch with SKIP LOCKED, send it, mark the sent rows.
+
+        Row locks are held until commit, so other workers skip these rows
+        while they are being sent.
+
+        Returns:
+            Tuple of (sent, claimed).
+        """
+        async with self.session_factory() as session, session.begin():
+            result = await session.execute(
+                select(
+                    Reminder.id,
+                    Reminder.remind_at,
+                    Reminder.message,
+                    Task.content,
+                    Reminder.owner_chat_id,
+                )
+                .join(Task, Task.id == Reminder.task_id)
+                .where(Reminder.is_sent == false(), Reminder.remind_at <= now)
+                .order_by(Reminder.remind_at)
+                .limit(self.batch_size)
+                .with_for_update(of=Reminder, skip_locked=True)
+            )
+            rows = result.all()
+            if not rows:
+                return 0, 0
+
+            outcomes = await asyncio.gather(
+                *(
+                    self.telegram.send_message(
+                        chat_id=owner_chat_id or self.chat_id,
+                        text=f"⏰ Nhắc nhở: {message or content}",
+                    )
+                    for _, _, message, content, owner_chat_id in rows
+                ),
+                return_exceptions=True,
+            )
+
+            sent_ids = []
+            failed_ids = []
+            retry_at = datetime.now(UTC) + self.retry_delay
+            for (reminder_id, remind_at, *_), outcome in zip(
+                rows, outcomes, strict=True
+            ):
+                if isinstance(outcome, BaseException):
+                    metrics.REMINDER_ERRORS.inc()
+                    logger.error(f"Failed to send reminder #{reminder_id}: {outcome}")
+                    failed_ids.append(reminder_id)
+                    self._schedule(reminder_id, retry_at)
+                    continue
+                sent_ids.append(reminder_id)
+                metrics.REMINDERS_SENT.inc()
+                metrics.REMINDER_LATENESS.observe(
+                    max((datetime.now(UTC) - remind_at).total_seconds(), 0.0)
+                )
+
+            if sent_ids:
+                await session.execute(
+                    update(Reminder)
+                    .where(Reminder.id.in_(sent_ids))
+                    .values(is_sent=True)
+                )
+            if failed_ids:
+                # Persisted so a refill (or another worker) waits out the delay
+                await session.execute(
+                    update(Reminder)
+                    .where(Reminder.id.in_(failed_ids))
+                    .values(remind_at=retry_at)
+                )
+        return len(sent_ids), len(rows)
@@ -0,0 +1,64 @@
+"""APScheduler setup for periodic background jobs.
+
+Reminders are event-driven (``app.workers.reminders``); only calendar- and
+interval-based jobs are scheduled here.
+"""
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from app.core.config import get_settings
+from app.workers.briefing import run_daily_briefing
+from app.workers.chat_retention import run_chat_retention
+from app.workers.embedding import run_embedding_ingestion
+from app.workers.reflection import run_reflection
+
+
+def create_scheduler() -> AsyncIOScheduler:
+    """Build the scheduler with all enabled jobs (not started).
+
+    Returns:
+        AsyncIOScheduler running in the user's timezone.
+    """
+    settings = get_settings()
+    scheduler = AsyncIOScheduler(timezone=settings.timezone)
+    if settings.briefing_enabled:
+        scheduler.add_job(
+            run_daily_briefing,
+            "cron",
+            hour=settings.briefing_hour,
+            minute=settings.briefing_minute,
+            id="daily_briefing",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600,
+        )
+    if settings.reflection_enabled:
+        scheduler.add_job(
+            run_reflection,
+            "cron",
+            hour=settings.reflection_hour,
+            minute=settings.reflection_minute,
+            id="reflection",
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=3600,
+        )
+    scheduler.add_job(
+        run_chat_retention,
+        "cron",
+        hour=settings.chat_retention_hour,
+        id="chat_retention",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
+    )
+    if settings.embedding_interval_minutes > 0:
+        scheduler.add_job(
+            run_embedding_ingestion,
+            "interval",
+            minutes=settings.embedding_interval_minutes,
+            id="embedding_ingestion",
+            max_instances=1,
+            coalesce=True,
+        )
+    return scheduler
@@ -0,0 +1 @@
+"""Benchmarks and load-testing harness."""
@@ -0,0 +1,250 @@
+"""Accuracy and latency of the local deadline parser on a phrasing corpus.
+
+Every phrase in ``CORPUS`` is parsed against a fixed reference time
+(Wednesday 11/03/2026 10:00, Asia/Ho_Chi_Minh) and compared with the
+expected deadline; ``PRIORITY_CORPUS`` and ``WINDOW_CORPUS`` do the same
+for priority inference and query windows. Prints failures, accuracy and
+per-parse latency, and exits non-zero on any mismatch, so it doubles as the
+parser's regression check.
+
+Usage:
+    python -m benchmarks.deadline_parser [--repeat 200] [--output path.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from zoneinfo import ZoneInfo
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from app.services.deadline_parser import (  # noqa: E402
+    detect_window,
+    infer_priority,
+    parse_deadline,
+)
+from benchmarks.webhook_load import RESULTS_DIR, git_revision, percentile  # noqa: E402
+
+TZ = ZoneInfo("Asia/Ho_Chi_Minh")
+NOW = datetime(2026, 3, 11, 10, 0, tzinfo=TZ)  # a Wednesday
+
+# (phrase, expected "YYYY-MM-DD HH:MM" or None)
+CORPUS: tuple[tuple[str, str | None], ...] = (
+    # Weekdays
+    ("thứ 6", "2026-03-13 17:00"),
+    ("thứ sáu", "2026-03-13 17:00"),
+    ("t6", "2026-03-13 17:00"),
+    ("trước thứ 6", "2026-03-13 17:00"),
+    ("thu 2", "2026-03-16 17:00"),
+    ("thứ 4", "2026-03-11 17:00"),
+    ("thứ 3", "2026-03-17 17:00"),
+    ("chủ nhật", "2026-03-15 17:00"),
+    ("CN", "2026-03-15 17:00"),
+    ("thứ 6 tuần sau", "2026-03-20 17:00"),
+    ("chủ nhật tuần sau", "2026-03-22 17:00"),
+    ("thứ 2 tuần tới 9h sáng", "2026-03-16 09:00"),
+    ("thứ 7 này", "2026-03-14 17:00"),
+    ("friday", "2026-03-13 17:00"),
+    ("next friday 5pm", "2026-03-20 17:00"),
+    ("monday morning", "2026-03-16 09:00"),
+    # Day words
+    ("hôm nay", "2026-03-11 17:00"),
+    ("trong hôm nay", "2026-03-11 17:00"),
+    ("mai", "2026-03-12 17:00"),
+    ("ngày mai", "2026-03-12 17:00"),
+    ("mai 3h chiều", "2026-03-12 15:00"),
+    ("9h sáng mai", "2026-03-12 09:00"),
+    ("sáng mai", "2026-03-12 09:00"),
+    ("trưa mai", "2026-03-12 12:00"),
+    ("tối mai", "2026-03-12 20:00"),
+    ("mai 3h", "2026-03-12 15:00"),
+    ("mai 8h", "2026-03-12 08:00"),
+    ("mai 10h tối", "2026-03-12 22:00"),
+    ("ngày mốt", "2026-03-13 17:00"),
+    ("mốt", "2026-03-13 17:00"),
+    ("ngày kia", "2026-03-13 17:00"),
+    ("tomorrow", "2026-03-12 17:00"),
+    ("tomorrow morning", "2026-03-12 09:00"),
+    ("tomorrow 2pm", "2026-03-12 14:00"),
+    ("tomorrow at 9", "2026-03-12 09:00"),
+    ("mai lúc 9", "2026-03-12 09:00"),
+    ("day after tomorrow", "2026-03-13 17:00"),
+    ("today", "2026-03-11 17:00"),
+    ("eod", "2026-03-11 17:00"),
+    ("eow", "2026-03-13 17:00"),
+    # Time only
+    ("tối nay", "2026-03-11 20:00"),
+    ("chiều nay", "2026-03-11 15:00"),
+    ("3h chiều", "2026-03-11 15:00"),
+    ("3h rưỡi chiều", "2026-03-11 15:30"),
+    ("15h30", "2026-03-11 15:30"),
+    ("15:30", "2026-03-11 15:30"),
+    ("14 giờ", "2026-03-11 14:00"),
+    ("3pm", "2026-03-11 15:00"),
+    ("3:30 pm", "2026-03-11 15:30"),
+    ("12h trưa", "2026-03-11 12:00"),
+    ("8h", "2026-03-12 08:00"),
+    ("9h sáng", "2026-03-12 09:00"),
+    ("tonight", "2026-03-11 20:00"),
+    ("12h đêm", "2026-03-12 00:00"),
+    ("mai 12h đêm", "2026-03-13 00:00"),
+    ("lúc 9 tối", "2026-03-11 21:00"),
+    ("sáu giờ chiều", "2026-03-11 18:00"),
+    ("bảy giờ tối", "2026-03-11 19:00"),
+    ("mai hai giờ chiều", "2026-03-12 14:00"),
+    ("mai tám giờ", "2026-03-12 08:00"),
+    ("tám giờ sáng mai", "2026-03-12 08:00"),
+    # Relative offsets
+    ("2 tiếng nữa", "2026-03-11 12:00"),
+    ("hai tiếng nữa", "2026-03-11 12:00"),
+    ("30 phút nữa", "2026-03-11 10:30"),
+    ("nửa tiếng nữa", "2026-03-11 10:30"),
+    ("trong 3 ngày", "2026-03-14 17:00"),
+    ("3 ngày nữa", "2026-03-14 17:00"),
+    ("sau 1 tuần", "2026-03-18 17:00"),
+    ("một tuần nữa", "2026-03-18 17:00"),
+    ("in 2 hours", "2026-03-11 12:00"),
+    ("in 3 days", "2026-03-14 17:00"),
+    ("2 weeks from now", "2026-03-25 17:00"),
+    ("2 hôm nữa", "2026-03-13 17:00"),
+    # Periods
+    ("cuối tuần", "2026-03-14 17:00"),
+    ("cuối tuần này", "2026-03-14 17:00"),
+    ("cuối tuần sau", "2026-03-21 17:00"),
+    ("weekend", "2026-03-14 17:00"),
+    ("tuần sau", "2026-03-16 17:00"),
+    ("đầu tuần sau", "2026-03-16 17:00"),
+    ("next week", "2026-03-16 17:00"),
+    ("cuối tháng", "2026-03-31 17:00"),
+    ("cuối tháng sau", "2026-04-30 17:00"),
+    ("end of month", "2026-03-31 17:00"),
+    ("tháng sau", "2026-04-01 17:00"),
+    ("cuối năm", "2026-12-31 17:00"),
+    # Dates
+    ("15/3", "2026-03-15 17:00"),
+    ("15/3 9h", "2026-03-15 09:00"),
+    ("20/03/2026", "2026-03-20 17:00"),
+    ("1/1", "2027-01-01 17:00"),
+    ("ngày 20", "2026-03-20 17:00"),
+    ("ngày 5", "2026-04-05 17:00"),
+    ("mùng 5", "2026-04-05 17:00"),
+    ("ngày 5 tháng 4", "2026-04-05 17:00"),
+    ("2026-04-01", "2026-04-01 17:00"),
+    ("31/2", None),
+    # No deadline
+    ("", None),
+    ("sớm", None),
+    ("khi nào xong thì báo", None),
+    ("mua 2 hộp sữa", None),
+    ("làm ngay bây giờ", None),
+)
+
+# (user message, deadline phrase, expected priority)
+PRIORITY_CORPUS: tuple[tuple[str, str, int], ...] = (
+    ("Tạo task fix bug login gấp", "", 1),
+    ("Nhắc tôi gửi báo giá, khẩn", "", 1),
+    ("deploy hotfix asap", "", 1),
+    ("Review PR thanh toán, quan trọng", "thứ 6", 2),
+    ("Add task P4 dọn dẹp repo", "", 4),
+    ("Viết doc không gấp", "", 4),
+    ("Đọc sách khi rảnh", "", 4),
+    ("Gửi email cho PM", "2 tiếng nữa", 2),
+    ("Gửi email cho PM", "tối nay", 2),
+    ("Chuẩn bị slide demo", "thứ 6 tuần sau", 3),
+    ("Lên kế hoạch sprint", "", 3),
+)
+
+# (query, expected deadline window)
+WINDOW_CORPUS: tuple[tuple[str, str | None], ...] = (
+    ("Hôm nay có task gì?", "today"),
+    ("hom nay can lam gi", "today"),
+    ("Mai có gì không?", "tomorrow"),
+    ("List deadline tuần này", "this_week"),
+    ("Task nào quá hạn rồi?", "overdue"),
+    ("what is overdue", "overdue"),
+    ("Đang có task gì?", None),
+)
+
+
+def _expected(value: str | None) -> datetime | None:
+    if value is None:
+        return None
+    return datetime.strptime(value, "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
+
+
+def run(repeat: int) -> dict[str, Any]:
+    """Check the corpora and time ``parse_deadline`` over the phrases."""
+    failures: list[dict[str, Any]] = []
+    for phrase, expected in CORPUS:
+        got = parse_deadline(phrase, NOW)
+        if got != _expected(expected):
+            failures.append({"phrase": phrase, "expected": expected, "got": str(got)})
+    for message, phrase, expected_priority in PRIORITY_CORPUS:
+        deadline = parse_deadline(phrase, NOW) if phrase else None
+        got_priority = infer_priority(f"{message} {phrase}", deadline, NOW)
+        if got_priority != expected_priority:
+            failures.append(
+                {
+                    "phrase": f"{message} | {phrase}",
+                    "expected": f"P{expected_priority}",
+                    "got": f"P{got_priority}",
+                }
+            )
+    for query, expected_window in WINDOW_CORPUS:
+        got_window = detect_window(query)
+        if got_window != expected_window:
+            failures.append(
+                {"phrase": query, "expected": expected_window, "got": got_window}
+            )
+
+    latencies: list[float] = []
+    for _ in range(repeat):
+        for phrase, _expected_value in CORPUS:
+            started = time.perf_counter()
+            parse_deadline(phrase, NOW)
+            latencies.append((time.perf_counter() - started) * 1_000_000)
+    total = len(CORPUS) + len(PRIORITY_CORPUS) + len(WINDOW_CORPUS)
+    return {
+        "cases": total,
+        "accuracy": round((total - len(failures)) / total, 4),
+        "failures": failures,
+        "p50_us": round(percentile(latencies, 50), 2),
+        "p99_us": round(percentile(latencies, 99), 2),
+    }
+
+
+def main() -> None:
+    """Entry point for ``python -m benchmarks.deadline_parser``."""
+    parser = argparse.ArgumentParser(description="Deadline parser corpus check")
+    parser.add_argument("--repeat", type=int, default=200, help="timing passes")
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    for failure in results["failures"]:
+        print(
+            f"FAIL {failure['phrase']!r}: expected {failure['expected']}, "
+            f"got {failure['got']}"
+        )
+    print(
+        f"{results['cases']} cases, accuracy {results['accuracy']:.1%}, "
+        f"parse p50 {results['p50_us']}us p99 {results['p99_us']}us"
+    )
+
+    sha = git_revision()
+    output = args.output or RESULTS_DIR / f"deadline-{sha}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"git_sha": sha, "now": NOW.isoformat(), "repeat": args.repeat}
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"\nResults written to {output}")
+    if results["failures"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
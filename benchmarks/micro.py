@@ -0,0 +1,180 @@
+"""Microbenchmarks for the webhook formatting and command dispatch helpers.
+
+Covers ``_format_task_line``, ``_truncate_message``, ``_handle_static_command``
+and ``_handle_data_command`` dispatch. Data commands run against an in-memory
+task source so only the routing and formatting cost is measured.
+
+Usage:
+    python -m benchmarks.micro [--repeat 7] [--output path.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+os.environ.setdefault("APP_ENV", "production")
+
+from app.api.routes.telegram import (  # noqa: E402
+    _format_task_line,
+    _handle_data_command,
+    _handle_static_command,
+    _truncate_message,
+)
+from app.core import metrics  # noqa: E402
+from app.models.task import Task  # noqa: E402
+from benchmarks.webhook_load import RESULTS_DIR, git_revision  # noqa: E402
+
+
+def _make_task(task_id: int, with_meta: bool = True) -> Task:
+    """Build a transient Task with realistic field values."""
+    now = datetime.now(UTC)
+    return Task(
+        id=task_id,
+        content=f"Review PR #{task_id} cho project <Billing> & deploy staging",
+        status="todo" if task_id % 3 else "in_progress",
+        priority=1 + task_id % 5,
+        deadline=now + timedelta(days=task_id % 10) if with_meta else None,
+        tags=["backend", "review", "q4"] if with_meta else None,
+        complexity="medium",
+        created_at=now,
+        updated_at=now,
+    )
+
+
+class InMemoryTaskSource:
+    """Duck-typed stand-in for TaskService used by data command dispatch."""
+
+    def __init__(self, tasks: list[Task]) -> None:
+        """Index tasks by status and ID."""
+        self._tasks = tasks
+        self._by_id = {t.id: t for t in tasks}
+
+    async def list_tasks_by_status(self, status: str, limit: int = 20) -> list[Task]:
+        """Return up to ``limit`` tasks with ``status``."""
+        return [t for t in self._tasks if t.status == status][:limit]
+
+    async def get_task_by_id(self, task_id: int) -> Task | None:
+        """Return a task by ID."""
+        return self._by_id.get(task_id)
+
+
+def _time_sync(fn: Callable[[], Any], number: int, repeat: int) -> list[float]:
+    """Return per-call nanoseconds for each repeat of ``number`` calls."""
+    runs: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter_ns() - start) / number)
+    return runs
+
+
+def _time_async(fn: Callable[[], Any], number: int, repeat: int) -> list[float]:
+    """Async variant of ``_time_sync``; ``fn`` returns an awaitable."""
+
+    async def _loop() -> list[float]:
+        runs: list[float] = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                await fn()
+            runs.append((time.perf_counter_ns() - start) / number)
+        return runs
+
+    return asyncio.run(_loop())
+
+
+def run_micro(repeat: int) -> dict[str, dict[str, float]]:
+    """Run all microbenchmarks and return ns/op statistics per case."""
+    full_task = _make_task(1000001)
+    bare_task = _make_task(1000002, with_meta=False)
+    source = InMemoryTaskSource([_make_task(1000000 + i) for i in range(40)])
+    short_text = "\n".join(_format_task_line(_make_task(1000000 + i)) for i in range(5))
+    long_text = "\n".join(
+        _format_task_line(_make_task(1000000 + i)) for i in range(200)
+    )
+
+    webhook_static = metrics.WEBHOOK_BY_TIER["static"]
+    cases: dict[str, tuple[str, Callable[[], Any], int]] = {
+        "metrics/observe_tier": ("sync", lambda: webhook_static.observe(0.01), 50000),
+        "metrics/command_lookup": (
+            "sync",
+            lambda: metrics.command_histogram("/task 1000001").observe(0.01),
+            50000,
+        ),
+        "format_task_line/full": ("sync", lambda: _format_task_line(full_task), 20000),
+        "format_task_line/bare": ("sync", lambda: _format_task_line(bare_task), 20000),
+        "truncate_message/short": (
+            "sync",
+            lambda: _truncate_message(short_text),
+            50000,
+        ),
+        "truncate_message/long": ("sync", lambda: _truncate_message(long_text), 50000),
+        "static_command/hit": ("sync", lambda: _handle_static_command("/help"), 50000),
+        "static_command/miss": (
+            "sync",
+            lambda: _handle_static_command("Tạo task review PR"),
+            50000,
+        ),
+        "data_command/tasks": (
+            "async",
+            lambda: _handle_data_command("/tasks", source),  # type: ignore[arg-type]
+            2000,
+        ),
+        "data_command/task_detail": (
+            "async",
+            lambda: _handle_data_command("/task 1000005", source),  # type: ignore[arg-type]
+            5000,
+        ),
+        "data_command/miss": (
+            "async",
+            lambda: _handle_data_command("Hôm nay có task gì?", source),  # type: ignore[arg-type]
+            20000,
+        ),
+    }
+
+    results: dict[str, dict[str, float]] = {}
+    for name, (kind, fn, number) in cases.items():
+        timer = _time_sync if kind == "sync" else _time_async
+        runs = timer(fn, number, repeat)
+        results[name] = {
+            "median_ns": round(statistics.median(runs), 1),
+            "min_ns": round(min(runs), 1),
+            "stdev_ns": round(statistics.stdev(runs), 1) if len(runs) > 1 else 0.0,
+        }
+    return results
+
+
+def main() -> None:
+    """Entry point for ``python -m benchmarks.micro``."""
+    parser = argparse.ArgumentParser(description="Webhook helper microbenchmarks")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    results = run_micro(args.repeat)
+    print(f"{'case':<28}{'median ns/op':>14}{'min':>12}{'stdev':>10}")
+    for name, stats in results.items():
+        print(
+            f"{name:<28}{stats['median_ns']:>14}{stats['min_ns']:>12}{stats['stdev_ns']:>10}"
+        )
+
+    sha = git_revision()
+    output = args.output or RESULTS_DIR / f"micro-{sha}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps({"meta": {"git_sha": sha}, "cases": results}, indent=2)
+    )
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
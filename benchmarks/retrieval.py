@@ -0,0 +1,329 @@
+"""Recall and latency of hybrid retrieval against vector-only and BM25-only.
+
+Builds a synthetic memory of tasks and chat messages (Vietnamese action
+phrases, project names, 7-digit task ids) and three query sets:
+
+- ``id``: "task #1000123" -> exactly that task;
+- ``paraphrase``: a subset of a row's words with English verbs inflected
+  ("reviewing", "deployed") -> any row with the same action and project;
+- ``unaccented``: the same, typed without diacritics.
+
+Reports hit@k and MRR per query set and p50/p95 latency per method. The
+default offline hashing embedder only captures lexical/sub-word overlap;
+``--embedder openai`` measures a real semantic model (needs an API key).
+
+Usage:
+    python -m benchmarks.retrieval [--docs 20000] [--queries 300] [--k 5]
+        [--embedder hashing|openai] [--output path.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from app.services.embedding_service import (  # noqa: E402
+    Embedder,
+    HashingEmbedder,
+    OpenAIEmbedder,
+    point_id,
+)
+from app.services.lexical_index import (  # noqa: E402
+    BM25Index,
+    LexicalDoc,
+    fold,
+    lexical_text,
+)
+from app.services.retrieval_service import RetrievalService  # noqa: E402
+from app.services.vector_index import EmbeddedVectorStore  # noqa: E402
+from app.services.vector_store import SearchHit, VectorPoint  # noqa: E402
+from benchmarks.webhook_load import RESULTS_DIR, git_revision, percentile  # noqa: E402
+
+PROJECTS = (
+    "Billing",
+    "Atlas",
+    "Phoenix",
+    "Helios",
+    "Orion",
+    "Mercury",
+    "Kraken",
+    "Nimbus",
+    "Sakura",
+    "Lotus",
+)
+ACTIONS = (
+    "review PR thanh toán",
+    "deploy bản staging",
+    "fix bug đăng nhập",
+    "họp với khách hàng về báo giá",
+    "viết tài liệu API",
+    "tối ưu truy vấn database",
+    "cập nhật dashboard doanh thu",
+    "gửi email cho PM về tiến độ",
+    "chuẩn bị slide demo",
+    "kiểm tra log lỗi thanh toán",
+    "refactor module thông báo",
+    "test hiệu năng trang chủ",
+    "lên kế hoạch sprint tiếp theo",
+    "phỏng vấn ứng viên backend",
+    "đọc báo cáo tài chính quý",
+)
+CONTEXTS = (
+    "trước thứ 6",
+    "gấp",
+    "sau buổi họp sáng",
+    "nhớ note lại",
+    "cuối tuần này",
+    "khi có thời gian",
+    "ưu tiên cao",
+    "",
+)
+INFLECTIONS = {
+    "review": "reviewing",
+    "deploy": "deployed",
+    "fix": "fixing",
+    "test": "tests",
+    "refactor": "refactoring",
+}
+_FIRST_TASK_ID = 1_000_000
+
+
+@dataclass(slots=True)
+class Row:
+    """One synthetic memory row."""
+
+    id: str
+    source: str
+    source_id: int
+    action: int
+    project: int
+    text: str
+
+
+@dataclass(slots=True)
+class Query:
+    """A query with the ids of its relevant rows."""
+
+    kind: str
+    text: str
+    relevant: set[str]
+
+
+def build_corpus(size: int, rng: random.Random) -> list[Row]:
+    """Tasks and chat messages over random (action, project) pairs."""
+    rows = []
+    for i in range(size):
+        action, project = rng.randrange(len(ACTIONS)), rng.randrange(len(PROJECTS))
+        context = rng.choice(CONTEXTS)
+        if i % 2 == 0:
+            task_id = _FIRST_TASK_ID + i
+            text = f"{ACTIONS[action]} cho project {PROJECTS[project]} {context}"
+            rows.append(
+                Row(point_id("task", task_id), "task", task_id, action, project, text)
+            )
+        else:
+            text = f"hôm nay anh {ACTIONS[action]} bên {PROJECTS[project]} {context}"
+            rows.append(
+                Row(point_id("chat_log", i), "chat_log", i, action, project, text)
+            )
+    return rows
+
+
+def build_queries(rows: list[Row], per_kind: int, rng: random.Random) -> list[Query]:
+    """Identifier, paraphrase and unaccented queries with relevance sets."""
+    by_topic: dict[tuple[int, int], set[str]] = {}
+    for row in rows:
+        by_topic.setdefault((row.action, row.project), set()).add(row.id)
+    tasks = [row for row in rows if row.source == "task"]
+
+    queries = []
+    for row in rng.sample(tasks, per_kind):
+        queries.append(Query("id", f"task #{row.source_id}", {row.id}))
+    for kind in ("paraphrase", "unaccented"):
+        for row in rng.sample(rows, per_kind):
+            words = [INFLECTIONS.get(w, w) for w in ACTIONS[row.action].split()]
+            kept = [w for w in words if rng.random() > 0.35] or words[:1]
+            text = " ".join([*kept, PROJECTS[row.project]])
+            if kind == "unaccented":
+                text = fold(text)
+            queries.append(Query(kind, text, by_topic[(row.action, row.project)]))
+    return queries
+
+
+class InMemoryLexicalIndex:
+    """BM25Index behind the async LexicalIndex interface (no database)."""
+
+    def __init__(self) -> None:
+        """Create an empty index."""
+        self.index = BM25Index()
+
+    async def warm(self) -> None:
+        """Nothing to load."""
+
+    async def add(self, docs: list[LexicalDoc]) -> None:
+        """Index documents."""
+        self.index.add(docs)
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        sources: list[str] | None = None,
+        owner_chat_id: int | None = None,
+    ) -> list[SearchHit]:
+        """BM25 search."""
+        return self.index.search(query, limit, sources, owner_chat_id)
+
+    async def close(self) -> None:
+        """Nothing to release."""
+
+
+async def run_benchmark(
+    embedder: Embedder,
+    size: int,
+    per_kind: int,
+    k: int,
+) -> dict[str, Any]:
+    """Index the corpus, then score each method on each query set."""
+    rng = random.Random(0)
+    rows = build_corpus(size, rng)
+    queries = build_queries(rows, per_kind, rng)
+
+    with tempfile.TemporaryDirectory(prefix="retrieval_bench_") as path:
+        store = EmbeddedVectorStore(path)
+        lexical = InMemoryLexicalIndex()
+        await store.ensure_collection(embedder.dim)
+        started = time.perf_counter()
+        for start in range(0, len(rows), 512):
+            batch = rows[start : start + 512]
+            vectors = await embedder.embed([row.text for row in batch])
+            payloads = [
+                {
+                    "source": row.source,
+                    "source_id": row.source_id,
+                    "content_preview": row.text,
+                    "tags": [],
+                }
+                for row in batch
+            ]
+            await store.upsert(
+                [
+                    VectorPoint(row.id, vector, payload)
+                    for row, vector, payload in zip(
+                        batch, vectors, payloads, strict=True
+                    )
+                ]
+            )
+            await lexical.add(
+                [
+                    LexicalDoc(
+                        row.id,
+                        lexical_text(row.source, row.source_id, row.text),
+                        payload,
+                    )
+                    for row, payload in zip(batch, payloads, strict=True)
+                ]
+            )
+        index_s = time.perf_counter() - started
+        service = RetrievalService(embedder, store, lexical, cache_ttl_s=0)
+
+        async def vector_only(text: str) -> list[str]:
+            vector = (await embedder.embed([text]))[0]
+            return [hit.id for hit in await store.search(vector, k)]
+
+        async def lexical_only(text: str) -> list[str]:
+            return [hit.id for hit in await lexical.search(text, k)]
+
+        async def hybrid(text: str) -> list[str]:
+            items = await service.retrieve(text, limit=k)
+            return [
+                point_id(item.source, int(item.payload["source_id"])) for item in items
+            ]
+
+        methods: dict[str, Callable[[str], Awaitable[list[str]]]] = {
+            "vector": vector_only,
+            "bm25": lexical_only,
+            "hybrid": hybrid,
+        }
+        results: dict[str, Any] = {"index_s": round(index_s, 2), "methods": {}}
+        for name, method in methods.items():
+            await method(queries[0].text)
+            latencies: list[float] = []
+            hits: dict[str, list[float]] = {}
+            reciprocal: dict[str, list[float]] = {}
+            for query in queries:
+                started = time.perf_counter()
+                ids = await method(query.text)
+                latencies.append((time.perf_counter() - started) * 1000)
+                rank = next(
+                    (i for i, id_ in enumerate(ids, 1) if id_ in query.relevant), None
+                )
+                hits.setdefault(query.kind, []).append(1.0 if rank else 0.0)
+                reciprocal.setdefault(query.kind, []).append(1 / rank if rank else 0.0)
+            results["methods"][name] = {
+                "p50_ms": round(percentile(latencies, 50), 3),
+                "p95_ms": round(percentile(latencies, 95), 3),
+                **{
+                    f"{kind}_hit_at_k": round(statistics.fmean(values), 3)
+                    for kind, values in hits.items()
+                },
+                **{
+                    f"{kind}_mrr": round(statistics.fmean(values), 3)
+                    for kind, values in reciprocal.items()
+                },
+            }
+    return results
+
+
+def main() -> None:
+    """Entry point for ``python -m benchmarks.retrieval``."""
+    parser = argparse.ArgumentParser(description="Hybrid retrieval benchmark")
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--queries", type=int, default=300, help="per query set")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--embedder", choices=("hashing", "openai"), default="hashing")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    embedder: Embedder
+    if args.embedder == "openai":
+        embedder = OpenAIEmbedder("text-embedding-3-small", args.dim)
+    else:
+        embedder = HashingEmbedder(args.dim)
+    results = asyncio.run(run_benchmark(embedder, args.docs, args.queries, args.k))
+
+    kinds = ("id", "paraphrase", "unaccented")
+    print(f"{args.docs} docs indexed in {results['index_s']}s, k={args.k}\n")
+    print(
+        f"{'method':<10}"
+        + "".join(f"{kind + ' hit/mrr':>22}" for kind in kinds)
+        + f"{'p50 ms':>10}{'p95 ms':>10}"
+    )
+    for name, stats in results["methods"].items():
+        cells = "".join(
+            f"{stats[f'{kind}_hit_at_k']:>14.3f}/{stats[f'{kind}_mrr']:<7.3f}"
+            for kind in kinds
+        )
+        print(f"{name:<10}{cells}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}")
+
+    sha = git_revision()
+    output = args.output or RESULTS_DIR / f"retrieval-{sha}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    meta = {"git_sha": sha, "docs": args.docs, "k": args.k, "embedder": embedder.model}
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Stub Telegram Bot API and OpenAI-compatible endpoints for benchmarks.
+
+Both stubs are served from one FastAPI app so a benchmark run only needs a
+single local port. Latencies are simulated with ``asyncio.sleep`` so the app
+under test sees realistic network waits without hitting real services.
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+@dataclass
+class StubConfig:
+    """Simulated latency settings for the stub endpoints.
+
+    Attributes:
+        telegram_latency_ms: Mean latency of Telegram API calls.
+        llm_latency_ms: Mean latency of chat completion calls.
+        jitter: Relative jitter applied to each latency (0.2 = +/-20%).
+    """
+
+    telegram_latency_ms: float = 40.0
+    llm_latency_ms: float = 400.0
+    jitter: float = 0.2
+
+
+@dataclass
+class StubStats:
+    """Counters collected by the stub server during a run."""
+
+    telegram_calls: int = 0
+    llm_calls: int = 0
+    llm_json_calls: int = 0
+    by_method: dict[str, int] = field(default_factory=dict)
+
+
+def _classify(text: str) -> dict[str, Any]:
+    """Return a deterministic analyzer-style classification for a message."""
+    lower = text.lower()
+    if any(w in lower for w in ("tạo", "thêm", "nhắc")):
+        return {
+            "intent": "create_task",
+            "confidence": 0.9,
+            "entities": {"task_content": text[:80]},
+        }
+    if any(w in lower for w in ("hôm nay", "có task gì", "tuần này")):
+        return {"intent": "query", "confidence": 0.85, "entities": {}}
+    if any(w in lower for w in ("done", "xong", "hủy")):
+        return {"intent": "update_task", "confidence": 0.8, "entities": {}}
+    return {"intent": "chat", "confidence": 0.7, "entities": {}}
+
+
+def _last_user_message(messages: list[dict[str, Any]]) -> str:
+    """Extract the final user message text from a chat completion payload."""
+    for msg in reversed(messages):
+        if msg.get("role") == "user":
+            content = msg.get("content", "")
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+def create_stub_app(config: StubConfig, stats: StubStats) -> FastAPI:
+    """Build the stub FastAPI application.
+
+    Args:
+        config: Latency settings.
+        stats: Mutable counters updated by the handlers.
+
+    Returns:
+        FastAPI app serving ``/bot{token}/{method}`` and ``/v1/*``.
+    """
+    app = FastAPI()
+
+    async def _sleep(mean_ms: float) -> None:
+        if mean_ms <= 0:
+            return
+        spread = mean_ms * config.jitter
+        await asyncio.sleep(
+            max(0.0, random.uniform(mean_ms - spread, mean_ms + spread)) / 1000
+        )
+
+    @app.post("/bot{token}/{method}")
+    @app.get("/bot{token}/{method}")
+    async def telegram(token: str, method: str) -> dict[str, Any]:
+        stats.telegram_calls += 1
+        stats.by_method[method] = stats.by_method.get(method, 0) + 1
+        await _sleep(config.telegram_latency_ms)
+        return {"ok": True, "result": {"message_id": stats.telegram_calls}}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        stats.llm_calls += 1
+        await _sleep(config.llm_latency_ms)
+
+        user_text = _last_user_message(body.get("messages", []))
+        if body.get("response_format", {}).get("type") == "json_object":
+            stats.llm_json_calls += 1
+            content = json.dumps(_classify(user_text), ensure_ascii=False)
+        else:
+            content = "✅ Noted. (stub response)"
+
+        prompt_tokens = sum(
+            len(str(m.get("content", ""))) // 4 for m in body.get("messages", [])
+        )
+        completion_tokens = len(content) // 4
+        return {
+            "id": f"chatcmpl-stub-{stats.llm_calls}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    return app
+
+
+class StubServer:
+    """Run the stub app with uvicorn on a background thread.
+
+    Example:
+        with StubServer(StubConfig(), port=9100) as stub:
+            ...  # point TELEGRAM_API_BASE_URL / OPENAI_BASE_URL at stub.url
+    """
+
+    def __init__(
+        self, config: StubConfig, host: str = "127.0.0.1", port: int = 9100
+    ) -> None:
+        """Initialize the server (not started yet)."""
+        self.stats = StubStats()
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(
+            uvicorn.Config(
+                create_stub_app(config, self.stats),
+                host=host,
+                port=port,
+                log_level="warning",
+                access_log=False,
+            )
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running stub server."""
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self) -> "StubServer":
+        """Start the server and wait until it accepts connections."""
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        """Stop the server thread."""
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
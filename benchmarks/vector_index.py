@@ -0,0 +1,274 @@
+"""Recall and latency of the vector store backends.
+
+Indexes synthetic clustered unit vectors (topic centers plus noise, which
+is closer to real embeddings than uniform noise) and runs held-out queries
+against each backend:
+
+- ``embedded-exact``: EmbeddedVectorStore full scan over float16 rows;
+- ``embedded-ivf``: EmbeddedVectorStore approximate (IVF) search;
+- ``qdrant``: QdrantVectorStore (``--qdrant-url``; the default ``:memory:``
+  local mode is a pure-Python scan, so it is capped by ``--qdrant-max``).
+
+Recall@k is measured against an exact float32 scan of the same data.
+
+Usage:
+    python -m benchmarks.vector_index [--sizes 10000,100000,1000000]
+        [--dim 384] [--queries 200] [--k 10] [--nprobe 16]
+        [--qdrant-url :memory:] [--output path.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+
+from app.services.vector_index import EmbeddedVectorStore  # noqa: E402
+from app.services.vector_store import (  # noqa: E402
+    QdrantVectorStore,
+    SearchHit,
+    VectorPoint,
+)
+from benchmarks.webhook_load import RESULTS_DIR, git_revision, percentile  # noqa: E402
+
+_CHUNK = 10_000
+_TOPICS = 512
+_NOISE = 0.6
+_SOURCES = ("chat_log", "task", "document")
+
+
+def _point_id(row: int) -> str:
+    # Qdrant accepts only UUIDs or unsigned integers as point ids
+    return str(uuid.UUID(int=row))
+
+
+class Corpus:
+    """Deterministic clustered vectors, generated chunk by chunk."""
+
+    def __init__(self, size: int, dim: int, seed: int = 0) -> None:
+        """Draw topic centers; rows are generated on demand."""
+        self.size = size
+        self.dim = dim
+        self.seed = seed
+        self.centers = np.random.default_rng(seed).standard_normal((_TOPICS, dim))
+
+    def _draw(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        topics = rng.integers(0, _TOPICS, size=n)
+        vectors = self.centers[topics] + _NOISE * rng.standard_normal((n, self.dim))
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.astype(np.float32)
+
+    def chunks(self) -> Iterator[tuple[int, np.ndarray]]:
+        """Yield ``(first_row, vectors)`` chunks covering the corpus."""
+        for start in range(0, self.size, _CHUNK):
+            n = min(_CHUNK, self.size - start)
+            yield start, self._draw(np.random.default_rng((self.seed, start)), n)
+
+    def queries(self, n: int) -> np.ndarray:
+        """Held-out queries from the same distribution."""
+        return self._draw(np.random.default_rng((self.seed, 2**32 - 1)), n)
+
+    def points(self, start: int, vectors: np.ndarray) -> list[VectorPoint]:
+        """Wrap a chunk as points with a realistic payload."""
+        return [
+            VectorPoint(
+                id=_point_id(start + i),
+                vector=vector,
+                payload={
+                    "source": _SOURCES[(start + i) % 3],
+                    "source_id": start + i,
+                    "tags": ["work"] if (start + i) % 7 == 0 else [],
+                },
+            )
+            for i, vector in enumerate(vectors)
+        ]
+
+
+def ground_truth(corpus: Corpus, queries: np.ndarray, k: int) -> list[set[str]]:
+    """Exact float32 top-k ids per query."""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for start, vectors in corpus.chunks():
+        scores = np.concatenate([best_scores, queries @ vectors.T], axis=1)
+        ids = np.concatenate(
+            [
+                best_ids,
+                np.broadcast_to(start + np.arange(len(vectors)), scores[:, k:].shape),
+            ],
+            axis=1,
+        )
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return [{_point_id(int(i)) for i in row} for row in best_ids]
+
+
+def measure(
+    search: Callable[[np.ndarray], list[SearchHit]],
+    queries: np.ndarray,
+    truth: list[set[str]],
+    k: int,
+) -> dict[str, float]:
+    """Latency percentiles and mean recall@k of a search function."""
+    search(queries[0])  # warm caches / page in
+    latencies: list[float] = []
+    recalls: list[float] = []
+    for query, expected in zip(queries, truth, strict=True):
+        started = time.perf_counter()
+        hits = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(len({hit.id for hit in hits} & expected) / k)
+    return {
+        "recall_at_k": round(statistics.fmean(recalls), 4),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+    }
+
+
+def bench_embedded(
+    corpus: Corpus,
+    queries: np.ndarray,
+    truth: list[set[str]],
+    k: int,
+    nprobe: int,
+) -> dict[str, Any]:
+    """Build an EmbeddedVectorStore and measure exact and IVF search."""
+    results: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory(prefix="vector_bench_") as path:
+        # Train explicitly so IVF is measured at every size
+        store = EmbeddedVectorStore(path, ann_min_vectors=0, nprobe=nprobe)
+        store.ensure_collection_sync(corpus.dim)
+        started = time.perf_counter()
+        for start, vectors in corpus.chunks():
+            store.upsert_sync(corpus.points(start, vectors))
+        build_s = time.perf_counter() - started
+        started = time.perf_counter()
+        store.train()
+        train_s = time.perf_counter() - started
+        disk_mb = sum(f.stat().st_size for f in Path(path).iterdir()) / 2**20
+
+        results["embedded-exact"] = {
+            "build_s": round(build_s, 2),
+            "disk_mb": round(disk_mb, 1),
+            **measure(lambda q: store.search_sync(q, k, exact=True), queries, truth, k),
+        }
+        results["embedded-ivf"] = {
+            "build_s": round(build_s + train_s, 2),
+            "train_s": round(train_s, 2),
+            "nprobe": nprobe,
+            **measure(lambda q: store.search_sync(q, k), queries, truth, k),
+        }
+        filtered = measure(
+            lambda q: store.search_sync(q, k, sources=["task"]), queries, truth, k
+        )
+        results["embedded-ivf"]["filtered_p50_ms"] = filtered["p50_ms"]
+    return results
+
+
+def bench_qdrant(
+    corpus: Corpus,
+    queries: np.ndarray,
+    truth: list[set[str]],
+    k: int,
+    url: str,
+) -> dict[str, Any]:
+    """Load a Qdrant collection and measure search."""
+
+    async def _run() -> dict[str, Any]:
+        store = QdrantVectorStore(url, collection="vector_index_bench")
+        await store._client.delete_collection(store.collection)
+        await store.ensure_collection(corpus.dim)
+        started = time.perf_counter()
+        for start, vectors in corpus.chunks():
+            await store.upsert(corpus.points(start, vectors))
+        build_s = time.perf_counter() - started
+
+        loop_latencies: list[float] = []
+        recalls: list[float] = []
+        await store.search(queries[0], k)
+        for query, expected in zip(queries, truth, strict=True):
+            started = time.perf_counter()
+            hits = await store.search(query, k)
+            loop_latencies.append((time.perf_counter() - started) * 1000)
+            recalls.append(len({hit.id for hit in hits} & expected) / k)
+        await store._client.delete_collection(store.collection)
+        await store.close()
+        return {
+            "build_s": round(build_s, 2),
+            "recall_at_k": round(statistics.fmean(recalls), 4),
+            "p50_ms": round(percentile(loop_latencies, 50), 3),
+            "p95_ms": round(percentile(loop_latencies, 95), 3),
+        }
+
+    return asyncio.run(_run())
+
+
+def main() -> None:
+    """Entry point for ``python -m benchmarks.vector_index``."""
+    parser = argparse.ArgumentParser(description="Vector store recall/latency")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--qdrant-url", default=":memory:")
+    parser.add_argument(
+        "--qdrant-max",
+        type=int,
+        default=None,
+        help="Skip Qdrant above this size (default: 100000 for :memory:)",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    qdrant_max = args.qdrant_max
+    if qdrant_max is None:
+        qdrant_max = 100_000 if args.qdrant_url == ":memory:" else 10**9
+
+    results: dict[str, dict[str, Any]] = {}
+    print(
+        f"{'size':>9}  {'backend':<16}{'recall@' + str(args.k):>10}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'build s':>10}"
+    )
+    for size in (int(s) for s in args.sizes.split(",")):
+        corpus = Corpus(size, args.dim)
+        queries = corpus.queries(args.queries)
+        truth = ground_truth(corpus, queries, args.k)
+        by_backend = bench_embedded(corpus, queries, truth, args.k, args.nprobe)
+        if size <= qdrant_max:
+            by_backend["qdrant"] = bench_qdrant(
+                corpus, queries, truth, args.k, args.qdrant_url
+            )
+        for backend, stats in by_backend.items():
+            print(
+                f"{size:>9}  {backend:<16}{stats['recall_at_k']:>10.3f}"
+                f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                f"{stats['build_s']:>10.1f}"
+            )
+        results[str(size)] = by_backend
+
+    sha = git_revision()
+    output = args.output or RESULTS_DIR / f"vector-{sha}-{int(time.time())}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    meta = {
+        "git_sha": sha,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "qdrant_url": args.qdrant_url,
+    }
+    output.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
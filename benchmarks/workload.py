@@ -0,0 +1,131 @@
+"""Synthetic Telegram update streams for webhook benchmarks.
+
+Arrivals follow a two-state (calm/burst) Markov-modulated Poisson process so
+the app sees both steady load and short spikes, spread across many chats.
+"""
+
+import random
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+# Message mix per tier, roughly matching real usage:
+# Tier 1 static commands, Tier 2 DB-only commands, Tier 3 LLM messages.
+TIER_STATIC = "static"
+TIER_DATA = "data"
+TIER_LLM = "llm"
+
+_STATIC_TEXTS = ["/start", "/help"]
+_DATA_TEXTS = ["/tasks", "/todo", "/doing", "/done", "/task {task_id}"]
+_LLM_TEXTS = [
+    "Tạo task review PR cho project {project} deadline thứ 6",
+    "Nhắc anh gửi email cho PM về {project}",
+    "Hôm nay có task gì?",
+    "List deadline tuần này",
+    "Task {task_id} xong rồi",
+    "Task {task_id} đang làm",
+    "Hello, hôm nay thế nào?",
+    "Tuần này làm được gì?",
+]
+_PROJECTS = ["Alpha", "Billing", "Infra", "Mobile", "Search"]
+
+
+@dataclass
+class WorkloadConfig:
+    """Shape of the generated update stream.
+
+    Attributes:
+        messages: Total number of updates to generate.
+        chats: Number of distinct chats sending messages.
+        rate: Mean arrivals per second in the calm state.
+        burst_rate: Mean arrivals per second in the burst state.
+        burst_probability: Chance of switching calm -> burst per arrival.
+        burst_length: Mean number of arrivals per burst.
+        mix: Fraction of updates per tier (static, data, llm).
+        seed: RNG seed for reproducible streams.
+    """
+
+    messages: int = 1000
+    chats: int = 200
+    rate: float = 20.0
+    burst_rate: float = 200.0
+    burst_probability: float = 0.02
+    burst_length: int = 40
+    mix: tuple[float, float, float] = (0.15, 0.45, 0.40)
+    seed: int = 42
+
+
+def bench_chat_ids(chats: int) -> list[int]:
+    """Telegram chat IDs of the simulated users."""
+    return [100_000_000 + i for i in range(chats)]
+
+
+@dataclass
+class ScheduledUpdate:
+    """One webhook call to make at ``offset`` seconds after start."""
+
+    offset: float
+    tier: str
+    update: dict[str, object]
+
+
+def generate_updates(
+    config: WorkloadConfig,
+    task_ids: dict[int, list[int]],
+) -> Iterator[ScheduledUpdate]:
+    """Yield updates with arrival offsets according to ``config``.
+
+    Args:
+        config: Workload shape.
+        task_ids: Existing task IDs per owner chat, used for ``/task <id>``
+            and updates (tasks are only visible to their owner).
+
+    Yields:
+        ScheduledUpdate items ordered by offset.
+    """
+    rng = random.Random(config.seed)
+    tiers = [TIER_STATIC, TIER_DATA, TIER_LLM]
+    chat_ids = bench_chat_ids(config.chats)
+    # Zipf-like chat activity: a few chats are much busier than the rest
+    chat_weights = [1.0 / (i + 1) ** 0.8 for i in range(config.chats)]
+
+    offset = 0.0
+    burst_left = 0
+    for update_id in range(1, config.messages + 1):
+        if burst_left == 0 and rng.random() < config.burst_probability:
+            burst_left = max(1, int(rng.expovariate(1.0 / config.burst_length)))
+        rate = config.burst_rate if burst_left > 0 else config.rate
+        burst_left = max(0, burst_left - 1)
+        offset += rng.expovariate(rate)
+
+        tier = rng.choices(tiers, weights=config.mix)[0]
+        pool = {
+            TIER_STATIC: _STATIC_TEXTS,
+            TIER_DATA: _DATA_TEXTS,
+            TIER_LLM: _LLM_TEXTS,
+        }[tier]
+        chat_id = rng.choices(chat_ids, weights=chat_weights)[0]
+        owned = task_ids.get(chat_id)
+        text = rng.choice(pool).format(
+            task_id=rng.choice(owned) if owned else 1000000,
+            project=rng.choice(_PROJECTS),
+        )
+
+        yield ScheduledUpdate(
+            offset=offset,
+            tier=tier,
+            update={
+                "update_id": update_id,
+                "message": {
+                    "message_id": update_id,
+                    "date": int(offset),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {
+                        "id": chat_id,
+                        "is_bot": False,
+                        "first_name": "Bench",
+                        "username": f"bench_{chat_id}",
+                    },
+                    "text": text,
+                },
+            },
+        )
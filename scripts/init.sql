@@ -9,9 +9,34 @@ CREATE SEQUENCE IF NOT EXISTS calendar_events_id_seq START WITH 1000000;
 CREATE SEQUENCE IF NOT EXISTS chat_logs_id_seq START WITH 1000000;
 CREATE SEQUENCE IF NOT EXISTS documents_id_seq START WITH 1000000;
 
+-- Full-text search: 'simple' parsing with diacritics folded, so "hop khach"
+-- matches "họp khách" (Vietnamese has no stemmer; words are syllables)
+CREATE EXTENSION IF NOT EXISTS unaccent;
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'vietnamese_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION vietnamese_unaccent (COPY = simple);
+        ALTER TEXT SEARCH CONFIGURATION vietnamese_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;
+    END IF;
+END
+$$;
+
+-- Trigram matching of task references ("task review PR xong roi");
+-- fold_text mirrors app.services.lexical_index.fold and is immutable so it
+-- can be indexed (unaccent() itself is only stable)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE OR REPLACE FUNCTION fold_text(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$;
+
+-- Composite GIN indexes led by owner_chat_id (btree operators for BIGINT)
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
 -- Projects for grouping tasks (must be created first due to FK)
 CREATE TABLE IF NOT EXISTS projects (
     id BIGINT PRIMARY KEY DEFAULT nextval('projects_id_seq'),
+    owner_chat_id BIGINT NOT NULL DEFAULT 0,  -- Owning Telegram chat (0: unclaimed)
     name VARCHAR(255) NOT NULL,
     description TEXT,
     status VARCHAR(20) DEFAULT 'active',  -- active, paused, archived
@@ -21,6 +46,7 @@ CREATE TABLE IF NOT EXISTS projects (
 -- Tasks with full metadata
 CREATE TABLE IF NOT EXISTS tasks (
     id BIGINT PRIMARY KEY DEFAULT nextval('tasks_id_seq'),
+    owner_chat_id BIGINT NOT NULL DEFAULT 0,  -- Owning Telegram chat (0: unclaimed)
     content TEXT NOT NULL,
     status VARCHAR(20) DEFAULT 'todo',     -- todo, in_progress, done, cancelled
     priority INTEGER DEFAULT 3,            -- 1 (P1) to 5 (P5)
@@ -29,13 +55,55 @@ CREATE TABLE IF NOT EXISTS tasks (
     tags TEXT[],                           -- Array of tags
     project_id BIGINT REFERENCES projects(id),
     parent_task_id BIGINT REFERENCES tasks(id),  -- For subtasks
+    subtask_total INTEGER NOT NULL DEFAULT 0,    -- Descendants, not cancelled
+    subtask_done INTEGER NOT NULL DEFAULT 0,     -- Descendants done
     created_at TIMESTAMPTZ DEFAULT NOW(),
-    updated_at TIMESTAMPTZ DEFAULT NOW()
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('vietnamese_unaccent'::regconfig, content)
+    ) STORED                               -- /search (TaskService.search)
+);
+
+-- Add search_vector to tasks tables created before it existed
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('vietnamese_unaccent'::regconfig, content)
+) STORED;
+
+-- Add subtask rollups to tasks tables created before they existed
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS subtask_total INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS subtask_done INTEGER NOT NULL DEFAULT 0;
+
+-- Add ownership to tables created before it existed; existing rows stay
+-- unclaimed (0) until the app claims them for TELEGRAM_OWNER_CHAT_ID
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS owner_chat_id BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS owner_chat_id BIGINT NOT NULL DEFAULT 0;
+
+-- tag_counts is derived data: a pre-ownership table (keyed by tag alone) is
+-- dropped here and rebuilt per owner by the backfill below
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM information_schema.tables WHERE table_name = 'tag_counts')
+       AND NOT EXISTS (SELECT 1 FROM information_schema.columns
+                       WHERE table_name = 'tag_counts' AND column_name = 'owner_chat_id')
+    THEN
+        DROP TABLE tag_counts;
+    END IF;
+END
+$$;
+
+-- Tasks per owner and tag (maintained by the tag_counts triggers below; read by /tags)
+CREATE TABLE IF NOT EXISTS tag_counts (
+    owner_chat_id BIGINT NOT NULL,
+    tag TEXT NOT NULL,
+    task_count INTEGER NOT NULL DEFAULT 0,
+    active_count INTEGER NOT NULL DEFAULT 0, -- todo + in_progress
+    PRIMARY KEY (owner_chat_id, tag)
 );
 
 -- Reminders linked to tasks
 CREATE TABLE IF NOT EXISTS reminders (
     id BIGINT PRIMARY KEY DEFAULT nextval('reminders_id_seq'),
+    owner_chat_id BIGINT NOT NULL DEFAULT 0,  -- Chat the reminder is sent to (0: unclaimed)
     task_id BIGINT REFERENCES tasks(id) ON DELETE CASCADE,
     remind_at TIMESTAMPTZ NOT NULL,
     message TEXT,
@@ -43,6 +111,8 @@ CREATE TABLE IF NOT EXISTS reminders (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+ALTER TABLE reminders ADD COLUMN IF NOT EXISTS owner_chat_id BIGINT NOT NULL DEFAULT 0;
+
 -- Calendar events (synced or manual)
 CREATE TABLE IF NOT EXISTS calendar_events (
     id BIGINT PRIMARY KEY DEFAULT nextval('calendar_events_id_seq'),
@@ -52,12 +122,33 @@ CREATE TABLE IF NOT EXISTS calendar_events (
     location TEXT,
     source VARCHAR(50) DEFAULT 'manual',   -- manual, google_calendar, etc.
     external_id VARCHAR(255),              -- For sync reference
-    created_at TIMESTAMPTZ DEFAULT NOW()
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    during TSTZRANGE GENERATED ALWAYS AS (
+        CASE WHEN end_time > start_time THEN tstzrange(start_time, end_time)
+             ELSE tstzrange(start_time, start_time, '[]') END
+    ) STORED                               -- Overlap/free-slot queries (GiST)
 );
 
--- Chat logs for RAG and analysis
+-- Add during to calendar_events tables created before it existed
+ALTER TABLE calendar_events ADD COLUMN IF NOT EXISTS during TSTZRANGE GENERATED ALWAYS AS (
+    CASE WHEN end_time > start_time THEN tstzrange(start_time, end_time)
+         ELSE tstzrange(start_time, start_time, '[]') END
+) STORED;
+
+-- Chat logs for RAG and analysis, range-partitioned by UTC month of
+-- created_at. Partitions are named chat_logs_yYYYYmMM; future ones are
+-- created and old ones archived by app/workers/chat_retention.py. An
+-- unpartitioned chat_logs from an earlier version is converted below.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('chat_logs') AND relkind = 'r') THEN
+        ALTER TABLE chat_logs RENAME TO chat_logs_unpartitioned;
+        ALTER TABLE chat_logs_unpartitioned RENAME CONSTRAINT chat_logs_pkey TO chat_logs_unpartitioned_pkey;
+    END IF;
+END $$;
+
 CREATE TABLE IF NOT EXISTS chat_logs (
-    id BIGINT PRIMARY KEY DEFAULT nextval('chat_logs_id_seq'),
+    id BIGINT NOT NULL DEFAULT nextval('chat_logs_id_seq'),
     session_id VARCHAR(100) NOT NULL,
     telegram_chat_id BIGINT,               -- Telegram chat ID for reference
     role VARCHAR(20) NOT NULL,             -- user, assistant, system
@@ -65,7 +156,51 @@ CREATE TABLE IF NOT EXISTS chat_logs (
     intent VARCHAR(50),                    -- Detected intent (create_task, query, chat, review)
     sentiment FLOAT,                       -- -1.0 to 1.0 (for reflection worker)
     metadata JSONB,                        -- Additional metadata
-    created_at TIMESTAMPTZ DEFAULT NOW()
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)           -- must include the partition key
+) PARTITION BY RANGE (created_at);
+
+-- Partitions from the oldest converted row through three months ahead,
+-- then move the converted rows in
+DO $$
+DECLARE
+    first_month TIMESTAMPTZ;
+    m TIMESTAMPTZ;
+BEGIN
+    PERFORM set_config('TimeZone', 'UTC', true);
+    first_month := date_trunc('month', NOW());
+    IF to_regclass('chat_logs_unpartitioned') IS NOT NULL THEN
+        SELECT LEAST(first_month, date_trunc('month', min(created_at)))
+        INTO first_month FROM chat_logs_unpartitioned;
+    END IF;
+    FOR m IN SELECT generate_series(first_month, date_trunc('month', NOW()) + INTERVAL '3 months', INTERVAL '1 month') LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF chat_logs FOR VALUES FROM (%L) TO (%L)',
+            to_char(m, '"chat_logs_y"YYYY"m"MM'), m, m + INTERVAL '1 month'
+        );
+    END LOOP;
+    IF to_regclass('chat_logs_unpartitioned') IS NOT NULL THEN
+        INSERT INTO chat_logs
+        SELECT id, session_id, telegram_chat_id, role, content, intent, sentiment,
+               metadata, COALESCE(created_at, NOW())
+        FROM chat_logs_unpartitioned;
+        DROP TABLE chat_logs_unpartitioned;
+    END IF;
+END $$;
+
+-- Per-day chat aggregates (maintained incrementally by the reflection worker)
+CREATE TABLE IF NOT EXISTS chat_daily_rollups (
+    session_id VARCHAR(100) NOT NULL,
+    day DATE NOT NULL,                     -- In the user's timezone
+    telegram_chat_id BIGINT,
+    user_messages INTEGER NOT NULL DEFAULT 0,
+    assistant_messages INTEGER NOT NULL DEFAULT 0,
+    sentiment_sum FLOAT NOT NULL DEFAULT 0,
+    sentiment_min FLOAT,
+    intent_counts JSONB NOT NULL DEFAULT '{}',
+    late_night_messages INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (session_id, day)
 );
 
 -- User state (key-value store)
@@ -87,6 +222,15 @@ CREATE TABLE IF NOT EXISTS documents (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Embedding vectors keyed by content hash (ingestion skips known content)
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    model VARCHAR(100) NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,     -- sha256 hex of the embedded text
+    vector BYTEA NOT NULL,                 -- float32 little-endian
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (model, content_hash)
+);
+
 -- LangGraph checkpoints for conversation state
 CREATE TABLE IF NOT EXISTS langgraph_checkpoints (
     thread_id VARCHAR(100) PRIMARY KEY,
@@ -97,14 +241,179 @@ CREATE TABLE IF NOT EXISTS langgraph_checkpoints (
 );
 
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
-CREATE INDEX IF NOT EXISTS idx_tasks_deadline ON tasks(deadline);
+-- Every TaskService query filters by owner_chat_id, so task and project
+-- indexes lead with it: a user's queries scan only their own rows however
+-- many users share the tables. Superseded owner-less indexes are dropped.
+DROP INDEX IF EXISTS idx_tasks_status;
+DROP INDEX IF EXISTS idx_tasks_deadline;
+DROP INDEX IF EXISTS idx_tasks_active_deadline;
+DROP INDEX IF EXISTS idx_tasks_search;
+DROP INDEX IF EXISTS idx_tasks_tags;
+DROP INDEX IF EXISTS idx_tasks_content_trgm;
+CREATE INDEX IF NOT EXISTS idx_tasks_owner_status ON tasks(owner_chat_id, status, priority);
+-- Deadline windows (/today, /overdue, briefing): active tasks only
+CREATE INDEX IF NOT EXISTS idx_tasks_owner_active_deadline ON tasks(owner_chat_id, deadline)
+    WHERE status IN ('todo', 'in_progress') AND deadline IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id);
-CREATE INDEX IF NOT EXISTS idx_chat_logs_session ON chat_logs(session_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_parent ON tasks(parent_task_id) WHERE parent_task_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_tasks_updated ON tasks(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner_search ON tasks USING GIN(owner_chat_id, search_vector);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner_tags ON tasks USING GIN(owner_chat_id, tags);
+CREATE INDEX IF NOT EXISTS idx_tasks_owner_content_trgm ON tasks
+    USING GIN(owner_chat_id, fold_text(content) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_projects_owner ON projects(owner_chat_id, status);
+-- Partitioned indexes (one per partition); history reads the newest rows of
+-- one session/chat, so created_at follows the key
+CREATE INDEX IF NOT EXISTS idx_chat_logs_session_time ON chat_logs(session_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_chat_logs_timestamp ON chat_logs(created_at);
-CREATE INDEX IF NOT EXISTS idx_chat_logs_telegram_chat ON chat_logs(telegram_chat_id);
+CREATE INDEX IF NOT EXISTS idx_chat_logs_chat_time ON chat_logs(telegram_chat_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_chat_daily_rollups_day ON chat_daily_rollups(day);
 CREATE INDEX IF NOT EXISTS idx_reminders_remind_at ON reminders(remind_at) WHERE is_sent = FALSE;
 CREATE INDEX IF NOT EXISTS idx_calendar_events_time ON calendar_events(start_time);
+CREATE INDEX IF NOT EXISTS idx_calendar_events_during ON calendar_events USING GIST(during);
+-- Upsert target of imports (NULL external_ids, i.e. manual events, never collide)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_calendar_events_external ON calendar_events(source, external_id);
+
+-- Notify the reminder scheduler (app/workers/reminders.py) on every change
+CREATE OR REPLACE FUNCTION notify_reminders_changed() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM pg_notify('reminders_changed',
+            json_build_object('op', TG_OP, 'id', OLD.id)::text);
+        RETURN OLD;
+    END IF;
+    PERFORM pg_notify('reminders_changed',
+        json_build_object('op', TG_OP, 'id', NEW.id,
+                          'remind_at', NEW.remind_at, 'is_sent', NEW.is_sent)::text);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS reminders_changed ON reminders;
+CREATE TRIGGER reminders_changed
+    AFTER INSERT OR UPDATE OR DELETE ON reminders
+    FOR EACH ROW EXECUTE FUNCTION notify_reminders_changed();
+
+-- Keep tag_counts in step with task writes (no unnest over tasks per /tags)
+CREATE OR REPLACE FUNCTION maintain_tag_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.tags IS NOT NULL THEN
+        UPDATE tag_counts
+        SET task_count = task_count - 1,
+            active_count = active_count
+                - (OLD.status IN ('todo', 'in_progress'))::int
+        WHERE owner_chat_id = OLD.owner_chat_id
+          AND tag IN (SELECT DISTINCT unnest(OLD.tags));
+        DELETE FROM tag_counts
+        WHERE owner_chat_id = OLD.owner_chat_id
+          AND tag = ANY(OLD.tags) AND task_count <= 0;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.tags IS NOT NULL THEN
+        INSERT INTO tag_counts AS c (owner_chat_id, tag, task_count, active_count)
+        SELECT DISTINCT NEW.owner_chat_id, t, 1,
+               (NEW.status IN ('todo', 'in_progress'))::int
+        FROM unnest(NEW.tags) AS t
+        ON CONFLICT (owner_chat_id, tag) DO UPDATE
+        SET task_count = c.task_count + 1,
+            active_count = c.active_count + EXCLUDED.active_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS tag_counts_insert_delete ON tasks;
+CREATE TRIGGER tag_counts_insert_delete
+    AFTER INSERT OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION maintain_tag_counts();
+
+DROP TRIGGER IF EXISTS tag_counts_update ON tasks;
+CREATE TRIGGER tag_counts_update
+    AFTER UPDATE OF tags, status, owner_chat_id ON tasks
+    FOR EACH ROW
+    WHEN (OLD.tags IS DISTINCT FROM NEW.tags OR OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.owner_chat_id IS DISTINCT FROM NEW.owner_chat_id)
+    EXECUTE FUNCTION maintain_tag_counts();
+
+-- Backfill once for databases that had tagged tasks before tag_counts
+INSERT INTO tag_counts (owner_chat_id, tag, task_count, active_count)
+SELECT owner_chat_id, t, count(*),
+       count(*) FILTER (WHERE status IN ('todo', 'in_progress'))
+FROM tasks, LATERAL (SELECT DISTINCT unnest(tasks.tags) AS t) AS tags
+WHERE NOT EXISTS (SELECT 1 FROM tag_counts)
+GROUP BY owner_chat_id, t;
+
+-- Subtask rollups: add a delta to every ancestor of a task (depth-capped
+-- so a parent_task_id cycle cannot loop)
+CREATE OR REPLACE FUNCTION bump_subtask_rollups(
+    start_id BIGINT, d_total INTEGER, d_done INTEGER
+) RETURNS void AS $$
+    WITH RECURSIVE ancestors AS (
+        SELECT id, parent_task_id, 1 AS depth FROM tasks WHERE id = start_id
+        UNION ALL
+        SELECT t.id, t.parent_task_id, a.depth + 1
+        FROM tasks t JOIN ancestors a ON t.id = a.parent_task_id
+        WHERE a.depth < 100
+    )
+    UPDATE tasks
+    SET subtask_total = subtask_total + d_total,
+        subtask_done = subtask_done + d_done
+    WHERE id IN (SELECT id FROM ancestors)
+      AND (d_total <> 0 OR d_done <> 0);
+$$ LANGUAGE sql;
+
+-- Keep subtask_total/subtask_done in step with task writes: a task counts
+-- itself plus its own rollups towards each ancestor
+CREATE OR REPLACE FUNCTION maintain_subtask_rollups() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.parent_task_id IS NOT NULL THEN
+        PERFORM bump_subtask_rollups(
+            OLD.parent_task_id,
+            -((OLD.status <> 'cancelled')::int + OLD.subtask_total),
+            -((OLD.status = 'done')::int + OLD.subtask_done)
+        );
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.parent_task_id IS NOT NULL THEN
+        PERFORM bump_subtask_rollups(
+            NEW.parent_task_id,
+            (NEW.status <> 'cancelled')::int + NEW.subtask_total,
+            (NEW.status = 'done')::int + NEW.subtask_done
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS subtask_rollups_insert_delete ON tasks;
+CREATE TRIGGER subtask_rollups_insert_delete
+    AFTER INSERT OR DELETE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION maintain_subtask_rollups();
+
+-- Rollup updates do not touch status/parent_task_id, so they do not recurse
+DROP TRIGGER IF EXISTS subtask_rollups_update ON tasks;
+CREATE TRIGGER subtask_rollups_update
+    AFTER UPDATE OF status, parent_task_id ON tasks
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.parent_task_id IS DISTINCT FROM NEW.parent_task_id)
+    EXECUTE FUNCTION maintain_subtask_rollups();
+
+-- Backfill once for databases that had subtasks before the rollup columns
+WITH RECURSIVE tree AS (
+    SELECT parent_task_id AS root, id FROM tasks WHERE parent_task_id IS NOT NULL
+    UNION ALL
+    SELECT tree.root, t.id FROM tasks t JOIN tree ON t.parent_task_id = tree.id
+), rollups AS (
+    SELECT tree.root,
+           count(*) FILTER (WHERE t.status <> 'cancelled') AS total,
+           count(*) FILTER (WHERE t.status = 'done') AS done
+    FROM tree JOIN tasks t ON t.id = tree.id
+    GROUP BY tree.root
+)
+UPDATE tasks
+SET subtask_total = rollups.total, subtask_done = rollups.done
+FROM rollups
+WHERE tasks.id = rollups.root
+  AND NOT EXISTS (SELECT 1 FROM tasks WHERE subtask_total <> 0);
 
 -- Insert default user state
 INSERT INTO user_state (key, value) VALUES
@@ -114,5 +423,7 @@ INSERT INTO user_state (key, value) VALUES
 ON CONFLICT (key) DO NOTHING;
 
 COMMENT ON TABLE tasks IS 'Tasks with SMART criteria tracking';
-COMMENT ON TABLE chat_logs IS 'All chat messages for RAG and reflection analysis';
+COMMENT ON TABLE chat_logs IS 'All chat messages for RAG and reflection analysis, partitioned by month';
 COMMENT ON TABLE user_state IS 'Key-value store for inferred user state';
+COMMENT ON TABLE tag_counts IS 'Tasks per owner and tag, maintained by triggers on tasks';
+COMMENT ON TABLE calendar_events IS 'Meetings and appointments (manual or imported from .ics)';